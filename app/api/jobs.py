@@ -0,0 +1,365 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import os
+import shutil
+import time
+
+from app.config import get_settings
+from app.core import admission, metrics, scheduler
+from app.core.concurrency import gather_bounded
+from app.domain import ocr, pdf_ocr, fileUpload, ner
+from app.model.TextSchema import JobStatus, PageMetadata, TextExtractDocument
+from app.services import storage
+from app.services.jobs import DONE, FAILED, JobManager, JobStore
+
+router = APIRouter(prefix="/jobs")
+
+_manager: Optional[JobManager] = None
+_started = False
+
+
+async def _run_pdf_job(job: Dict[str, Any], progress: Callable[[int, int], None]) -> List[Dict[str, Any]]:
+    params = job["params"]
+    metrics.set_context(mode=params["mode"], lang=params["lang"], source=params["source"])
+    # Jobs never hold up interactive requests
+    scheduler.set_context(params["client_id"], scheduler.BULK)
+    start_time = time.time()
+
+    # Jobs share the server's OCR slots but are never rejected, only delayed
+    page_metadata: List[PageMetadata] = []
+    async with admission.get_controller().slot(can_reject=False):
+        text = await pdf_ocr.process_pdf(
+            # Uploaded or downloaded at submission
+            file_path=os.path.join(job["spool_dir"], "input.pdf"),
+            lang=params["lang"],
+            mode=params["mode"],
+            auto=params["auto_detect"],
+            force_processing=params["force_processing"],
+            force_ocr=params["force_ocr"],
+            progress=progress,
+            on_page=lambda page_number, result: page_metadata.append(PageMetadata(page=page_number, **result.metadata())),
+            pages=params["pages"],
+            max_pages=params["max_pages"]
+        )
+
+    entities = await ner.extract_entities_async(text, lang_hint=params["lang"])
+
+    return [TextExtractDocument(
+        file_name=params["file_name"],
+        text=text,
+        entities=entities,
+        pages=sorted(page_metadata, key=lambda page: page.page),
+        time_taken=str(round((time.time() - start_time), 2))
+    ).model_dump()]
+
+
+async def _run_text_job(job: Dict[str, Any], progress: Callable[[int, int], None]) -> List[Dict[str, Any]]:
+    params = job["params"]
+    metrics.set_context(mode=params["mode"], lang=params["lang"], source=params["source"])
+    scheduler.set_context(params["client_id"], scheduler.BULK)
+    items = params["files"]
+    done = 0
+    progress(0, len(items))
+
+    async def process(item: Dict[str, str]):
+        nonlocal done
+        start_time = time.time()
+        img_path = None
+
+        try:
+            if params["source"] == "upload":
+                img_path = os.path.join(job["spool_dir"], item["stored_as"])
+            else:
+                img_path = await asyncio.to_thread(storage.fetch_object, params["client_id"], item["file_name"])
+
+            result = await ocr.recognize(
+                img_path=img_path,
+                lang=params["lang"],
+                mode=params["mode"],
+                auto=params["auto_detect"]
+            )
+        finally:
+            # Downloaded objects are either in memory or in a temp file
+            if params["source"] != "upload" and isinstance(img_path, str) and os.path.exists(img_path):
+                os.remove(img_path)
+
+        done += 1
+        progress(done, len(items))
+        return item["file_name"], result, time.time() - start_time
+
+    async with admission.get_controller().slot(can_reject=False):
+        ocr_results = await gather_bounded(
+            (process(item) for item in items),
+            limit=get_settings().extract_max_concurrency
+        )
+
+    ner_start = time.time()
+    entities = await ner.extract_entities_batch_async([result.text for _, result, _ in ocr_results], lang_hint=params["lang"])
+    ner_time = time.time() - ner_start
+
+    return [
+        TextExtractDocument(
+            file_name=file_name,
+            text=result.text,
+            entities=file_entities,
+            pages=[PageMetadata(page=1, **result.metadata())],
+            time_taken=str(round(elapsed + ner_time, 2))
+        ).model_dump()
+        for (file_name, result, elapsed), file_entities in zip(ocr_results, entities)
+    ]
+
+
+def get_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        settings = get_settings()
+        _manager = JobManager(
+            store=JobStore(settings.jobs_db_path),
+            spool_dir=settings.jobs_spool_dir,
+            workers=settings.jobs_workers,
+            handlers={"pdf": _run_pdf_job, "text": _run_text_job},
+            lease_seconds=settings.jobs_lease_seconds
+        )
+    return _manager
+
+
+async def _ensure_started() -> JobManager:
+    global _started
+    manager = get_manager()
+    if not _started:
+        await manager.start()
+        _started = True
+    return manager
+
+
+async def resume():
+    """
+    Starts the workers at application startup if there is a job database to resume from.
+    """
+    if os.path.exists(get_settings().jobs_db_path):
+        await _ensure_started()
+
+
+async def shutdown():
+    global _manager, _started
+    if _manager is not None:
+        if _started:
+            await _manager.stop()
+        _manager.store.close()
+    _manager = None
+    _started = False
+
+
+def _status(job: Dict[str, Any]) -> JobStatus:
+    return JobStatus(
+        job_id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        pages_done=job["pages_done"],
+        pages_total=job["pages_total"],
+        error=job["error"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+
+def _spool_upload(upload: UploadFile, path: str):
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
+
+
+def _spool_object(client_id: str, object_key: str, path: str):
+    try:
+        storage.download_file_from_storage(client_id, object_key, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error downloading file: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving file from storage.")
+    with open(path, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            raise HTTPException(status_code=400, detail="Downloaded file is not a valid PDF.")
+
+
+@router.post("/extract_pdf", response_model=JobStatus, status_code=202)
+async def submit_pdf_job(
+    input_file: Optional[UploadFile] = File(None, description="PDF file to process (required if source='upload')"),
+    source: str = Form("upload", description="Source of the file: 'upload' or 'object_storage'"),
+    client_id: Optional[str] = Form(None, description="Client ID for object storage (required if source='object_storage')"),
+    object_key: Optional[str] = Form(None, description="Object key (path) in the bucket (required if source='object_storage')"),
+    lang: str = Form("eng+por", description="Language code (eng, por, eng+por). Use 'auto' to enable OSD."),
+    mode: str = Form("fast", description="OCR mode: 'fast', 'balanced', 'accurate' or 'cascade'."),
+    auto_detect: bool = Form(False, description="Enable Orientation and Script Detection (OSD)."),
+    force_processing: bool = Form(False, description="Force processing even if the selected page count > 10."),
+    force_ocr: bool = Form(False, description="OCR every page even if the PDF already has a text layer."),
+    pages: Optional[str] = Form(None, description="Pages to process, e.g. '1-3,7' or '5-'. Defaults to all pages."),
+    max_pages: Optional[int] = Form(None, description="Process at most this many of the selected pages.")
+):
+    """
+    Queue a PDF extraction job. Accepts the same parameters as /extract_pdf
+    and returns immediately with the job id; poll /jobs/{job_id} for progress.
+    """
+
+    # Validate mode
+    if mode not in ocr.MODES:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast', 'balanced', 'accurate' or 'cascade'.")
+
+    # Validate page selection
+    pdf_ocr.parse_selection(pages, max_pages)
+
+    # Handle 'auto' lang
+    if lang == "auto":
+        auto_detect = True
+        lang = "eng+por"
+
+    metrics.set_context(mode=mode, lang=lang, source=source)
+
+    manager = await _ensure_started()
+    params = {
+        "source": source,
+        "client_id": client_id,
+        "object_key": object_key,
+        "lang": lang,
+        "mode": mode,
+        "auto_detect": auto_detect,
+        "force_processing": force_processing,
+        "force_ocr": force_ocr,
+        "pages": pages,
+        "max_pages": max_pages,
+    }
+
+    if source == "upload":
+        if not input_file:
+            raise HTTPException(status_code=400, detail="input_file is required when source is 'upload'.")
+
+        if client_id or object_key:
+            raise HTTPException(status_code=400, detail="Ambiguous request: cannot provide both upload file and object storage parameters.")
+
+        fileUpload.validate_pdf_file(input_file)
+        params["file_name"] = input_file.filename or "unknown"
+
+    elif source == "object_storage":
+        if input_file:
+            raise HTTPException(status_code=400, detail="Ambiguous request: cannot provide both upload file and object storage parameters.")
+
+        if not client_id or not object_key:
+            raise HTTPException(status_code=400, detail="client_id and object_key are required when source is 'object_storage'.")
+
+        params["file_name"] = object_key
+
+    else:
+        raise HTTPException(status_code=400, detail="Invalid source. Use 'upload' or 'object_storage'.")
+
+    # The input is spooled now so the page limit fails the request, as it
+    # does on /extract_pdf, instead of failing the job later
+    job_id, spool = manager.new_spool()
+    file_path = os.path.join(spool, "input.pdf")
+    try:
+        if source == "upload":
+            await asyncio.to_thread(_spool_upload, input_file, file_path)
+        else:
+            await asyncio.to_thread(_spool_object, client_id, object_key, file_path)
+        await pdf_ocr.select_pages(file_path, force_processing, pages, max_pages)
+    except BaseException:
+        shutil.rmtree(spool, ignore_errors=True)
+        raise
+
+    manager.submit("pdf", params, job_id=job_id, spool_dir=spool)
+    return _status(manager.store.get(job_id))
+
+
+@router.post("/extract_text", response_model=JobStatus, status_code=202)
+async def submit_text_job(
+    input_images: Optional[List[UploadFile]] = File(None, description="List of image files to process (required if source='upload')"),
+    source: str = Form("upload", description="Source of the file: 'upload' or 'object_storage'"),
+    client_id: Optional[str] = Form(None, description="Client ID for object storage (required if source='object_storage')"),
+    object_keys: Optional[List[str]] = Form(None, description="List of object keys (paths) in the bucket (required if source='object_storage')"),
+    lang: str = Form("eng+por", description="Language code (eng, por, eng+por). Use 'auto' to enable OSD."),
+    mode: str = Form("fast", description="OCR mode: 'fast', 'balanced', 'accurate' or 'cascade'."),
+    auto_detect: bool = Form(False, description="Enable Orientation and Script Detection (OSD).")
+):
+    """
+    Queue an image extraction job. Accepts the same parameters as /extract_text
+    and returns immediately with the job id; poll /jobs/{job_id} for progress.
+    """
+
+    # Validate mode
+    if mode not in ocr.MODES:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast', 'balanced', 'accurate' or 'cascade'.")
+
+    # Handle 'auto' lang as auto_detect=True
+    if lang == "auto":
+        auto_detect = True
+        lang = "eng+por"
+
+    metrics.set_context(mode=mode, lang=lang, source=source)
+
+    manager = await _ensure_started()
+    params = {
+        "source": source,
+        "client_id": client_id,
+        "lang": lang,
+        "mode": mode,
+        "auto_detect": auto_detect,
+    }
+
+    if source == "upload":
+        if not input_images:
+            raise HTTPException(status_code=400, detail="input_images is required when source is 'upload'.")
+
+        if client_id or object_keys:
+            raise HTTPException(status_code=400, detail="Ambiguous request: cannot provide both upload files and object storage parameters.")
+
+        for img in input_images:
+            fileUpload.validate_image_file(img)
+
+        job_id, spool = manager.new_spool()
+        files = []
+        for i, img in enumerate(input_images):
+            stored_as = f"{i}{os.path.splitext(img.filename or '')[1]}"
+            await asyncio.to_thread(_spool_upload, img, os.path.join(spool, stored_as))
+            files.append({"file_name": img.filename or "unknown", "stored_as": stored_as})
+        params["files"] = files
+        manager.submit("text", params, job_id=job_id, spool_dir=spool)
+
+    elif source == "object_storage":
+        if input_images:
+            raise HTTPException(status_code=400, detail="Ambiguous request: cannot provide both upload files and object storage parameters.")
+
+        if not client_id or not object_keys:
+            raise HTTPException(status_code=400, detail="client_id and object_keys are required when source is 'object_storage'.")
+
+        params["files"] = [{"file_name": key} for key in object_keys]
+        job_id = manager.submit("text", params)
+
+    else:
+        raise HTTPException(status_code=400, detail="Invalid source. Use 'upload' or 'object_storage'.")
+
+    return _status(manager.store.get(job_id))
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Status of a job, including page (or image) progress.
+    """
+    job = get_manager().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return _status(job)
+
+
+@router.get("/{job_id}/result", response_model=List[TextExtractDocument])
+async def get_job_result(job_id: str):
+    """
+    Result of a finished job, in the same format as the synchronous endpoints.
+    """
+    job = get_manager().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=422, detail=f"Job failed: {job['error']}")
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+    return job["result"]
@@ -1,14 +1,71 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from contextlib import ExitStack
+from typing import AsyncIterator, List, Optional
 import time
 import os
 
-from app.domain import pdf_ocr, fileUpload, ner
-from app.model.TextSchema import TextExtractDocument
+from app.api.streaming import NDJSON_MEDIA_TYPE, ndjson_line
+from app.core import admission, metrics, scheduler
+from app.domain import ocr, pdf_ocr, fileUpload, ner
+from app.model.TextSchema import PageMetadata, StreamedResult, StreamSummary, TextExtractDocument
 from app.services import storage
 
 router = APIRouter()
 
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+async def _stream_pages(
+    file_path: str,
+    page_numbers: List[int],
+    filename: str,
+    lang: str,
+    mode: str,
+    auto: bool,
+    force_ocr: bool,
+    start_time: float,
+    cleanup: ExitStack
+) -> AsyncIterator[str]:
+    """
+    Yields one NDJSON record per page as soon as it is extracted, then a summary.
+    Owns `cleanup`, which releases the input file and the admission slot once
+    streaming ends.
+    """
+    failed = []
+    error = None
+    try:
+        async for page_number, result in pdf_ocr.iter_pages(
+            file_path, page_numbers, lang=lang, mode=mode, auto=auto, force_ocr=force_ocr
+        ):
+            if result.text.startswith(ocr.ERROR_PREFIX):
+                failed.append(page_number)
+            entities = await ner.extract_entities_async(result.text, lang_hint=lang)
+            yield ndjson_line(StreamedResult(
+                type="page",
+                page=page_number,
+                file_name=filename,
+                text=result.text,
+                entities=entities,
+                pages=[PageMetadata(page=page_number, **result.metadata())],
+                time_taken=str(round((time.time() - start_time), 2))
+            ))
+    except Exception as e:
+        # The status line is already sent: report the failure in the summary
+        print(f"Error processing PDF: {e}")
+        error = getattr(e, "detail", None) or str(e)
+    finally:
+        cleanup.close()
+
+    yield ndjson_line(StreamSummary(
+        file_name=filename,
+        total=len(page_numbers),
+        failed=sorted(failed),
+        time_taken=str(round((time.time() - start_time), 2)),
+        error=error
+    ))
+
 @router.post("/extract_pdf", response_model=List[TextExtractDocument])
 async def extract_pdf(
     input_file: Optional[UploadFile] = File(None, description="PDF file to process (required if source='upload')"),
@@ -16,9 +73,13 @@ async def extract_pdf(
     client_id: Optional[str] = Form(None, description="Client ID for object storage (required if source='object_storage')"),
     object_key: Optional[str] = Form(None, description="Object key (path) in the bucket (required if source='object_storage')"),
     lang: str = Form("eng+por", description="Language code (eng, por, eng+por). Use 'auto' to enable OSD."),
-    mode: str = Form("fast", description="OCR mode: 'fast' or 'accurate'."),
+    mode: str = Form("fast", description="OCR mode: 'fast', 'balanced', 'accurate' or 'cascade'."),
     auto_detect: bool = Form(False, description="Enable Orientation and Script Detection (OSD)."),
-    force_processing: bool = Form(False, description="Force processing even if page count > 10.")
+    force_processing: bool = Form(False, description="Force processing even if the selected page count > 10."),
+    force_ocr: bool = Form(False, description="OCR every page even if the PDF already has a text layer."),
+    pages: Optional[str] = Form(None, description="Pages to process, e.g. '1-3,7' or '5-'. Defaults to all pages."),
+    max_pages: Optional[int] = Form(None, description="Process at most this many of the selected pages."),
+    stream: bool = Form(False, description="Stream one NDJSON record per page as it completes, then a summary.")
 ):
     """
     Extract text from uploaded PDF document or from object storage.
@@ -28,23 +89,35 @@ async def extract_pdf(
     - **client_id**: Client ID for object storage (required if source='object_storage').
     - **object_key**: Object key (path) in the bucket (required if source='object_storage').
     - **lang**: Language(s) to use for OCR. Defaults to 'eng+por'.
-    - **mode**: processing mode. 'fast' is quicker, 'accurate' performs preprocessing.
+    - **mode**: processing mode. 'fast' is quicker, 'balanced' deskews and binarizes, 'accurate' performs preprocessing, 'cascade' runs fast and re-reads low-confidence pages accurately at 300 DPI.
     - **auto_detect**: Explicitly enable OSD (Orientation and Script Detection).
     - **force_processing**: Set to True to bypass the 10-page limit safeguard.
+    - **force_ocr**: Set to True to ignore embedded text layers and OCR every page.
+    - **pages**: Page ranges to process, e.g. '1-3,7'. Only these pages are read or rendered,
+      and the 10-page limit applies to them rather than to the whole document.
+    - **max_pages**: Process at most this many of the selected pages (e.g. 1 for a cover sheet).
+    - **stream**: Set to True to receive pages as NDJSON records (`application/x-ndjson`)
+      as soon as each one is done, followed by a `summary` record.
     """
 
     # Validate mode
-    if mode not in ["fast", "accurate"]:
-        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast' or 'accurate'.")
+    if mode not in ocr.MODES:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast', 'balanced', 'accurate' or 'cascade'.")
+
+    # Validate page selection
+    pdf_ocr.parse_selection(pages, max_pages)
 
     # Handle 'auto' lang
     if lang == "auto":
         auto_detect = True
         lang = "eng+por"
 
+    metrics.set_context(mode=mode, lang=lang, source=source)
+
     start_time = time.time()
     filename = "unknown"
-    temp_file = None
+    file_path = None
+    cleanup = ExitStack()
 
     try:
         if source == "upload":
@@ -61,8 +134,8 @@ async def extract_pdf(
             # Validate file type
             fileUpload.validate_pdf_file(input_file)
 
-            # Save file using tempfile
-            temp_file = fileUpload._save_file_to_server(input_file)
+            # poppler needs a path: reuse the spooled upload when it is already on disk
+            file_path = cleanup.enter_context(fileUpload.upload_path(input_file))
 
         elif source == "object_storage":
             if input_file:
@@ -76,7 +149,8 @@ async def extract_pdf(
 
             # Download file
             try:
-                temp_file = storage.download_file_from_storage(client_id, object_key)
+                file_path = storage.download_file_from_storage(client_id, object_key)
+                cleanup.callback(_remove, file_path)
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
@@ -86,7 +160,7 @@ async def extract_pdf(
 
             # Validate PDF header (simple check)
             try:
-                with open(temp_file, "rb") as f:
+                with open(file_path, "rb") as f:
                     header = f.read(5)
                 if header != b"%PDF-":
                     raise HTTPException(status_code=400, detail="Downloaded file is not a valid PDF.")
@@ -98,13 +172,38 @@ async def extract_pdf(
         else:
              raise HTTPException(status_code=400, detail="Invalid source. Use 'upload' or 'object_storage'.")
 
-        # Process PDF
+        # Wait for a processing slot; 503 right away if the server is saturated
+        controller = admission.get_controller()
+        await controller.acquire()
+        cleanup.callback(controller.release)
+
+        # Page limit and unreadable files fail with a status code, even when streaming
+        page_numbers = await pdf_ocr.select_pages(file_path, force_processing, pages, max_pages)
+        # Single pages go ahead of long documents in the OCR queue
+        scheduler.set_context(client_id, scheduler.classify(len(page_numbers)))
+
+        if stream:
+            return StreamingResponse(
+                _stream_pages(
+                    file_path, page_numbers, filename or "unknown", lang, mode, auto_detect,
+                    force_ocr, start_time, cleanup.pop_all()
+                ),
+                media_type=NDJSON_MEDIA_TYPE
+            )
+
+        # Process PDF, keeping how each page was read
+        page_metadata: List[PageMetadata] = []
         text = await pdf_ocr.process_pdf(
-            file_path=temp_file,
+            file_path=file_path,
             lang=lang,
             mode=mode,
             auto=auto_detect,
-            force_processing=force_processing
+            force_processing=force_processing,
+            force_ocr=force_ocr,
+            on_page=lambda page_number, result: page_metadata.append(PageMetadata(page=page_number, **result.metadata())),
+            pages=pages,
+            max_pages=max_pages,
+            page_numbers=page_numbers
         )
 
     except HTTPException as e:
@@ -114,11 +213,10 @@ async def extract_pdf(
         print(f"Error processing PDF: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
     finally:
-        if temp_file and os.path.exists(temp_file):
-            os.remove(temp_file)
+        cleanup.close()
 
-    # Process NER
-    entities = ner.extract_entities(text, lang_hint=lang)
+    # Process NER (off the event loop)
+    entities = await ner.extract_entities_async(text, lang_hint=lang)
 
     time_taken = str(round((time.time() - start_time), 2))
 
@@ -126,5 +224,6 @@ async def extract_pdf(
         file_name=filename or "unknown",
         text=text,
         entities=entities,
+        pages=sorted(page_metadata, key=lambda page: page.page),
         time_taken=time_taken
     )]
@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core import admission, ocr_cache, scheduler
+
+router = APIRouter()
+
+@router.get("/status")
+async def status() -> Dict[str, Any]:
+    """
+    Load of the server: requests running OCR, requests queued for a slot,
+    rejections and time spent waiting in the queue, the OCR work units of
+    each tenant running, queued by priority class and served so far, and the
+    OCR cache's hits, misses and evictions (None when caching is disabled).
+    """
+    cache = ocr_cache.get_cache()
+    return {
+        "admission": admission.get_controller().stats(),
+        "scheduler": scheduler.get_scheduler().stats(),
+        "cache": cache.stats() if cache is not None else None
+    }
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """
+    Prometheus metrics: latency of each pipeline stage by mode, lang and
+    source, pages processed, bytes ingested, work in flight and OCR cache
+    lookups and evictions.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+# Newline-delimited JSON: one record per line, flushed as soon as it is ready
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_line(record: BaseModel) -> str:
+    return record.model_dump_json() + "\n"
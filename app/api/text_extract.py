@@ -1,14 +1,63 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+import asyncio
 import time
 import os
 
+from app.api.streaming import NDJSON_MEDIA_TYPE, ndjson_line
+from app.config import get_settings
+from app.core import admission, metrics, scheduler
+from app.core.concurrency import gather_bounded, iter_bounded
 from app.domain import ocr, fileUpload, ner
-from app.model.TextSchema import TextExtractDocument
+from app.model.TextSchema import PageMetadata, StreamedResult, StreamSummary, TextExtractDocument
 from app.services import storage
 
 router = APIRouter()
 
+async def _stream_files(
+    work: Iterable[Awaitable[Tuple[str, ocr.OCRResult, float]]],
+    total: int,
+    limit: int,
+    lang: str,
+    start_time: float,
+    release: Callable[[], None]
+) -> AsyncIterator[str]:
+    """
+    Yields one NDJSON record per file as soon as it is extracted, then a summary.
+    Calls `release` to free the admission slot once the files are done.
+    """
+    failed = []
+    error = None
+    try:
+        async for index, (file_name, result, elapsed) in iter_bounded(work, limit=limit):
+            if result.text.startswith(ocr.ERROR_PREFIX):
+                failed.append(index)
+            ner_start = time.time()
+            entities = await ner.extract_entities_async(result.text, lang_hint=lang)
+            yield ndjson_line(StreamedResult(
+                type="file",
+                index=index,
+                file_name=file_name,
+                text=result.text,
+                entities=entities,
+                pages=[PageMetadata(page=1, **result.metadata())],
+                time_taken=str(round(elapsed + (time.time() - ner_start), 2))
+            ))
+    except Exception as e:
+        # The status line is already sent: report the failure in the summary
+        print(f"Error processing images: {e}")
+        error = getattr(e, "detail", None) or str(e)
+    finally:
+        release()
+
+    yield ndjson_line(StreamSummary(
+        total=total,
+        failed=sorted(failed),
+        time_taken=str(round((time.time() - start_time), 2)),
+        error=error
+    ))
+
 @router.post("/extract_text", response_model=List[TextExtractDocument])
 async def extract_text(
     input_images: Optional[List[UploadFile]] = File(None, description="List of image files to process (required if source='upload')"),
@@ -16,8 +65,9 @@ async def extract_text(
     client_id: Optional[str] = Form(None, description="Client ID for object storage (required if source='object_storage')"),
     object_keys: Optional[List[str]] = Form(None, description="List of object keys (paths) in the bucket (required if source='object_storage')"),
     lang: str = Form("eng+por", description="Language code (eng, por, eng+por). Use 'auto' to enable OSD."),
-    mode: str = Form("fast", description="OCR mode: 'fast' or 'accurate'."),
-    auto_detect: bool = Form(False, description="Enable Orientation and Script Detection (OSD).")
+    mode: str = Form("fast", description="OCR mode: 'fast', 'balanced', 'accurate' or 'cascade'."),
+    auto_detect: bool = Form(False, description="Enable Orientation and Script Detection (OSD)."),
+    stream: bool = Form(False, description="Stream one NDJSON record per file as it completes, then a summary.")
 ):
     """
     Extract text from uploaded images or from object storage using Tesseract OCR.
@@ -27,20 +77,25 @@ async def extract_text(
     - **client_id**: Client ID for object storage (required if source='object_storage').
     - **object_keys**: List of object keys (paths) in the bucket (required if source='object_storage').
     - **lang**: Language(s) to use for OCR. Defaults to 'eng+por'. set to 'auto' to force OSD.
-    - **mode**: processing mode. 'fast' is quicker, 'accurate' performs preprocessing (rescaling, etc.).
+    - **mode**: processing mode. 'fast' is quicker, 'balanced' deskews and binarizes, 'accurate' performs preprocessing (rescaling, etc.), 'cascade' runs fast and re-reads low-confidence images accurately.
     - **auto_detect**: Explicitly enable OSD (Orientation and Script Detection).
+    - **stream**: Set to True to receive files as NDJSON records (`application/x-ndjson`)
+      as soon as each one is done, followed by a `summary` record.
     """
 
     # Validate mode
-    if mode not in ["fast", "accurate"]:
-        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast' or 'accurate'.")
+    if mode not in ocr.MODES:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use 'fast', 'balanced', 'accurate' or 'cascade'.")
 
     # Handle 'auto' lang as auto_detect=True
     if lang == "auto":
         auto_detect = True
         lang = "eng+por" # Default to mixed if user said auto but didn't specify lang. OSD handles orientation.
 
-    results = []
+    metrics.set_context(mode=mode, lang=lang, source=source)
+
+    settings = get_settings()
+    start_time = time.time()
 
     if source == "upload":
         if not input_images:
@@ -49,39 +104,28 @@ async def extract_text(
         if client_id or object_keys:
              raise HTTPException(status_code=400, detail="Ambiguous request: cannot provide both upload files and object storage parameters.")
 
+        # Validate every file type before starting any OCR
         for img in input_images:
-            start_time = time.time()
-            print(f"Processing image: {img.filename}")
-
-            # Validate file type
             fileUpload.validate_image_file(img)
 
-            # Save file using tempfile
-            temp_file = fileUpload._save_file_to_server(img)
+        async def process_upload(img: UploadFile) -> Tuple[str, ocr.OCRResult, float]:
+            start_time = time.time()
+            print(f"Processing image: {img.filename}")
 
-            try:
-                # Process OCR
-                text = await ocr.read_image(
-                    img_path=temp_file,
-                    lang=lang,
-                    mode=mode,
-                    auto=auto_detect
-                )
-
-                # Extract entities
-                entities = ner.extract_entities(text, lang_hint=lang)
-            finally:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+            # Decode straight from Starlette's spooled upload, without another copy on disk
+            result = await ocr.recognize(
+                img_path=img.file,
+                lang=lang,
+                mode=mode,
+                auto=auto_detect
+            )
 
-            time_taken = str(round((time.time() - start_time), 2))
+            return img.filename or "unknown", result, time.time() - start_time
 
-            results.append(TextExtractDocument(
-                file_name=img.filename or "unknown",
-                text=text,
-                entities=entities,
-                time_taken=time_taken
-            ))
+        # Files are processed concurrently
+        work = (process_upload(img) for img in input_images)
+        total = len(input_images)
+        limit = settings.extract_max_concurrency
 
     elif source == "object_storage":
         if input_images:
@@ -90,42 +134,80 @@ async def extract_text(
         if not client_id or not object_keys:
              raise HTTPException(status_code=400, detail="client_id and object_keys are required when source is 'object_storage'.")
 
-        for key in object_keys:
+        async def process_object(key: str) -> Tuple[str, ocr.OCRResult, float]:
             start_time = time.time()
             print(f"Processing image from storage: {client_id}/{key}")
 
-            temp_file = None
+            content = None
             try:
                 try:
-                    temp_file = storage.download_file_from_storage(client_id, key)
+                    # Small objects stay in memory; large ones come back as a temp file path
+                    content = await asyncio.to_thread(storage.fetch_object, client_id, key)
                 except ValueError as e:
                     raise HTTPException(status_code=400, detail=str(e))
                 except Exception as e:
                      print(f"Error downloading file {key}: {e}")
                      raise HTTPException(status_code=500, detail=f"Error retrieving file {key} from storage.")
+                download_time = time.time() - start_time
+
+                # Downloaded objects wait here for an OCR slot while the next ones download
+                async with ocr_slots:
+                    ocr_start = time.time()
+
+                    # Process OCR
+                    result = await ocr.recognize(
+                        img_path=content,
+                        lang=lang,
+                        mode=mode,
+                        auto=auto_detect
+                    )
 
-                # Process OCR
-                text = await ocr.read_image(
-                    img_path=temp_file,
-                    lang=lang,
-                    mode=mode,
-                    auto=auto_detect
-                )
-
-                # Extract entities
-                entities = ner.extract_entities(text, lang_hint=lang)
-
-                time_taken = str(round((time.time() - start_time), 2))
-                results.append(TextExtractDocument(
-                    file_name=key,
-                    text=text,
-                    entities=entities,
-                    time_taken=time_taken
-                ))
+                return key, result, download_time + (time.time() - ocr_start)
             finally:
-                if temp_file and os.path.exists(temp_file):
-                    os.remove(temp_file)
+                if isinstance(content, str) and os.path.exists(content):
+                    os.remove(content)
+
+        # Up to storage_download_concurrency objects are in flight (downloading or
+        # waiting for OCR), so downloads overlap with OCR of objects that already arrived.
+        ocr_slots = asyncio.Semaphore(settings.extract_max_concurrency)
+        work = (process_object(key) for key in object_keys)
+        total = len(object_keys)
+        limit = max(settings.storage_download_concurrency, settings.extract_max_concurrency)
     else:
         raise HTTPException(status_code=400, detail="Invalid source. Use 'upload' or 'object_storage'.")
 
-    return results
+    # Small requests go ahead of large batches in the OCR queue
+    scheduler.set_context(client_id, scheduler.classify(total))
+
+    # Wait for a processing slot; 503 right away if the server is saturated
+    controller = admission.get_controller()
+    await controller.acquire()
+
+    if stream:
+        return StreamingResponse(
+            _stream_files(work, total, limit, lang, start_time, controller.release),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+
+    # Results keep the input order
+    try:
+        ocr_results = await gather_bounded(work, limit=limit)
+    finally:
+        controller.release()
+
+    # Extract entities for all files in one nlp.pipe pass, off the event loop
+    ner_start = time.time()
+    entities = await ner.extract_entities_batch_async([result.text for _, result, _ in ocr_results], lang_hint=lang)
+    ner_time = time.time() - ner_start
+
+    return [
+        TextExtractDocument(
+            file_name=file_name,
+            text=result.text,
+            entities=file_entities,
+            pages=[PageMetadata(page=1, **result.metadata())],
+            # The file's own download/OCR time plus the shared NER pass
+            time_taken=str(round(elapsed + ner_time, 2))
+        )
+        for (file_name, result, elapsed), file_entities in zip(ocr_results, entities)
+    ]
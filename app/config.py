@@ -1,5 +1,7 @@
 import logging
+import os
 from functools import lru_cache
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -11,6 +13,116 @@ class Settings(BaseSettings):
     environment: str = "dev"
     testing: bool = 0
 
+    # Size of the worker pool used to run Tesseract (and the number of PDF
+    # pages OCR'd concurrently).
+    ocr_max_workers: int = os.cpu_count() or 1
+
+    # Maximum number of files processed concurrently within one request.
+    extract_max_concurrency: int = 4
+
+    # Telemetry (Sentry). The sample rates are the fraction of requests
+    # traced and the fraction of traced requests profiled. The 'log' exporter
+    # writes sampled traces to telemetry_log_path instead of sending them.
+    telemetry_enabled: bool = True
+    telemetry_exporter: str = "sentry"
+    sentry_dsn: Optional[str] = None
+    telemetry_traces_sample_rate: float = 0.05
+    telemetry_profiles_sample_rate: float = 0.0
+    telemetry_log_path: str = "data/telemetry.jsonl"
+    # Languages reported as-is in the 'lang' metric label; any other request
+    # language is counted as 'other', so clients can't create unbounded series.
+    metrics_langs: List[str] = ["eng", "por", "eng+por"]
+
+    # OCR work units (images and PDF pages) are shared fairly between
+    # tenants, with per-tenant weights and caps from tenants.json. Requests
+    # of at most this many units are 'interactive' and served before 'bulk'
+    # ones; asynchronous jobs are always bulk.
+    scheduler_interactive_max_units: int = 1
+
+    # Server-wide admission control: requests doing OCR at once, requests
+    # allowed to wait for a slot, and how long they may wait (seconds) before
+    # a 503 with Retry-After (seconds).
+    admission_max_active: int = 4
+    admission_max_queue: int = 32
+    admission_queue_timeout: Optional[float] = 30.0
+    admission_retry_after: int = 5
+
+    # NER runs on its own thread pool; multi-document requests are batched
+    # through nlp.pipe with these batch size and process count.
+    ner_max_workers: int = 2
+    ner_batch_size: int = 32
+    ner_n_process: int = 1
+    # spaCy models are loaded on first use; list models here to load them at
+    # startup instead. Components not needed for NER are never loaded.
+    ner_preload_models: List[str] = []
+    ner_exclude_components: List[str] = [
+        "tagger", "parser", "attribute_ruler", "lemmatizer", "morphologizer", "senter"
+    ]
+
+    # Minimum number of alphanumeric characters for a PDF page's embedded
+    # text layer to be used instead of OCR.
+    pdf_text_layer_min_chars: int = 20
+
+    # Accurate mode resizes each image so its text has about this x-height
+    # (pixels), the size Tesseract reads best, within these scale factors.
+    ocr_target_x_height: int = 24
+    ocr_min_scale: float = 0.5
+    ocr_max_scale: float = 3.0
+    # Balanced mode binarization: 'sauvola' (local thresholds, robust to
+    # uneven lighting) or 'otsu' (one global threshold, slightly faster).
+    ocr_binarization: str = "sauvola"
+    # Cascade mode re-reads images and pages through the accurate pipeline
+    # when the mean word confidence (0-100) of the fast pass is below this.
+    cascade_min_confidence: float = 70.0
+
+    # Rendered PDF pages with less ink than this (share of a thumbnail's
+    # pixels) are treated as blank and not OCR'd; 0 OCRs every page. The
+    # default only skips blank and dust-only pages; a single line of text
+    # is about 0.001, a lone stamp about 0.003.
+    blank_page_max_ink: float = 0.0005
+
+    # Orientation and script detection (auto_detect) runs once per image, or
+    # once per PDF on up to osd_sample_pages pages, on a thumbnail with this
+    # longer side (pixels). Detections below osd_min_confidence are ignored.
+    osd_max_size: int = 1600
+    osd_sample_pages: int = 3
+    osd_min_confidence: float = 2.0
+
+    # OCR result cache, keyed by content hash and OCR parameters. The
+    # in-memory tier is always used when enabled; set ocr_cache_dir to also
+    # keep results on disk across restarts.
+    ocr_cache_enabled: bool = True
+    ocr_cache_max_bytes: int = 64 * 1024 * 1024
+    ocr_cache_dir: Optional[str] = None
+    ocr_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+
+    # Connection pool size of each tenant's S3 client.
+    s3_max_pool_connections: int = 50
+    # Objects up to this size are kept in memory; larger ones go to a temp file.
+    storage_memory_threshold: int = 8 * 1024 * 1024
+    # Objects of one request being downloaded or waiting for OCR at a time.
+    storage_download_concurrency: int = 8
+
+    # Asynchronous jobs: SQLite database, directory for uploaded inputs and
+    # number of background workers.
+    jobs_db_path: str = "data/jobs.db"
+    jobs_spool_dir: str = "data/jobs"
+    jobs_workers: int = 2
+    # A running job belongs to its process for this many seconds, renewed
+    # while it runs; other processes sharing the database only take it over
+    # once the lease expires.
+    jobs_lease_seconds: float = 60.0
+
+    # Tesseract engine: 'auto' keeps initialized engines resident when
+    # tesserocr is installed, 'subprocess' always shells out via pytesseract.
+    tesseract_engine: str = "auto"
+    # Engines kept per (lang, psm, oem); defaults to ocr_max_workers.
+    tesseract_pool_size: Optional[int] = None
+    # Recycle an engine after this many calls (0 disables recycling).
+    tesseract_pool_max_uses: int = 500
+    # Languages initialized at startup.
+    tesseract_warm_langs: List[str] = ["eng+por"]
+
 @lru_cache()
 def get_settings() -> BaseSettings:
     log.info("Loading config settings from the environment...")
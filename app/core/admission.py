@@ -0,0 +1,137 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.core import metrics
+
+
+class AdmissionController:
+    """
+    Server-wide limit on requests doing OCR work.
+
+    At most `max_active` requests run at once. Up to `max_queue` more wait
+    for a slot, in arrival order, for at most `queue_timeout` seconds. Beyond
+    that, requests are rejected right away with 503 and a Retry-After header
+    instead of slowing down everything already running.
+
+    Slots are plain counters rather than an asyncio.Semaphore so the
+    controller is not tied to the event loop it was first used on.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, queue_timeout: Optional[float], retry_after: int):
+        self.max_active = max(1, max_active)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _busy(self, detail: str) -> HTTPException:
+        return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(self.retry_after)})
+
+    def _admit(self, waited: float):
+        self.admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        metrics.ADMISSION_WAIT.observe(waited)
+
+    async def acquire(self, can_reject: bool = True):
+        """
+        Waits for a slot. Every successful call must be paired with release().
+
+        Args:
+            can_reject (bool): If False (background jobs), waits as long as it
+                takes, ignoring the queue limit and timeout.
+
+        Raises:
+            HTTPException: 503 when the queue is full or the wait times out.
+        """
+        if self.active < self.max_active and not self._waiters:
+            self.active += 1
+            self._admit(0.0)
+            return
+
+        if can_reject and len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            metrics.ADMISSION_REJECTED.labels("queue_full").inc()
+            raise self._busy("Server is busy. Retry later.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout if can_reject else None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                metrics.ADMISSION_REJECTED.labels("timeout").inc()
+                raise self._busy("Timed out waiting for a processing slot. Retry later.")
+            raise
+
+        self._admit(time.monotonic() - started)
+
+    def release(self):
+        """
+        Frees a slot, handing it straight to the oldest waiter if there is one.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active = max(0, self.active - 1)
+
+    @asynccontextmanager
+    async def slot(self, can_reject: bool = True):
+        await self.acquire(can_reject)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_avg": round(self._wait_total / self.admitted, 4) if self.admitted else 0.0,
+            "wait_seconds_max": round(self._wait_max, 4),
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        settings = get_settings()
+        _controller = AdmissionController(
+            max_active=settings.admission_max_active,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout,
+            retry_after=settings.admission_retry_after
+        )
+        controller = _controller
+        metrics.ADMISSION_ACTIVE.set_function(lambda: controller.active)
+        metrics.ADMISSION_QUEUED.set_function(lambda: len(controller._waiters))
+    return _controller
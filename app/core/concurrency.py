@@ -0,0 +1,71 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+async def _run_bounded(semaphore: asyncio.Semaphore, aw: Awaitable[T]) -> T:
+    try:
+        async with semaphore:
+            return await aw
+    except asyncio.CancelledError:
+        # Cancelled before getting a slot: close the coroutine so it is
+        # not reported as never awaited.
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        raise
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: int) -> List[T]:
+    """
+    Runs awaitables concurrently, with at most `limit` of them in flight.
+
+    Results are returned in the same order as the input. If any awaitable
+    fails, the remaining ones are cancelled and the exception is re-raised.
+
+    Args:
+        aws (Iterable[Awaitable]): Coroutines to run. They are only started
+            once a slot is free, so expensive setup inside them is bounded too.
+        limit (int): Maximum number of concurrently running awaitables.
+
+    Returns:
+        List: Results in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    tasks = [asyncio.ensure_future(_run_bounded(semaphore, aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def iter_bounded(aws: Iterable[Awaitable[T]], limit: int) -> AsyncIterator[Tuple[int, T]]:
+    """
+    Like gather_bounded, but yields each result as soon as it is ready.
+
+    If any awaitable fails, or the consumer stops iterating early, the
+    remaining ones are cancelled.
+
+    Args:
+        aws (Iterable[Awaitable]): Coroutines to run, started once a slot is free.
+        limit (int): Maximum number of concurrently running awaitables.
+
+    Yields:
+        Tuple[int, Any]: (input index, result) pairs, in completion order.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, aw: Awaitable[T]) -> Tuple[int, T]:
+        return index, await _run_bounded(semaphore, aw)
+
+    tasks = [asyncio.ensure_future(run(index, aw)) for index, aw in enumerate(aws)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let cancelled work run its cleanup before the caller moves on
+        await asyncio.gather(*tasks, return_exceptions=True)
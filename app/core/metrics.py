@@ -0,0 +1,125 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import get_settings
+from app.core import telemetry
+
+# Labels describing the request being served. Set once per request (or job)
+# with set_context; asyncio tasks and asyncio.to_thread inherit them, so the
+# stages below don't need them passed in.
+_LABELS = ("mode", "lang", "source")
+_context: ContextVar[Dict[str, str]] = ContextVar("metrics_context", default={label: "" for label in _LABELS})
+
+# From a cached lookup to a large PDF rendered at 300 DPI
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_SECONDS = Histogram(
+    "api_ocr_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ("stage",) + _LABELS,
+    buckets=_STAGE_BUCKETS
+)
+STAGE_FAILURES = Counter(
+    "api_ocr_stage_failures_total",
+    "Pipeline stage calls that raised an exception.",
+    ("stage",) + _LABELS
+)
+IN_FLIGHT = Gauge(
+    "api_ocr_stage_in_flight",
+    "Pipeline stage calls currently running.",
+    ("stage",)
+)
+PAGES = Counter(
+    "api_ocr_pages_processed_total",
+    "PDF pages and images processed, by how their text was obtained.",
+    ("method",) + _LABELS
+)
+BYTES_INGESTED = Counter(
+    "api_ocr_bytes_ingested_total",
+    "Bytes of uploaded or downloaded input.",
+    ("source",)
+)
+
+CACHE_LOOKUPS = Counter(
+    "api_ocr_cache_lookups_total",
+    "OCR cache lookups, by the tier that answered ('memory', 'disk') or 'miss'.",
+    ("result",)
+)
+CACHE_EVICTIONS = Counter(
+    "api_ocr_cache_evictions_total",
+    "OCR cache entries evicted from memory or trimmed from disk.",
+    ("tier",)
+)
+
+ADMISSION_ACTIVE = Gauge(
+    "api_ocr_admission_active",
+    "Requests holding a processing slot."
+)
+ADMISSION_QUEUED = Gauge(
+    "api_ocr_admission_queued",
+    "Requests waiting for a processing slot."
+)
+ADMISSION_WAIT = Histogram(
+    "api_ocr_admission_wait_seconds",
+    "Time requests waited for a processing slot.",
+    buckets=_STAGE_BUCKETS
+)
+ADMISSION_REJECTED = Counter(
+    "api_ocr_admission_rejected_total",
+    "Requests rejected with 503, because the queue was full or the wait timed out.",
+    ("reason",)
+)
+
+
+def set_context(mode: str, lang: str, source: str):
+    """
+    Sets the labels recorded by the stages of the current request. Languages
+    outside metrics_langs are recorded as 'other'.
+    """
+    if lang not in get_settings().metrics_langs:
+        lang = "other"
+    _context.set({"mode": mode, "lang": lang, "source": source})
+
+
+def labels() -> Dict[str, str]:
+    return _context.get()
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Times a pipeline stage and counts it as in flight while it runs. In
+    sampled traces, the stage also gets its own span.
+
+    Stages: validation, download, pdfinfo, text_layer, rasterize, osd,
+    preprocess, tesseract, ner.
+    """
+    context = labels()
+    in_flight = IN_FLIGHT.labels(stage)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        with telemetry.span(stage, **context):
+            yield
+    except Exception:
+        STAGE_FAILURES.labels(stage=stage, **context).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage=stage, **context).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+
+def count_page(method: str):
+    """
+    Counts one processed page or image. method: 'ocr', 'text_layer', 'cache', 'blank' or 'empty'.
+    """
+    PAGES.labels(method=method, **labels()).inc()
+
+
+def add_bytes(size: int):
+    if size:
+        BYTES_INGESTED.labels(labels()["source"]).inc(size)
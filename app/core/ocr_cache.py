@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import get_settings
+from app.core import metrics
+
+log = logging.getLogger("uvicorn")
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Settings that change the OCR output. They are part of every key, so
+# results computed under an older configuration are not served after a change.
+_RESULT_SETTINGS = (
+    "pdf_text_layer_min_chars",
+    "ocr_target_x_height",
+    "ocr_min_scale",
+    "ocr_max_scale",
+    "ocr_binarization",
+    "cascade_min_confidence",
+    "blank_page_max_ink",
+    "osd_max_size",
+    "osd_sample_pages",
+    "osd_min_confidence",
+)
+
+
+def hash_content(source) -> str:
+    """
+    Returns the SHA-256 hex digest of an image or document.
+
+    Args:
+        source: A file path, raw bytes, a seekable binary stream or a PIL image.
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    elif hasattr(source, "tobytes"):
+        # Decoded image: hash the pixels along with their layout
+        digest.update(f"{source.mode}:{source.size}".encode())
+        digest.update(source.tobytes())
+    else:
+        position = source.tell()
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        source.seek(position)
+
+    return digest.hexdigest()
+
+
+def make_key(content_hash: str, **params) -> str:
+    """
+    Builds a cache key from a content hash and the OCR parameters that
+    influence the result (lang, mode, auto_detect, dpi...), along with the
+    settings that do.
+    """
+    settings = get_settings()
+    config = {name: getattr(settings, name) for name in _RESULT_SETTINGS}
+    payload = json.dumps({"content": content_hash, "settings": config, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class OCRCache:
+    """
+    Two-tier cache of OCR results.
+
+    Entries live in an in-memory LRU bounded by `max_bytes`. When `directory`
+    is set, entries are also written there so they survive restarts; the
+    directory is trimmed (oldest first) once it grows past `disk_max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._disk_size: Optional[int] = None
+        self._lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get_memory(key)
+        if value is None:
+            value = self._get_disk(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._store_memory(key, value)
+        self._write_disk(key, value)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """
+        Like get, but reads the disk tier in a thread, off the event loop.
+        """
+        value = self._get_memory(key)
+        if value is None:
+            value = await asyncio.to_thread(self._get_disk, key) if self.directory else self._get_disk(key)
+        return value
+
+    async def set_async(self, key: str, value: str):
+        """
+        Like set, but writes (and trims) the disk tier in a thread, off the event loop.
+        """
+        self._store_memory(key, value)
+        if self.directory:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def clear(self):
+        """
+        Drops the in-memory tier and resets the counters (but not the
+        Prometheus ones, which only ever grow).
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = self.disk_evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.CACHE_LOOKUPS.labels("memory").inc()
+                return self._entries[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                metrics.CACHE_LOOKUPS.labels("miss").inc()
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            metrics.CACHE_LOOKUPS.labels("disk").inc()
+        self._store_memory(key, value)
+        return value
+
+    def _store_memory(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key).encode("utf-8"))
+            self._entries[key] = value
+            self._size += size
+
+            # Evict least recently used entries
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode("utf-8"))
+                self.evictions += 1
+                metrics.CACHE_EVICTIONS.labels("memory").inc()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            # Touch so trimming removes the least recently used files first
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            log.warning(f"Could not read OCR cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: str):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see partial entries
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path), delete=False) as tmp:
+                tmp.write(value)
+            os.replace(tmp.name, path)
+        except OSError as e:
+            log.warning(f"Could not write OCR cache entry {key}: {e}")
+            return
+
+        if self.disk_max_bytes:
+            with self._lock:
+                if self._disk_size is None:
+                    self._disk_size = sum(size for _, size, _ in self._disk_files())
+                else:
+                    self._disk_size += len(value.encode("utf-8"))
+                if self._disk_size > self.disk_max_bytes:
+                    self._trim_disk()
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _trim_disk(self):
+        # Called with the lock held; trim to 90% to avoid trimming on every write
+        target = int(self.disk_max_bytes * 0.9)
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        size = sum(f[1] for f in files)
+        for path, file_size, _ in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= file_size
+                self.disk_evictions += 1
+                metrics.CACHE_EVICTIONS.labels("disk").inc()
+            except OSError:
+                pass
+        self._disk_size = size
+
+
+_cache: Optional[OCRCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[OCRCache]:
+    """
+    Returns the process-wide OCR cache, or None when caching is disabled.
+    """
+    global _cache
+    settings = get_settings()
+    if not settings.ocr_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRCache(
+                max_bytes=settings.ocr_cache_max_bytes,
+                directory=settings.ocr_cache_dir,
+                disk_max_bytes=settings.ocr_cache_disk_max_bytes
+            )
+        return _cache
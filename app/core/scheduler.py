@@ -0,0 +1,181 @@
+import asyncio
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.core.tenants import get_tenant_config
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# Served in this order: bulk work only runs when no interactive work is waiting
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Tenant of requests without a client_id (uploads)
+DEFAULT_TENANT = "default"
+
+# Tenant and priority class of the request being served. Set once per
+# request (or job) with set_context; tasks and worker threads inherit it.
+_context: ContextVar[Tuple[str, str]] = ContextVar("scheduler_context", default=(DEFAULT_TENANT, INTERACTIVE))
+
+
+def set_context(tenant: Optional[str], priority: str):
+    """
+    Sets the tenant and priority class of the work units of the current request.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    _context.set((tenant or DEFAULT_TENANT, priority))
+
+
+def classify(units: int) -> str:
+    """
+    Priority class of a request made of `units` images or pages.
+    """
+    return INTERACTIVE if units <= get_settings().scheduler_interactive_max_units else BULK
+
+
+def _tenant_limits(tenant: str) -> Tuple[float, Optional[int]]:
+    config = get_tenant_config(tenant)
+    if config is None:
+        return 1.0, None
+    return config.weight, config.max_concurrency
+
+
+class FairScheduler:
+    """
+    Shares the OCR workers between tenants, one work unit (an image or a
+    PDF page) at a time.
+
+    Units wait in a queue per tenant and priority class. Whenever a worker
+    frees up, interactive units go first; within a class, tenants are served
+    in weighted round-robin (stride scheduling: each tenant advances by
+    1/weight per unit served and the one furthest behind goes next), and
+    tenants already at their concurrency cap are skipped. A tenant sending
+    hundreds of pages therefore only delays others by its share.
+
+    Like the admission controller, slots are plain counters so the
+    scheduler is not tied to one event loop.
+    """
+
+    def __init__(self, slots: int, limits: Callable[[str], Tuple[float, Optional[int]]] = _tenant_limits):
+        self.slots = max(1, slots)
+        self.running = 0
+        self._limits = limits
+        self._queues: Dict[Tuple[str, str], Deque[asyncio.Future]] = defaultdict(deque)
+        self._active: Dict[str, int] = defaultdict(int)
+        self._pass: Dict[str, float] = defaultdict(float)
+        self._virtual_time = 0.0
+        self.served: Dict[str, int] = defaultdict(int)
+
+    def _tenant_limits(self, tenant: str) -> Tuple[float, Optional[int]]:
+        # Read on every decision (a dict lookup), so changes to the tenant
+        # configuration apply to the next unit without a restart
+        return self._limits(tenant)
+
+    def _eligible(self, tenant: str) -> bool:
+        _, cap = self._tenant_limits(tenant)
+        return cap is None or self._active.get(tenant, 0) < cap
+
+    def _next(self) -> Optional[Tuple[str, str]]:
+        # Drop waiters that gave up
+        for key, queue in list(self._queues.items()):
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                del self._queues[key]
+
+        for priority in PRIORITIES:
+            candidates = [
+                tenant for (queued_priority, tenant) in self._queues
+                if queued_priority == priority and self._eligible(tenant)
+            ]
+            if candidates:
+                return priority, min(candidates, key=lambda tenant: self._pass[tenant])
+        return None
+
+    def _dispatch(self):
+        while self.running < self.slots:
+            choice = self._next()
+            if choice is None:
+                return
+            priority, tenant = choice
+            waiter = self._queues[choice].popleft()
+            if not self._queues[choice]:
+                del self._queues[choice]
+            self._start(tenant)
+            waiter.set_result(None)
+
+    def _start(self, tenant: str):
+        weight, _ = self._tenant_limits(tenant)
+        # A tenant returning from idle starts level with the others instead
+        # of cashing in the turns it did not use
+        start = max(self._pass[tenant], self._virtual_time)
+        self._virtual_time = start
+        self._pass[tenant] = start + 1.0 / max(weight, 1e-6)
+        self.running += 1
+        self._active[tenant] += 1
+        self.served[tenant] += 1
+
+    async def acquire(self, tenant: str, priority: str):
+        """
+        Waits for a worker. Every successful call must be paired with release().
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[(priority, tenant)].append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The worker was handed over just as we were cancelled
+                self.release(tenant)
+            raise
+
+    def release(self, tenant: str):
+        self.running = max(0, self.running - 1)
+        self._active[tenant] = max(0, self._active[tenant] - 1)
+        if not self._active[tenant]:
+            del self._active[tenant]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Holds a worker for one unit of the current request (see set_context).
+        """
+        tenant, priority = _context.get()
+        await self.acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    def stats(self) -> Dict[str, Any]:
+        queued: Dict[str, Dict[str, int]] = defaultdict(lambda: {priority: 0 for priority in PRIORITIES})
+        for (priority, tenant), queue in self._queues.items():
+            queued[tenant][priority] += sum(not waiter.done() for waiter in queue)
+        tenants = set(queued) | set(self._active) | set(self.served)
+        return {
+            "slots": self.slots,
+            "running": self.running,
+            "tenants": {
+                tenant: {
+                    "running": self._active.get(tenant, 0),
+                    "queued": dict(queued[tenant]),
+                    "served": self.served.get(tenant, 0),
+                }
+                for tenant in sorted(tenants)
+            },
+        }
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_scheduler() -> FairScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler(slots=get_settings().ocr_max_workers)
+    return _scheduler
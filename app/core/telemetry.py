@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Optional
+
+from app.config import get_settings
+
+log = logging.getLogger("uvicorn")
+
+# Set by init(); while False, span() and transaction() cost one check and
+# sentry_sdk is never imported
+_enabled = False
+_sentry = None
+
+
+def _log_transport(path: str):
+    """
+    Builds a transport that writes sampled transactions, with their spans, as
+    JSON lines to a local file instead of sending them to Sentry. Meant for
+    offline runs and benchmarks. Errors and profiles are dropped.
+    """
+    from sentry_sdk.envelope import Envelope
+    from sentry_sdk.transport import Transport
+
+    class LogTransport(Transport):
+        def __init__(self):
+            super().__init__()
+            self.path = path
+            self._lock = threading.Lock()
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        def capture_envelope(self, envelope: Envelope):
+            for item in envelope.items:
+                if item.type != "transaction" or item.payload.json is None:
+                    continue
+                event = item.payload.json
+                record = {
+                    "transaction": event.get("transaction"),
+                    "trace_id": event.get("contexts", {}).get("trace", {}).get("trace_id"),
+                    "start": event.get("start_timestamp"),
+                    "duration": _duration(event),
+                    "spans": [
+                        {
+                            "op": span.get("op"),
+                            "description": span.get("description"),
+                            "duration": _duration(span),
+                            "data": span.get("data", {}),
+                        }
+                        for span in event.get("spans", [])
+                    ],
+                }
+                line = json.dumps(record, default=str)
+                with self._lock, open(self.path, "a") as f:
+                    f.write(line + "\n")
+
+    return LogTransport()
+
+
+def _timestamp(value) -> Optional[float]:
+    # Sentry serializes timestamps as ISO 8601 strings
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return None
+
+
+def _duration(item) -> Optional[float]:
+    start, end = _timestamp(item.get("start_timestamp")), _timestamp(item.get("timestamp"))
+    if start is None or end is None:
+        return None
+    return round(end - start, 6)
+
+
+def init():
+    """
+    Configures Sentry from the settings. Without it, nothing is traced or sent.
+
+    Integrations are listed explicitly: Sentry's default and automatic ones
+    (stdlib, boto3, ...) import botocore at startup, which the app defers
+    until storage is first used.
+    """
+    global _enabled, _sentry
+    settings = get_settings()
+    if not settings.telemetry_enabled:
+        log.info("Telemetry disabled")
+        return
+
+    options = {
+        "environment": settings.environment,
+        "traces_sample_rate": settings.telemetry_traces_sample_rate,
+        "profiles_sample_rate": settings.telemetry_profiles_sample_rate,
+    }
+    if settings.telemetry_exporter == "log":
+        options["transport"] = _log_transport(settings.telemetry_log_path)
+    elif settings.telemetry_exporter == "sentry":
+        if not settings.sentry_dsn:
+            log.warning("Telemetry enabled but SENTRY_DSN is empty; nothing will be sent")
+            return
+        options["dsn"] = settings.sentry_dsn
+    else:
+        raise ValueError(f"Unknown telemetry exporter: {settings.telemetry_exporter}")
+
+    import sentry_sdk
+    from sentry_sdk.integrations.argv import ArgvIntegration
+    from sentry_sdk.integrations.atexit import AtexitIntegration
+    from sentry_sdk.integrations.dedupe import DedupeIntegration
+    from sentry_sdk.integrations.excepthook import ExcepthookIntegration
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+    from sentry_sdk.integrations.logging import LoggingIntegration
+    from sentry_sdk.integrations.starlette import StarletteIntegration
+    from sentry_sdk.integrations.threading import ThreadingIntegration
+
+    sentry_sdk.init(
+        default_integrations=False,
+        integrations=[
+            ArgvIntegration(), AtexitIntegration(), DedupeIntegration(), ExcepthookIntegration(),
+            LoggingIntegration(), ThreadingIntegration(), StarletteIntegration(), FastApiIntegration(),
+        ],
+        **options
+    )
+    _sentry = sentry_sdk
+    _enabled = True
+
+
+@contextmanager
+def span(op: str, **data: Any):
+    """
+    Child span of the current trace. Skipped entirely when telemetry is off
+    or the current request was not sampled.
+    """
+    parent = _sentry.get_current_span() if _enabled else None
+    if parent is None or not parent.sampled:
+        yield None
+        return
+
+    with _sentry.start_span(op=op, name=op) as child:
+        for key, value in data.items():
+            child.set_data(key, value)
+        yield child
+
+
+@contextmanager
+def transaction(name: str, op: str):
+    """
+    Root of a trace for work outside an HTTP request, such as background jobs.
+    """
+    if not _enabled:
+        yield None
+        return
+
+    with _sentry.start_transaction(name=name, op=op) as current:
+        yield current
@@ -9,6 +9,10 @@ class TenantConfig(BaseModel):
     aws_access_key_id: str
     aws_secret_access_key: str
     region_name: str
+    # Share of the OCR workers relative to other tenants, and the most
+    # images/pages of this tenant OCR'd at once (None: no cap).
+    weight: float = 1.0
+    max_concurrency: Optional[int] = None
 
 # Cache for tenant configuration
 _TENANTS_CACHE: Dict[str, TenantConfig] = {}
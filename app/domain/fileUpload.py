@@ -1,20 +1,70 @@
+import io
 import shutil
 import tempfile
 import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
 import filetype
 from fastapi import UploadFile, HTTPException
 
+from app.core import metrics
+
 def _save_file_to_server(uploaded_file):
-    suffix = os.path.splitext(uploaded_file.filename)[1]
+    suffix = os.path.splitext(uploaded_file.filename or "")[1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as buffer:
         shutil.copyfileobj(uploaded_file.file, buffer)
         return buffer.name
 
+def _spooled_path(file) -> Optional[str]:
+    """
+    Returns a path to the file Starlette spooled an upload to, or None when the
+    upload has no file descriptor to point at (e.g. plain in-memory buffers).
+    """
+    try:
+        file.flush()
+        # SpooledTemporaryFile moves uploads still held in memory to disk here
+        fd = file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    # The spooled file is unlinked, but /proc/<pid>/fd/<fd> still opens it,
+    # also from the poppler subprocesses (which don't inherit our descriptors).
+    # It stays valid for as long as the upload is open, and upload_path's
+    # callers only use it within the request, before Starlette closes the upload.
+    path = f"/proc/{os.getpid()}/fd/{fd}"
+    return path if os.path.exists(path) else None
+
+@contextmanager
+def upload_path(uploaded_file: UploadFile) -> Iterator[str]:
+    """
+    Yields a filesystem path to an upload's content, for tools that only accept paths.
+
+    Spooled uploads are used in place through their file descriptor; a temporary
+    copy is only written for uploads without one, and removed on exit.
+    """
+    path = _spooled_path(uploaded_file.file)
+    if path is not None:
+        yield path
+        return
+
+    temp_file = _save_file_to_server(uploaded_file)
+    try:
+        yield temp_file
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+def _count_upload(file: UploadFile):
+    size = getattr(file, "size", None)
+    if isinstance(size, int):
+        metrics.add_bytes(size)
+
+@metrics.track_stage("validation")
 def validate_image_file(file: UploadFile):
     """
     Validates if the uploaded file is a valid image using magic bytes.
     Raises HTTPException(400) if invalid.
     """
+    _count_upload(file)
     try:
         # Read the first 2048 bytes to detect file type
         header = file.file.read(2048)
@@ -37,11 +87,13 @@ def validate_image_file(file: UploadFile):
             raise e
         raise HTTPException(status_code=400, detail=f"Error validating file: {str(e)}")
 
+@metrics.track_stage("validation")
 def validate_pdf_file(file: UploadFile):
     """
     Validates if the uploaded file is a valid PDF using magic bytes.
     Raises HTTPException(400) if invalid.
     """
+    _count_upload(file)
     try:
         # Read the first 2048 bytes to detect file type
         header = file.file.read(2048)
@@ -1,25 +1,83 @@
-import spacy
-from typing import List, Dict, Any, Optional
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import logging
 
+from app.config import get_settings
+from app.core import metrics
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
 log = logging.getLogger("uvicorn")
 
-# Load models globally
-# handling potentially missing models gracefully
-nlp_en: Optional[spacy.language.Language] = None
-nlp_pt: Optional[spacy.language.Language] = None
+# Models are loaded on first use (or at startup via ner_preload_models), so
+# importing this module stays cheap. None means the model is not available.
+_NOT_LOADED: Any = object()
+
+nlp_en: Optional["Language"] = _NOT_LOADED
+nlp_pt: Optional["Language"] = _NOT_LOADED
 
-try:
-    nlp_en = spacy.load("en_core_web_sm")
-    log.info("Loaded spaCy model: en_core_web_sm")
-except OSError:
-    log.warning("spaCy model 'en_core_web_sm' not found. NER for English might not work.")
+_MODEL_NAMES = {
+    "nlp_en": "en_core_web_sm",
+    "nlp_pt": "pt_core_news_sm",
+}
 
-try:
-    nlp_pt = spacy.load("pt_core_news_sm")
-    log.info("Loaded spaCy model: pt_core_news_sm")
-except OSError:
-    log.warning("spaCy model 'pt_core_news_sm' not found. NER for Portuguese might not work.")
+_load_lock = threading.Lock()
+
+def _load_model(name: str) -> Optional["Language"]:
+    """
+    Loads a spaCy model with only the components NER needs.
+    """
+    import spacy
+
+    try:
+        nlp = spacy.load(name, exclude=get_settings().ner_exclude_components)
+        log.info(f"Loaded spaCy model: {name} (pipeline: {', '.join(nlp.pipe_names)})")
+        return nlp
+    except OSError:
+        log.warning(f"spaCy model '{name}' not found. NER for this language might not work.")
+        return None
+
+def _get_model(attr: str) -> Optional["Language"]:
+    """
+    Returns the model stored in the module attribute `attr`, loading it on first use.
+    """
+    model = globals()[attr]
+    if model is not _NOT_LOADED:
+        return model
+
+    with _load_lock:
+        model = globals()[attr]
+        if model is _NOT_LOADED:
+            model = _load_model(_MODEL_NAMES[attr])
+            globals()[attr] = model
+    return model
+
+def preload(names: Optional[List[str]] = None):
+    """
+    Loads the given models (default: ner_preload_models from the settings) ahead of the first request.
+    """
+    if names is None:
+        names = get_settings().ner_preload_models
+    for attr, name in _MODEL_NAMES.items():
+        if name in names:
+            _get_model(attr)
+
+# Dedicated pool so NER never runs on the event loop. spaCy releases the GIL
+# in its heavy parts, and nlp.pipe can fan out to processes (ner_n_process).
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().ner_max_workers,
+            thread_name_prefix="ner"
+        )
+    return _executor
 
 def extract_entities(text: str, lang_hint: str = "eng+por") -> List[Dict[str, Any]]:
     """
@@ -43,6 +101,69 @@ def extract_entities(text: str, lang_hint: str = "eng+por") -> List[Dict[str, An
 
     doc = nlp(text)
 
+    return _normalize_entities(doc)
+
+def extract_entities_batch(texts: List[str], lang_hint: str = "eng+por") -> List[List[Dict[str, Any]]]:
+    """
+    Extracts entities from several texts at once using nlp.pipe.
+
+    Args:
+        texts (List[str]): The input texts.
+        lang_hint (str): Language hint shared by all texts.
+
+    Returns:
+        List[List[Dict[str, Any]]]: One entity list per input text, in order.
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+
+    # Empty texts have no entities; keep them out of the pipeline
+    indexes = [i for i, text in enumerate(texts) if text]
+    if not indexes:
+        return results
+
+    nlp = _select_model(lang_hint)
+
+    if not nlp:
+        log.warning("No suitable spaCy model found for NER extraction.")
+        return results
+
+    settings = get_settings()
+    docs = nlp.pipe(
+        (texts[i] for i in indexes),
+        batch_size=settings.ner_batch_size,
+        n_process=settings.ner_n_process
+    )
+    for i, doc in zip(indexes, docs):
+        results[i] = _normalize_entities(doc)
+
+    return results
+
+def _tracked(func, *args):
+    with metrics.track_stage("ner"):
+        return func(*args)
+
+async def _run_on_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    # Carry the request's metric labels into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), context.run, _tracked, func, *args)
+
+async def extract_entities_async(text: str, lang_hint: str = "eng+por") -> List[Dict[str, Any]]:
+    """
+    Runs extract_entities on the NER pool without blocking the event loop.
+    """
+    return await _run_on_pool(extract_entities, text, lang_hint)
+
+async def extract_entities_batch_async(texts: List[str], lang_hint: str = "eng+por") -> List[List[Dict[str, Any]]]:
+    """
+    Runs extract_entities_batch on the NER pool without blocking the event loop.
+    """
+    return await _run_on_pool(extract_entities_batch, texts, lang_hint)
+
+def _normalize_entities(doc) -> List[Dict[str, Any]]:
+    """
+    Keeps PER, ORG and LOC entities, mapping the labels of both models to a common set.
+    """
     entities = []
     for ent in doc.ents:
         label = ent.label_
@@ -70,7 +191,7 @@ def extract_entities(text: str, lang_hint: str = "eng+por") -> List[Dict[str, An
 
     return entities
 
-def _select_model(lang_hint: str) -> Optional[spacy.language.Language]:
+def _select_model(lang_hint: str) -> Optional["Language"]:
     """
     Selects the appropriate spaCy model based on the language hint.
     """
@@ -81,22 +202,18 @@ def _select_model(lang_hint: str) -> Optional[spacy.language.Language]:
     # If explicitly Portuguese or containing it (like 'eng+por'), prefer PT model
     # as it often handles English entities (names, orgs) reasonably well too,
     # while EN model on PT text fails badly.
+    # Models are only loaded when they are actually needed.
     if "por" in hint:
-        if nlp_pt:
-            return nlp_pt
-        if nlp_en:
-            return nlp_en
-
-    if "eng" in hint:
-        if nlp_en:
-            return nlp_en
-        if nlp_pt:
-            return nlp_pt
-
-    # Default fallback
-    if nlp_pt:
-        return nlp_pt
-    if nlp_en:
-        return nlp_en
+        preference = ["nlp_pt", "nlp_en"]
+    elif "eng" in hint:
+        preference = ["nlp_en", "nlp_pt"]
+    else:
+        # Default fallback
+        preference = ["nlp_pt", "nlp_en"]
+
+    for attr in preference:
+        model = _get_model(attr)
+        if model:
+            return model
 
     return None
@@ -1,45 +1,368 @@
 import asyncio
+import contextvars
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
 import pytesseract
 from PIL import Image, ImageOps
 
-async def read_image(img_path, lang='eng+por', mode='fast', auto=False):
+from app.config import get_settings
+from app.core import metrics, ocr_cache, scheduler
+from app.domain import preprocess, tesseract_pool
+
+# Prefix of the text returned when OCR fails
+ERROR_PREFIX = "[ERROR]"
+
+# 'fast' reads the image as is, 'balanced' deskews and binarizes it,
+# 'accurate' rescales it to the text size Tesseract reads best, and
+# 'cascade' reads it fast and only falls back to accurate when unsure
+MODES = ("fast", "balanced", "accurate", "cascade")
+
+
+@dataclass
+class OCRResult:
+    """
+    Text of one image or page, with how it was obtained.
+
+    source: 'ocr', 'cache', 'text_layer' or 'blank' (PDF pages), 'empty' or 'error'.
+    scale: Resize factor applied before OCR (accurate mode), if any.
+    skew: Rotation applied to straighten the text (balanced mode), in degrees.
+    orientation, script: Detected by OSD (auto_detect), see Orientation.
+    confidence: Mean word confidence (0-100) of the fast pass (cascade mode).
+    pipeline: 'fast' or 'accurate', whichever produced the text (cascade mode).
+    """
+    text: str
+    source: str = "ocr"
+    scale: Optional[float] = None
+    skew: Optional[float] = None
+    orientation: Optional[int] = None
+    script: Optional[str] = None
+    confidence: Optional[float] = None
+    pipeline: Optional[str] = None
+
+    def metadata(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["text"]
+        return data
+
+    def dump(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def load(cls, value: str) -> "OCRResult":
+        """
+        Reads a result written by dump().
+        """
+        return cls(**json.loads(value))
+
+
+@dataclass
+class Orientation:
+    """
+    Result of Tesseract's orientation and script detection.
+
+    rotate: Clockwise rotation (0, 90, 180 or 270 degrees) that makes the page upright.
+    script: Dominant script, e.g. 'Latin'.
+    confidence: Tesseract's orientation confidence.
+    """
+    rotate: int
+    script: Optional[str]
+    confidence: float
+
+# Shared pool for Tesseract calls. Created lazily so the size follows the
+# settings loaded at runtime.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().ocr_max_workers,
+            thread_name_prefix="ocr"
+        )
+    return _executor
+
+def _load_image(source) -> Image.Image:
+    """
+    Opens an image from a path, a file-like object, raw bytes or an already
+    decoded PIL image, without writing anything to disk.
+    """
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+def _thumbnail(image: Image.Image, max_size: int) -> Image.Image:
+    width, height = image.size
+    factor = max_size / max(width, height)
+    if factor >= 1:
+        return image
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+def _describe(source) -> str:
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    return f"<in-memory {type(source).__name__}>"
+
+async def detect_orientation(img_path) -> Optional[Orientation]:
+    """
+    Runs Tesseract OSD on a downscaled copy of an image.
+
+    Args:
+        img_path (str | bytes | file-like | PIL.Image.Image): The image, as for read_image.
+
+    Returns:
+        Orientation or None: None when OSD is inconclusive (too little text,
+            or confidence below the configured minimum).
+    """
+    settings = get_settings()
+    image = _load_image(img_path)
+
+    def run_osd():
+        with metrics.track_stage("osd"):
+            thumbnail = _thumbnail(image, settings.osd_max_size)
+            return pytesseract.image_to_osd(thumbnail, output_type=pytesseract.Output.DICT)
+
+    loop = asyncio.get_running_loop()
+    try:
+        async with scheduler.get_scheduler().slot():
+            info = await loop.run_in_executor(_get_executor(), contextvars.copy_context().run, run_osd)
+    except Exception:
+        # Tesseract refuses pages with too few characters
+        return None
+
+    if float(info.get("orientation_conf", 0)) < settings.osd_min_confidence:
+        return None
+    return Orientation(
+        rotate=int(info.get("rotate", 0)) % 360,
+        script=info.get("script"),
+        confidence=float(info["orientation_conf"])
+    )
+
+async def read_image(img_path, lang='eng+por', mode='fast', auto=False) -> str:
     """
     Reads text from an image using Tesseract.
 
     Args:
-        img_path (str): Path to the image file.
+        img_path (str | bytes | file-like | PIL.Image.Image): Path to the image file,
+            its raw bytes, a readable binary stream, or an already decoded image.
         lang (str): Language code (default: 'eng+por').
-        mode (str): 'fast' (default) or 'accurate'.
-        auto (bool): If True, enables OSD (Orientation and Script Detection) via Tesseract config.
+        mode (str): 'fast' (default), 'balanced', 'accurate' or 'cascade'.
+        auto (bool): If True, detects the orientation (OSD) and uprights the image before OCR.
+
+    Returns:
+        str: The text, or a message starting with ERROR_PREFIX if OCR failed.
+    """
+    result = await recognize(img_path, lang=lang, mode=mode, auto=auto)
+    return result.text
+
+def _words_text(data: Dict[str, List]) -> Tuple[str, float]:
+    """
+    Rebuilds the text of a page from Tesseract's word-level output
+    (image_to_data): words joined by spaces, lines by newlines, and blocks
+    separated by a blank line, as image_to_string lays them out.
+
+    Returns:
+        Tuple[str, float]: The text and the mean confidence (0-100) of its
+            words; 0.0 when no word was recognized.
+    """
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for index, word in enumerate(data["text"]):
+        confidence = float(data["conf"][index])
+        # Layout rows (blocks, lines...) have a confidence of -1
+        if confidence < 0 or not word.strip():
+            continue
+        key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+        lines.setdefault(key, []).append(word.strip())
+        confidences.append(confidence)
+
+    text = ""
+    previous_block = None
+    for (block, _, _), words in lines.items():
+        if previous_block is not None:
+            text += "\n\n" if block != previous_block else "\n"
+        text += " ".join(words)
+        previous_block = block
+    mean = round(sum(confidences) / len(confidences), 1) if confidences else 0.0
+    return text, mean
+
+async def _run_tesseract(image: Image.Image, lang: str, psm: int, with_confidence: bool = False) -> Tuple[str, Optional[float]]:
+    """
+    Runs Tesseract on the shared worker pool.
+
+    Returns:
+        Tuple[str, Optional[float]]: The text and, with with_confidence, the
+            mean word confidence (0-100) from the same pass.
+    """
+    def run_ocr():
+        # Timed in the worker, so time spent queued for a thread isn't counted
+        with metrics.track_stage("tesseract"):
+            if tesseract_pool.is_available():
+                # Lease a resident engine instead of starting a process
+                with tesseract_pool.get_pool().lease(lang, psm) as api:
+                    api.SetImage(image)
+                    text = api.GetUTF8Text()
+                    return text, (float(api.MeanTextConf()) if with_confidence else None)
+            config = f" --psm {psm}"
+            if with_confidence:
+                # Words come with their confidences, no second pass needed
+                data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+                return _words_text(data)
+            return pytesseract.image_to_string(image, lang=lang, config=config), None
+
+    return await _run_in_worker(run_ocr)
+
+async def _run_in_worker(func: Callable, *args):
+    """
+    Runs CPU-bound work (preprocessing, Tesseract) on the shared worker pool,
+    keeping the event loop free for other requests.
+    """
+    loop = asyncio.get_running_loop()
+    # Wait for this tenant's turn, then carry the request's metric labels
+    # into the worker thread
+    async with scheduler.get_scheduler().slot():
+        return await loop.run_in_executor(_get_executor(), contextvars.copy_context().run, func, *args)
+
+def _upright(image: Image.Image, rotate: int) -> Image.Image:
+    """
+    Applies the clockwise rotation found by OSD (0 leaves the image as is).
+    """
+    if rotate:
+        # PIL rotates counter-clockwise
+        return image.rotate(-rotate, expand=True)
+    return image
+
+def _prepare_balanced(image: Image.Image, rotate: int = 0) -> Tuple[Image.Image, float]:
+    """
+    Preprocessing of the balanced mode.
+
+    Returns:
+        Tuple[Image.Image, float]: The image to OCR and the skew corrected.
+    """
+    with metrics.track_stage("preprocess"):
+        # Straighten, binarize and despeckle without enlarging the image
+        return preprocess.clean_page(_upright(image, rotate), get_settings().ocr_binarization)
+
+def _prepare_accurate(image: Image.Image, rotate: int = 0) -> Tuple[Image.Image, float]:
+    """
+    Preprocessing of the accurate mode.
+
+    Returns:
+        Tuple[Image.Image, float]: The image to OCR and the scale applied.
+    """
+    with metrics.track_stage("preprocess"):
+        settings = get_settings()
+        # Preprocessing for accuracy:
+        # 1. Convert to grayscale
+        image = _upright(image, rotate).convert('L')
+        # 2. Resize so the text has the x-height Tesseract reads best:
+        #    small print is enlarged, oversized scans are shrunk
+        image, scale = preprocess.rescale(
+            image, settings.ocr_target_x_height, settings.ocr_min_scale, settings.ocr_max_scale
+        )
+        # 3. Enhance contrast (optional, but histogram equalization often helps)
+        return ImageOps.autocontrast(image), scale
+
+async def recognize(
+    img_path,
+    lang='eng+por',
+    mode='fast',
+    auto=False,
+    orientation=None,
+    hires: Optional[Callable[[], Awaitable[Optional[Image.Image]]]] = None
+) -> OCRResult:
+    """
+    Like read_image, but also reports how the text was obtained.
+
+    In cascade mode the image is first read as in fast mode, keeping the
+    confidence of each word. Only when their mean falls below
+    cascade_min_confidence is it read again through the accurate pipeline.
+
+    Args:
+        orientation (Orientation, optional): With auto, the orientation already
+            detected for the whole document; OSD only runs when it is None.
+        hires (Callable, optional): Cascade mode: returns a sharper copy of the
+            image for the accurate pass (a PDF page rendered at a higher DPI).
+            The copy is closed once read.
+
+    Returns:
+        OCRResult: The text and its metadata. If OCR failed, the text starts
+            with ERROR_PREFIX.
     """
     try:
+        # Look up a previous result for the same content and parameters
+        cache = ocr_cache.get_cache()
+        cache_key = None
+        if cache is not None:
+            content_hash = await asyncio.to_thread(ocr_cache.hash_content, img_path)
+            # A document-level orientation changes the result of this page
+            rotation = {"rotate": orientation.rotate} if auto and orientation else {}
+            cache_key = ocr_cache.make_key(content_hash, lang=lang, mode=mode, auto=auto, **rotation)
+            cached = await cache.get_async(cache_key)
+            if cached is not None:
+                metrics.count_page("cache")
+                result = OCRResult.load(cached)
+                result.source = "cache"
+                return result
+
         # Configuration for Tesseract
-        custom_config = ""
-        if auto:
-            # PSM 1: Automatic page segmentation with OSD.
-            custom_config += " --psm 1"
-        else:
-            # PSM 3: Fully automatic page segmentation, but no OSD. (Default)
-            custom_config += " --psm 3"
+        # PSM 3: Fully automatic page segmentation, but no OSD. Orientation,
+        # when requested, is detected once up front instead of by every page.
+        psm = 3
 
         # Load image
-        image = Image.open(img_path)
+        image = _load_image(img_path)
+        scale = None
+        skew = None
+        confidence = None
+        pipeline = None
+
+        if auto and orientation is None:
+            orientation = await detect_orientation(image)
+
+        # Rotating decodes the whole image, so it happens in the worker too
+        rotate = orientation.rotate if auto and orientation is not None else 0
 
         if mode == 'accurate':
-            # Preprocessing for accuracy:
-            # 1. Convert to grayscale
-            image = image.convert('L')
-            # 2. Resize (Scale 2x) for better character recognition
-            width, height = image.size
-            image = image.resize((width * 2, height * 2), Image.Resampling.LANCZOS)
-            # 3. Enhance contrast (optional, but histogram equalization often helps)
-            image = ImageOps.autocontrast(image)
-
-        # Run OCR in a separate thread
-        def run_ocr():
-            return pytesseract.image_to_string(image, lang=lang, config=custom_config)
-
-        text = await asyncio.to_thread(run_ocr)
-        return text
+            image, scale = await _run_in_worker(_prepare_accurate, image, rotate)
+        elif mode == 'balanced':
+            image, skew = await _run_in_worker(_prepare_balanced, image, rotate)
+        elif rotate:
+            image = await _run_in_worker(_upright, image, rotate)
+
+        text, confidence = await _run_tesseract(image, lang, psm, with_confidence=mode == 'cascade')
+
+        if mode == 'cascade':
+            pipeline = 'fast'
+            # Only pages Tesseract is unsure about pay for the accurate pipeline
+            if confidence < get_settings().cascade_min_confidence:
+                sharper = await hires() if hires is not None else None
+                try:
+                    # The first pass's image is already upright
+                    image, scale = await _run_in_worker(
+                        _prepare_accurate, *((sharper, rotate) if sharper is not None else (image, 0))
+                    )
+                    text, _ = await _run_tesseract(image, lang, psm)
+                finally:
+                    if sharper is not None:
+                        sharper.close()
+                pipeline = 'accurate'
+        metrics.count_page("ocr")
+
+        result = OCRResult(text=text, scale=scale, skew=skew, confidence=confidence, pipeline=pipeline)
+        if auto and orientation is not None:
+            result.orientation = orientation.rotate
+            result.script = orientation.script
+        if cache_key is not None:
+            await cache.set_async(cache_key, result.dump())
+        return result
     except Exception as e:
-        return f"[ERROR] Unable to process file: {img_path}. Error: {str(e)}"
+        return OCRResult(source="error", text=f"{ERROR_PREFIX} Unable to process file: {_describe(img_path)}. Error: {str(e)}")
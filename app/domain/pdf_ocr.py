@@ -1,73 +1,419 @@
 import asyncio
-import tempfile
-import os
-from pdf2image import convert_from_path, pdfinfo_from_path
-from app.domain import ocr
+import io
+import json
+import subprocess
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Tuple
+from pdf2image import pdfinfo_from_path
+from PIL import Image
+from app.config import get_settings
+from app.core import metrics, ocr_cache
+from app.core.concurrency import iter_bounded
+from app.domain import ocr, preprocess
 from fastapi import HTTPException
 
+# Pages processed without force_processing
+_PAGE_LIMIT = 10
+
+async def get_page_count(file_path: str) -> int:
+    """
+    Reads the page count of a PDF.
+
+    Args:
+        file_path (str): Path to the PDF file.
+
+    Returns:
+        int: Number of pages.
+    """
+    try:
+        # pdfinfo_from_path runs 'pdfinfo' command which is part of poppler-utils
+        with metrics.track_stage("pdfinfo"):
+            info = await asyncio.to_thread(pdfinfo_from_path, file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+    return info.get("Pages", 0)
+
+def parse_page_ranges(spec: Optional[str]) -> Optional[List[Tuple[int, Optional[int]]]]:
+    """
+    Parses a page selection such as '1-3,7,10-'.
+
+    Args:
+        spec (str, optional): Comma-separated pages and ranges, 1-based and
+            inclusive. 'N-' runs to the last page.
+
+    Returns:
+        List[Tuple[int, Optional[int]]] or None: (first, last) pairs, last being
+            None for open ranges; None when no selection was given.
+    """
+    if spec is None or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        try:
+            start = int(first)
+            end = (int(last) if last.strip() else None) if dash else start
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid page range: '{part.strip()}'. Use e.g. '1-3,7'.")
+        if start < 1 or (end is not None and end < start):
+            raise HTTPException(status_code=400, detail=f"Invalid page range: '{part.strip()}'. Use e.g. '1-3,7'.")
+        ranges.append((start, end))
+    return ranges
+
+def parse_selection(pages: Optional[str], max_pages: Optional[int]) -> Optional[List[Tuple[int, Optional[int]]]]:
+    """
+    Validates the `pages` and `max_pages` parameters, so malformed values are
+    rejected before any work is done.
+
+    Returns:
+        List[Tuple[int, Optional[int]]] or None: The ranges of parse_page_ranges.
+    """
+    if max_pages is not None and max_pages < 1:
+        raise HTTPException(status_code=400, detail="max_pages must be at least 1.")
+    return parse_page_ranges(pages)
+
+async def select_pages(
+    file_path: str,
+    force_processing: bool = False,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None
+) -> List[int]:
+    """
+    Resolves the pages to process and enforces the 10-page safeguard on them.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        force_processing (bool): If True, ignores the 10-page limit.
+        pages (str, optional): Page ranges, as for parse_page_ranges. Pages
+            past the end of the document are ignored.
+        max_pages (int, optional): Keep only the first max_pages selected pages.
+
+    Returns:
+        List[int]: Page numbers in ascending order.
+    """
+    ranges = parse_selection(pages, max_pages)
+    page_count = await get_page_count(file_path)
+
+    if ranges is None:
+        page_numbers = list(range(1, page_count + 1))
+    else:
+        selected = set()
+        for start, end in ranges:
+            selected.update(range(start, min(end or page_count, page_count) + 1))
+        page_numbers = sorted(selected)
+        if not page_numbers and page_count:
+            raise HTTPException(status_code=400, detail=f"No pages selected. PDF has {page_count} pages.")
+    if max_pages is not None:
+        page_numbers = page_numbers[:max_pages]
+
+    if len(page_numbers) > _PAGE_LIMIT and not force_processing:
+        subject = "PDF has" if len(page_numbers) == page_count else "Selection has"
+        raise HTTPException(
+            status_code=400,
+            detail=f"{subject} {len(page_numbers)} pages. Limit is {_PAGE_LIMIT}. Set 'force_processing' to True to override."
+        )
+    return page_numbers
+
+def format_page_ranges(page_numbers: Sequence[int]) -> str:
+    """
+    Compact form of sorted page numbers: [1, 2, 3, 7] -> '1-3,7'.
+    """
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}"
+        for first, last in _contiguous(page_numbers)
+    )
+
+def _contiguous(page_numbers: Sequence[int]) -> List[Tuple[int, int]]:
+    # (first, last) runs of consecutive page numbers
+    runs = []
+    for page_number in page_numbers:
+        if runs and runs[-1][1] == page_number - 1:
+            runs[-1] = (runs[-1][0], page_number)
+        else:
+            runs.append((page_number, page_number))
+    return runs
+
+def _dpi(mode: str) -> int:
+    # Cascade mode renders at the accurate resolution only for pages it re-reads
+    return 300 if mode == 'accurate' else 200
+
+# Resolution of the pages rendered for orientation detection
+_OSD_DPI = 150
+
+async def detect_orientation(file_path: str, page_numbers: List[int]) -> Optional[ocr.Orientation]:
+    """
+    Detects the orientation of a document from a few of its pages.
+
+    Pages are rendered at low resolution and tried in order, up to
+    osd_sample_pages of them, until OSD gives a confident answer.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        page_numbers (List[int]): Candidate pages, typically those needing OCR.
+
+    Returns:
+        ocr.Orientation or None: None if no sampled page was conclusive.
+    """
+    for page_number in page_numbers[:get_settings().osd_sample_pages]:
+        with metrics.track_stage("rasterize"):
+            image = await asyncio.to_thread(_render_page, file_path, page_number, _OSD_DPI)
+        if image is None:
+            continue
+        try:
+            orientation = await ocr.detect_orientation(image)
+        finally:
+            image.close()
+        if orientation is not None:
+            return orientation
+    return None
+
+async def iter_pages(
+    file_path: str,
+    page_numbers: Sequence[int],
+    lang: str = 'eng+por',
+    mode: str = 'fast',
+    auto: bool = False,
+    force_ocr: bool = False
+) -> AsyncIterator[Tuple[int, ocr.OCRResult]]:
+    """
+    Extracts the text of each page, yielding pages as soon as they are done.
+
+    Only the selected pages are read. Those that already carry a usable text
+    layer (born-digital PDFs) return that text directly and are never
+    rasterized. The remaining pages are rendered lazily, one at a time, right
+    before they are OCR'd, and released as soon as their text has been
+    extracted. Rendered pages with (almost) no ink are reported as blank
+    without running OCR.
+
+    With auto, the orientation is detected once for the whole document and
+    applied to every page; pages only run their own detection when the
+    document-level one was inconclusive.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        page_numbers (Sequence[int]): Pages to extract, as returned by select_pages.
+        lang (str): Language code.
+        mode (str): 'fast', 'balanced', 'accurate' or 'cascade'.
+        auto (bool): Enable OSD.
+        force_ocr (bool): If True, OCRs every page even if it has a text layer.
+
+    Yields:
+        Tuple[int, ocr.OCRResult]: (page_number, result) in completion order.
+            Text of pages that could not be OCR'd starts with ocr.ERROR_PREFIX.
+    """
+    dpi = _dpi(mode)
+    max_ink = get_settings().blank_page_max_ink
+
+    # Born-digital pages: use the embedded text instead of OCR, reading
+    # each run of consecutive selected pages in one call
+    text_layer = {}
+    if not force_ocr:
+        with metrics.track_stage("text_layer"):
+            for first, last in _contiguous(page_numbers):
+                texts = await asyncio.to_thread(extract_text_layer, file_path, first, last)
+                text_layer.update(zip(range(first, last + 1), texts))
+
+    orientation = None
+    if auto:
+        orientation = await detect_orientation(
+            file_path, [page_number for page_number in page_numbers if text_layer.get(page_number) is None]
+        )
+
+    async def render_hires(page_number):
+        # Pages the cascade's fast pass was unsure about
+        with metrics.track_stage("rasterize"):
+            return await asyncio.to_thread(_render_page, file_path, page_number, _dpi('accurate'))
+
+    async def ocr_page(page_number):
+        page_text = text_layer.get(page_number)
+        if page_text is not None:
+            metrics.count_page("text_layer")
+            return ocr.OCRResult(text=page_text, source="text_layer")
+
+        # Render only this page, so peak memory depends on the number of
+        # pages in flight rather than on the size of the document.
+        # We run this in a thread because it's CPU bound
+        with metrics.track_stage("rasterize"):
+            image = await asyncio.to_thread(_render_page, file_path, page_number, dpi)
+        if image is None:
+            metrics.count_page("empty")
+            return ocr.OCRResult(text="", source="empty")
+
+        try:
+            # Separator sheets and blank backs of duplex scans
+            if max_ink > 0 and await asyncio.to_thread(preprocess.ink_ratio, image) < max_ink:
+                metrics.count_page("blank")
+                return ocr.OCRResult(text="", source="blank")
+
+            # Hand the rendered page straight to OCR, no intermediate file
+            return await ocr.recognize(
+                image, lang=lang, mode=mode, auto=auto, orientation=orientation,
+                hires=(lambda: render_hires(page_number)) if mode == 'cascade' else None
+            )
+        finally:
+            image.close()
+
+    # OCR pages concurrently
+    async for index, result in iter_bounded(
+        (ocr_page(page_number) for page_number in page_numbers),
+        limit=get_settings().ocr_max_workers
+    ):
+        yield page_numbers[index], result
+
+def format_page(page_number: int, text: str) -> str:
+    return f"--- Page {page_number} ---\n{text}"
+
 async def process_pdf(
     file_path: str,
     lang: str = 'eng+por',
     mode: str = 'fast',
     auto: bool = False,
-    force_processing: bool = False
+    force_processing: bool = False,
+    force_ocr: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    on_page: Optional[Callable[[int, ocr.OCRResult], None]] = None,
+    pages: Optional[str] = None,
+    max_pages: Optional[int] = None,
+    page_numbers: Optional[List[int]] = None
 ) -> str:
     """
     Converts PDF to images and extracts text from each page.
 
+    See iter_pages for how individual pages are handled.
+
     Args:
         file_path (str): Path to the PDF file.
         lang (str): Language code.
-        mode (str): 'fast' or 'accurate'.
+        mode (str): 'fast', 'balanced', 'accurate' or 'cascade'.
         auto (bool): Enable OSD.
         force_processing (bool): If True, ignores the 10-page limit.
+        force_ocr (bool): If True, OCRs every page even if it has a text layer.
+        progress (Callable[[int, int], None], optional): Called with (pages_done, page_count)
+            once the page count is known and after each page completes.
+        on_page (Callable[[int, ocr.OCRResult], None], optional): Called with
+            (page_number, result) for each page, to collect its metadata.
+        pages (str, optional): Page ranges to process, e.g. '1-3,7'. All pages by default.
+        max_pages (int, optional): Process at most this many of the selected pages.
+        page_numbers (List[int], optional): Result of select_pages for the same
+            pages and max_pages, when the caller already resolved them.
 
     Returns:
-        str: Concatenated text from all processed pages.
+        str: Concatenated text from the processed pages.
     """
     try:
-        # Check page count
-        # pdfinfo_from_path runs 'pdfinfo' command which is part of poppler-utils
-        info = await asyncio.to_thread(pdfinfo_from_path, file_path)
-        page_count = info.get("Pages", 0)
+        if page_numbers is None:
+            page_numbers = await select_pages(file_path, force_processing, pages, max_pages)
+        page_count = len(page_numbers)
 
-        if page_count > 10 and not force_processing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"PDF has {page_count} pages. Limit is 10. Set 'force_processing' to True to override."
+        # Whole-document lookup. Pages are also cached individually by
+        # ocr.recognize, so a document with one changed page only re-OCRs that page.
+        cache = ocr_cache.get_cache()
+        cache_key = None
+        if cache is not None:
+            content_hash = await asyncio.to_thread(ocr_cache.hash_content, file_path)
+            cache_key = ocr_cache.make_key(
+                content_hash, lang=lang, mode=mode, auto=auto, dpi=_dpi(mode), text_layer=not force_ocr,
+                # Normalized, so '1-3' and '3,1,2' (or no selection) share an entry
+                pages=format_page_ranges(page_numbers)
             )
+            cached = await cache.get_async(cache_key)
+            if cached is not None:
+                text, cached_pages = _load_document(cached)
+                if on_page:
+                    for page_number, result in zip(page_numbers, cached_pages):
+                        result.source = "cache"
+                        on_page(page_number, result)
+                if progress:
+                    progress(page_count, page_count)
+                return text
 
-        # Determine DPI based on mode
-        dpi = 300 if mode == 'accurate' else 200
-
-        # Convert PDF to images
-        # We run this in a thread because it's CPU bound
-        def convert():
-            return convert_from_path(file_path, dpi=dpi)
-
-        images = await asyncio.to_thread(convert)
+        if progress:
+            progress(0, page_count)
 
-        extracted_text = []
+        results = {page_number: ocr.OCRResult(text="") for page_number in page_numbers}
+        pages_done = 0
+        async for page_number, result in iter_pages(file_path, page_numbers, lang, mode, auto, force_ocr):
+            results[page_number] = result
+            pages_done += 1
+            if on_page:
+                on_page(page_number, result)
+            if progress:
+                progress(pages_done, page_count)
 
-        for i, image in enumerate(images):
-            # Save image to temp file to reuse existing OCR logic
-            # Use delete=False so we can close it before OCR reads it (Windows compat, though running on Linux)
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_img:
-                image.save(temp_img.name)
-                temp_img_path = temp_img.name
+        text = "\n\n".join(
+            format_page(page_number, results[page_number].text)
+            for page_number in page_numbers
+        )
 
-            try:
-                # Reuse the existing OCR logic which handles preprocessing based on mode
-                page_text = await ocr.read_image(temp_img_path, lang=lang, mode=mode, auto=auto)
-                extracted_text.append(f"--- Page {i+1} ---\n{page_text}")
-            finally:
-                if os.path.exists(temp_img_path):
-                    os.remove(temp_img_path)
-
-        return "\n\n".join(extracted_text)
+        # Don't remember documents with failed pages
+        failed = any(result.text.startswith(ocr.ERROR_PREFIX) for result in results.values())
+        if cache_key is not None and not failed:
+            await cache.set_async(cache_key, _dump_document(text, [results[page_number] for page_number in page_numbers]))
+        return text
 
     except HTTPException as he:
         raise he
     except Exception as e:
         # Log the error here if logging was set up
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+
+def _dump_document(text: str, pages: List[ocr.OCRResult]) -> str:
+    return json.dumps({"text": text, "pages": [result.metadata() for result in pages]})
+
+def _load_document(value: str) -> Tuple[str, List[ocr.OCRResult]]:
+    data = json.loads(value)
+    return data["text"], [ocr.OCRResult(text="", **metadata) for metadata in data["pages"]]
+
+def _render_page(file_path: str, page_number: int, dpi: int):
+    """
+    Rasterizes a single PDF page with poppler's pdftoppm.
+
+    pdf2image's convert_from_path would run pdfinfo before every page;
+    select_pages already checked the page count, so pdftoppm is called
+    directly and each page costs a single subprocess.
+
+    Returns:
+        PIL.Image.Image or None: The rendered page, or None if poppler produced no image.
+    """
+    # Uncompressed PPM on stdout, as pdf2image does, so nothing touches the disk
+    result = subprocess.run(
+        ["pdftoppm", "-r", str(dpi), "-f", str(page_number), "-l", str(page_number), file_path],
+        capture_output=True
+    )
+    if not result.stdout:
+        return None
+    image = Image.open(io.BytesIO(result.stdout))
+    image.load()
+    return image
+
+def extract_text_layer(file_path: str, first_page: int, last_page: int) -> List[Optional[str]]:
+    """
+    Reads the embedded text layer of a page range with poppler's pdftotext.
+
+    Returns:
+        List[Optional[str]]: One entry per page in the range. Entries are None
+            when the page has no usable text (e.g. scanned pages) or when
+            pdftotext is unavailable, meaning the page must be OCR'd.
+    """
+    page_total = last_page - first_page + 1
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-f", str(first_page), "-l", str(last_page), "-enc", "UTF-8", file_path, "-"],
+            capture_output=True,
+            timeout=60
+        )
+    except (OSError, subprocess.SubprocessError):
+        return [None] * page_total
+
+    if result.returncode != 0:
+        return [None] * page_total
+
+    # pdftotext ends every page with a form feed
+    pages = result.stdout.decode("utf-8", errors="replace").split("\f")[:page_total]
+    pages += [""] * (page_total - len(pages))
+
+    min_chars = get_settings().pdf_text_layer_min_chars
+    return [
+        page if sum(c.isalnum() for c in page) >= min_chars else None
+        for page in pages
+    ]
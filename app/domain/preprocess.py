@@ -0,0 +1,268 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Text size is measured on a copy whose longer side is at most this many pixels
+_ANALYSIS_SIZE = 1024
+# Vertical strips measured separately, so columns and slight skew don't merge lines
+_STRIPS = 4
+# Scale factors this close to 1 are not worth resampling the page for
+_SCALE_TOLERANCE = 1.2
+# Skew searched by deskew, in degrees; larger rotations are left to OSD
+_MAX_SKEW = 5.0
+# Pages skewed less than this are not rotated
+_MIN_SKEW = 0.1
+# Ink pixels sampled when scoring skew angles
+_SKEW_SAMPLES = 200_000
+# Blank page check: thumbnail size, and how much darker than the paper ink must be
+_BLANK_SIZE = 512
+_BLANK_CONTRAST = 64
+# Sauvola window (pixels), sensitivity and dynamic range of the standard deviation
+_SAUVOLA_WINDOW = 25
+_SAUVOLA_K = 0.2
+_SAUVOLA_R = 128.0
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """
+    Gray level separating ink from background (Otsu's method).
+
+    Args:
+        gray (np.ndarray): 8-bit grayscale image.
+
+    Returns:
+        int: Threshold; pixels at or below it belong to the darker class.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 127
+
+    weight_dark = np.cumsum(hist)
+    weight_light = total - weight_dark
+    cumulative = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_dark = cumulative / weight_dark
+        mean_light = (cumulative[-1] - cumulative) / weight_light
+        variance = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(np.nan_to_num(variance)))
+
+
+def ink_mask(gray: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of text pixels. Light text on a dark background is
+    detected and inverted, since ink covers less of a page than paper.
+    """
+    mask = gray <= otsu_threshold(gray)
+    if mask.mean() > 0.5:
+        mask = ~mask
+    return mask
+
+
+def _box_sum(values: np.ndarray, window: int, pad_mode: str = "edge") -> np.ndarray:
+    """
+    Sum over a `window` x `window` box (odd size) centered on each pixel,
+    from an integral image. Borders are padded with `pad_mode` (np.pad).
+    """
+    padded = np.pad(values.astype(np.float64, copy=False), window // 2, mode=pad_mode)
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    np.cumsum(padded, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return (
+        integral[window:, window:] - integral[:-window, window:]
+        - integral[window:, :-window] + integral[:-window, :-window]
+    )
+
+
+def sauvola_threshold(gray: np.ndarray, window: int = _SAUVOLA_WINDOW, k: float = _SAUVOLA_K) -> np.ndarray:
+    """
+    Per-pixel threshold (Sauvola's method), which follows uneven lighting
+    and stains that defeat a single global threshold.
+
+    Returns:
+        np.ndarray: Thresholds; pixels at or below them are ink.
+    """
+    values = gray.astype(np.float64)
+    area = window * window
+    mean = _box_sum(values, window) / area
+    variance = _box_sum(values * values, window) / area - mean * mean
+    std = np.sqrt(np.maximum(variance, 0))
+    return mean * (1 + k * (std / _SAUVOLA_R - 1))
+
+
+def binarize(gray: np.ndarray, method: str = "sauvola") -> np.ndarray:
+    """
+    Ink mask of a grayscale page, using 'otsu' (global) or 'sauvola' (local)
+    thresholds.
+    """
+    if method == "otsu":
+        return ink_mask(gray)
+    if method == "sauvola":
+        return gray <= sauvola_threshold(gray)
+    raise ValueError(f"Unknown binarization method: {method}")
+
+
+def remove_specks(mask: np.ndarray) -> np.ndarray:
+    """
+    Drops ink pixels with fewer than two inked neighbours: scanner dust and
+    binarization noise, which Tesseract would otherwise try to read.
+    """
+    neighbours = _box_sum(mask, 3, pad_mode="constant") - mask
+    return mask & (neighbours >= 2)
+
+
+def estimate_skew(image: Image.Image) -> float:
+    """
+    Estimates the skew of the text lines, in degrees, from projection
+    profiles: ink pixels are projected along each candidate angle, and the
+    angle whose row histogram has the sharpest peaks (lines lined up with
+    the rows) wins. Searched coarse to fine on a downsampled copy.
+
+    Returns:
+        float: Counter-clockwise rotation that straightens the page, within
+            +/- 5 degrees; 0.0 if no ink was found.
+    """
+    gray = image.convert("L")
+    factor = max(1, math.ceil(max(gray.size) / _ANALYSIS_SIZE))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    ys, xs = np.nonzero(ink_mask(np.asarray(gray)))
+    if len(ys) == 0:
+        return 0.0
+    step = max(1, len(ys) // _SKEW_SAMPLES)
+    ys, xs = ys[::step].astype(np.float64), xs[::step].astype(np.float64)
+
+    def best(angles: np.ndarray) -> float:
+        scores = []
+        for angle in angles:
+            rows = np.round(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+            histogram = np.bincount(rows - rows.min())
+            scores.append(np.dot(histogram, histogram))
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = best(np.arange(-_MAX_SKEW, _MAX_SKEW + 0.25, 0.5))
+    # + 0.0 turns -0.0 into 0.0
+    return round(best(np.arange(coarse - 0.5, coarse + 0.55, 0.1)), 1) + 0.0
+
+
+def clean_page(image: Image.Image, method: str = "sauvola") -> Tuple[Image.Image, float]:
+    """
+    Deskews, binarizes and despeckles a page for OCR.
+
+    Returns:
+        Tuple[Image.Image, float]: A black-on-white 'L' image and the skew
+            angle it was rotated by (degrees, counter-clockwise).
+    """
+    gray = image.convert("L")
+    skew = estimate_skew(gray)
+    if abs(skew) >= _MIN_SKEW:
+        gray = gray.rotate(skew, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+    else:
+        skew = 0.0
+
+    mask = remove_specks(binarize(np.asarray(gray), method))
+    return Image.fromarray(np.where(mask, 0, 255).astype(np.uint8), mode="L"), skew
+
+
+def ink_ratio(image: Image.Image) -> float:
+    """
+    Share of a page covered by ink, measured on a thumbnail.
+
+    The thumbnail keeps the darkest pixel of each block, so thin strokes
+    survive the downsampling. Ink is anything clearly darker than the paper
+    (the median gray level), which ignores paper texture and faint
+    bleed-through; isolated specks of dust are dropped. Pages with light
+    text on a dark background (inverted scans, slides) are inverted first.
+
+    Returns:
+        float: Between 0 (blank) and 1.
+    """
+    gray = np.asarray(image.convert("L"))
+    # A sparse sample is enough to tell dark paper from light paper
+    if gray.size and np.median(gray[::4, ::4]) < 128:
+        gray = 255 - gray
+    factor = max(1, math.ceil(max(gray.shape) / _BLANK_SIZE))
+    if factor > 1:
+        height, width = (gray.shape[0] // factor) * factor, (gray.shape[1] // factor) * factor
+        gray = gray[:height, :width].reshape(height // factor, factor, width // factor, factor).min(axis=(1, 3))
+    if gray.size == 0:
+        return 0.0
+
+    mask = remove_specks(gray < np.median(gray) - _BLANK_CONTRAST)
+    return float(mask.mean())
+
+
+def _runs(flags: np.ndarray) -> np.ndarray:
+    # (start, end) pairs, end exclusive, of consecutive True values
+    padded = np.concatenate(([False], flags, [False]))
+    return np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2)
+
+
+def estimate_x_height(image: Image.Image) -> Optional[float]:
+    """
+    Estimates the typical x-height of the text, in pixels of `image`.
+
+    Works on a downsampled copy: the horizontal projection of each vertical
+    strip splits it into text lines, and the rows of a line holding at least
+    half of its peak ink are its x-height band. The median over all lines is
+    returned.
+
+    Returns:
+        float or None: The x-height, or None when no text lines were found.
+    """
+    gray = image.convert("L")
+    factor = max(1, math.ceil(max(gray.size) / _ANALYSIS_SIZE))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    mask = ink_mask(np.asarray(gray))
+
+    heights = []
+    for strip in np.array_split(mask, _STRIPS, axis=1):
+        if strip.shape[1] == 0:
+            continue
+        profile = strip.sum(axis=1)
+        # A few stray pixels don't make a text row
+        rows = profile >= max(1, strip.shape[1] // 200)
+        for start, end in _runs(rows):
+            # Rules and specks are one or two rows high
+            if end - start < 3:
+                continue
+            line = profile[start:end]
+            heights.append(np.count_nonzero(line * 2 >= line.max()))
+
+    if not heights:
+        return None
+    return float(np.median(heights)) * factor
+
+
+def choose_scale(x_height: Optional[float], target: float, min_scale: float, max_scale: float) -> float:
+    """
+    Scale factor bringing `x_height` to `target`, within [min_scale, max_scale].
+    Returns 1.0 when the text size is unknown or already close to the target.
+    """
+    if not x_height:
+        return 1.0
+    scale = target / x_height
+    if 1 / _SCALE_TOLERANCE <= scale <= _SCALE_TOLERANCE:
+        return 1.0
+    return round(min(max(scale, min_scale), max_scale), 2)
+
+
+def rescale(image: Image.Image, target: float, min_scale: float, max_scale: float) -> Tuple[Image.Image, float]:
+    """
+    Resizes `image` so its text has an x-height of about `target` pixels.
+
+    Returns:
+        Tuple[Image.Image, float]: The resized image (`image` itself when the
+            scale is 1.0) and the scale factor applied.
+    """
+    scale = choose_scale(estimate_x_height(image), target, min_scale, max_scale)
+    if scale == 1.0:
+        return image, scale
+
+    width, height = image.size
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # reducing_gap shrinks large scans with a cheap box filter first
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0), scale
@@ -0,0 +1,153 @@
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import get_settings
+
+log = logging.getLogger("uvicorn")
+
+# tesserocr binds libtesseract directly. It is optional: without it OCR falls
+# back to pytesseract, which starts a tesseract process per call.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# OEM 3: default, based on what is available.
+DEFAULT_OEM = 3
+
+EngineKey = Tuple[str, int, int]
+
+
+class _Engine:
+    def __init__(self, key: EngineKey):
+        lang, psm, oem = key
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+        self.uses = 0
+
+    def close(self):
+        self.api.End()
+
+
+class TesseractPool:
+    """
+    Keeps initialized Tesseract engines resident, one set per (lang, psm, oem).
+
+    At most `size` engines exist per combination; callers block until one is
+    free. An engine is discarded after `max_uses` calls to bound memory growth,
+    and a new one is created on the next lease.
+    """
+
+    def __init__(self, size: int, max_uses: int):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self._lock = threading.Lock()
+        self._idle: Dict[EngineKey, List[_Engine]] = defaultdict(list)
+        self._slots: Dict[EngineKey, threading.BoundedSemaphore] = {}
+
+    def _slot(self, key: EngineKey) -> threading.BoundedSemaphore:
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.size)
+            return self._slots[key]
+
+    def _checkout(self, key: EngineKey) -> _Engine:
+        with self._lock:
+            if self._idle[key]:
+                return self._idle[key].pop()
+        return _Engine(key)
+
+    def _checkin(self, key: EngineKey, engine: _Engine):
+        if self.max_uses and engine.uses >= self.max_uses:
+            engine.close()
+            return
+        with self._lock:
+            self._idle[key].append(engine)
+
+    @contextmanager
+    def lease(self, lang: str, psm: int, oem: int = DEFAULT_OEM):
+        """
+        Leases an engine for the duration of the `with` block.
+
+        Yields:
+            tesserocr.PyTessBaseAPI: An initialized engine.
+        """
+        key = (lang, psm, oem)
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            engine = self._checkout(key)
+            try:
+                yield engine.api
+            except Exception:
+                # State is unknown after a failure; don't hand it out again
+                engine.close()
+                raise
+            engine.api.Clear()
+            engine.uses += 1
+            self._checkin(key, engine)
+        finally:
+            slot.release()
+
+    def warm(self, langs: Iterable[str], psm: int = 3, oem: int = DEFAULT_OEM):
+        """
+        Creates one engine per language ahead of the first request.
+        """
+        for lang in langs:
+            key = (lang, psm, oem)
+            try:
+                self._checkin(key, _Engine(key))
+                log.info(f"Warmed Tesseract engine for '{lang}'")
+            except Exception as e:
+                log.warning(f"Could not warm Tesseract engine for '{lang}': {e}")
+
+    def close(self):
+        """
+        Releases every idle engine.
+        """
+        with self._lock:
+            engines = [engine for idle in self._idle.values() for engine in idle]
+            self._idle.clear()
+        for engine in engines:
+            engine.close()
+
+
+_pool: Optional[TesseractPool] = None
+_pool_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    """
+    True when OCR should go through the resident engine pool.
+    """
+    return tesserocr is not None and get_settings().tesseract_engine != "subprocess"
+
+
+def get_pool() -> TesseractPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = get_settings()
+            _pool = TesseractPool(
+                size=settings.tesseract_pool_size or settings.ocr_max_workers,
+                max_uses=settings.tesseract_pool_max_uses
+            )
+        return _pool
+
+
+def warm_up():
+    """
+    Preloads the languages listed in the settings, if the pool is in use.
+    """
+    if is_available():
+        get_pool().warm(get_settings().tesseract_warm_langs)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
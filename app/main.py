@@ -1,25 +1,36 @@
+import time
+
+# Measured from the first line of the app so the startup time includes imports
+_STARTED_AT = time.perf_counter()
+
+import asyncio
 import os
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-import sentry_sdk
 
-from app.api import text_extract, pdf_extract  # updated
-sentry_sdk.init(
-    dsn="https://5c74c0bf64424183a3d8fea7a803a9b0@o4505535984828416.ingest.sentry.io/4505535986335744",
-    traces_sample_rate=1.0,
-    profiles_sample_rate=1.0,    
-    profiles_sampler=1.0,
-)
+from app.api import text_extract, pdf_extract, jobs, status  # updated
+from app.core import telemetry
+from app.domain import ner, tesseract_pool
+
+# Before the app is created, so Sentry's FastAPI integration can hook into it
+telemetry.init()
 
 log = logging.getLogger("uvicorn")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log.info("Starting up...")
+    await asyncio.to_thread(tesseract_pool.warm_up)
+    await asyncio.to_thread(ner.preload)
+    await jobs.resume()
+    app.state.startup_seconds = round(time.perf_counter() - _STARTED_AT, 3)
+    log.info(f"Startup completed in {app.state.startup_seconds}s")
     yield
     log.info("Shutting down...")
+    await jobs.shutdown()
+    tesseract_pool.shutdown()
 
 def create_application() -> FastAPI:
     application = FastAPI(
@@ -33,6 +44,8 @@ def create_application() -> FastAPI:
     )
     application.include_router(text_extract.router)
     application.include_router(pdf_extract.router)
+    application.include_router(jobs.router)
+    application.include_router(status.router)
 
     return application
 
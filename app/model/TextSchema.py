@@ -7,8 +7,60 @@ class Entity(BaseModel):
     start: int
     end: int
 
+class PageMetadata(BaseModel):
+    """
+    How the text of one PDF page (or image) was obtained.
+
+    source: 'ocr', 'cache', 'text_layer', 'blank', 'empty' or 'error'.
+    scale: Resize factor applied before OCR in accurate mode.
+    skew: Rotation applied to straighten the text in balanced mode (degrees).
+    orientation: With auto_detect, the clockwise rotation (degrees) applied
+        to make the page upright.
+    script: With auto_detect, the detected script (e.g. 'Latin').
+    confidence: In cascade mode, the mean word confidence (0-100) of the fast pass.
+    pipeline: In cascade mode, 'fast' or 'accurate', whichever produced the text.
+    """
+    page: int
+    source: str
+    scale: Optional[float] = None
+    skew: Optional[float] = None
+    orientation: Optional[int] = None
+    script: Optional[str] = None
+    confidence: Optional[float] = None
+    pipeline: Optional[str] = None
+
 class TextExtractDocument(BaseModel):
     file_name: str
     text: str
     entities: Optional[List[Entity]] = None
+    pages: Optional[List[PageMetadata]] = None
+    time_taken: str
+
+class StreamedResult(TextExtractDocument):
+    """
+    One page of a PDF (`page`) or one image (`index`) of a streamed extraction.
+    """
+    type: str
+    page: Optional[int] = None
+    index: Optional[int] = None
+
+class StreamSummary(BaseModel):
+    """
+    Last record of a streamed extraction.
+    """
+    type: str = "summary"
+    file_name: Optional[str] = None
+    total: int
+    failed: List[int] = []
     time_taken: str
+    error: Optional[str] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    pages_done: int = 0
+    pages_total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
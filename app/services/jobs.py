@@ -0,0 +1,290 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core import telemetry
+
+log = logging.getLogger("uvicorn")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# A job handler receives the job record and a progress callback
+# (items_done, items_total) and returns the JSON-serializable result.
+JobHandler = Callable[[Dict[str, Any], Callable[[int, int], None]], Awaitable[Any]]
+
+
+class JobStore:
+    """
+    Persists jobs in a local SQLite database so they survive restarts.
+
+    Running jobs are leased to the process running them (`owner`) until
+    `lease_expires`, which that process keeps pushing back. Several
+    processes can share the database: a job is only taken over once its
+    lease has expired.
+    """
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    spool_dir TEXT,
+                    pages_done INTEGER NOT NULL DEFAULT 0,
+                    pages_total INTEGER,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT,
+                    lease_expires REAL
+                )
+                """
+            )
+
+    def create(self, kind: str, params: Dict[str, Any], job_id: Optional[str] = None,
+               spool_dir: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, spool_dir, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), spool_dir, now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def update(self, job_id: str, owner: Optional[str] = None, **fields) -> bool:
+        """
+        Updates a job. With `owner`, only while that process holds its lease.
+
+        Returns:
+            bool: Whether the job was updated.
+        """
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        query, args = f"UPDATE jobs SET {columns} WHERE id = ?", [*fields.values(), job_id]
+        if owner is not None:
+            query += " AND owner = ?"
+            args.append(owner)
+        with self._lock, self._conn:
+            return self._conn.execute(query, args).rowcount == 1
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Marks a job as running for `owner`, if it is queued or its previous
+        owner's lease has expired. Atomic across processes.
+
+        Returns:
+            bool: Whether `owner` now holds the job.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, pages_done = 0, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND (lease_expires IS NULL OR lease_expires < ?)))",
+                (RUNNING, owner, now + lease_seconds, now, job_id, QUEUED, RUNNING, now)
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float, **fields) -> bool:
+        """
+        Extends `owner`'s lease on a running job, updating `fields` (progress)
+        in the same write.
+        """
+        now = time.time()
+        fields.update(lease_expires=now + lease_seconds, updated_at=now)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND owner = ? AND status = ?",
+                (*fields.values(), job_id, owner, RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def unfinished(self) -> List[str]:
+        """
+        Ids of jobs that were queued or running, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (QUEUED, RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def claimable(self) -> List[str]:
+        """
+        Ids of jobs waiting to run: queued, or running under an expired lease
+        (their process died). Oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND (lease_expires IS NULL OR lease_expires < ?)) "
+                "ORDER BY created_at",
+                (QUEUED, RUNNING, time.time())
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """
+    Runs persisted jobs on a pool of background asyncio workers.
+
+    Each job is claimed with a lease that the worker renews while it runs.
+    Jobs whose lease expired (their process died or was restarted) are
+    picked up again, on start and then periodically, by whichever process
+    claims them first; jobs still held by a live process are left alone.
+    """
+
+    def __init__(self, store: JobStore, spool_dir: str, workers: int, handlers: Dict[str, JobHandler],
+                 lease_seconds: float = 60.0):
+        self.store = store
+        self.spool_dir = spool_dir
+        self.workers = max(1, workers)
+        self.handlers = handlers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: set = set()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reclaim()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def new_spool(self) -> Tuple[str, str]:
+        """
+        Reserves a job id and a directory for its input files.
+        """
+        job_id = uuid.uuid4().hex
+        spool = os.path.join(self.spool_dir, job_id)
+        os.makedirs(spool, exist_ok=True)
+        return job_id, spool
+
+    def submit(self, kind: str, params: Dict[str, Any], job_id: Optional[str] = None,
+               spool_dir: Optional[str] = None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.store.create(kind, params, job_id=job_id, spool_dir=spool_dir)
+        self._enqueue(job_id)
+        return job_id
+
+    def _enqueue(self, job_id: str):
+        if self._queue is not None and job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _reclaim(self):
+        # Jobs queued by other processes, and jobs whose process died
+        while True:
+            for job_id in await asyncio.to_thread(self.store.claimable):
+                self._enqueue(job_id)
+            await asyncio.sleep(self.lease_seconds)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def _heartbeat(self, job_id: str, state: Dict[str, Any], changed: asyncio.Event):
+        # Renews the lease and writes the latest progress, one write at a
+        # time and off the event loop, until the job has finished
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), self.lease_seconds / 3)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+            # Read before the progress, so the last write includes the last update
+            finished = state.get("finished", False)
+            fields = state.pop("progress", {})
+            await asyncio.to_thread(self.store.renew, job_id, self.owner, self.lease_seconds, **fields)
+            if finished:
+                return
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or not await asyncio.to_thread(self.store.claim, job_id, self.owner, self.lease_seconds):
+            # Finished, or running in another process
+            return
+        if job["status"] == RUNNING:
+            log.info(f"Resuming job {job_id}")
+
+        state: Dict[str, Any] = {}
+        changed = asyncio.Event()
+
+        def progress(done: int, total: int):
+            state["progress"] = {"pages_done": done, "pages_total": total}
+            changed.set()
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, state, changed))
+        try:
+            with telemetry.transaction(f"job {job['kind']}", op="job"):
+                result = await self.handlers[job["kind"]](job, progress)
+            outcome = {"status": DONE, "result": result}
+        except asyncio.CancelledError:
+            # Shutting down: release the job to the next process that starts
+            heartbeat.cancel()
+            await asyncio.to_thread(self.store.update, job_id, owner=self.owner, status=QUEUED)
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            log.error(f"Job {job_id} failed: {detail}")
+            outcome = {"status": FAILED, "error": str(detail)}
+
+        # Flush the last progress before the final status, never after it
+        state["finished"] = True
+        changed.set()
+        await heartbeat
+        await asyncio.to_thread(self.store.update, job_id, owner=self.owner, **outcome)
+
+        if job["spool_dir"]:
+            shutil.rmtree(job["spool_dir"], ignore_errors=True)
@@ -1,27 +1,75 @@
-import boto3
 import tempfile
 import os
 import logging
-from botocore.exceptions import ClientError
-from app.core.tenants import get_tenant_config
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from app.config import get_settings
+from app.core import metrics
+from app.core.tenants import TenantConfig, get_tenant_config
 
 log = logging.getLogger("uvicorn")
 
-def download_file_from_storage(client_id: str, object_key: str) -> str:
+# S3 clients per tenant, along with the configuration they were built from.
+# boto3 clients are thread-safe and keep their connection pool between calls.
+_CLIENTS: Dict[str, Tuple[TenantConfig, Any]] = {}
+_clients_lock = threading.Lock()
+
+def get_s3_client(client_id: str, config: TenantConfig):
+    """
+    Returns a cached S3 client for the tenant, building a new one if the
+    tenant's configuration changed since the cached client was created.
+    """
+    with _clients_lock:
+        cached = _CLIENTS.get(client_id)
+        if cached and cached[0] == config:
+            return cached[1]
+
+        # boto3 is slow to import; only pay for it when storage is actually used
+        import boto3
+        from botocore.config import Config
+
+        # Sessions are not thread-safe, so each client gets its own
+        session = boto3.session.Session()
+        s3_client = session.client(
+            "s3",
+            endpoint_url=config.endpoint_url,
+            aws_access_key_id=config.aws_access_key_id,
+            aws_secret_access_key=config.aws_secret_access_key,
+            region_name=config.region_name,
+            config=Config(max_pool_connections=get_settings().s3_max_pool_connections)
+        )
+        _CLIENTS[client_id] = (config.model_copy(), s3_client)
+        return s3_client
+
+def invalidate_s3_clients(client_id: Optional[str] = None):
+    """
+    Drops the cached client of one tenant, or of every tenant.
+    """
+    with _clients_lock:
+        if client_id is None:
+            _CLIENTS.clear()
+        else:
+            _CLIENTS.pop(client_id, None)
+
+@metrics.track_stage("download")
+def download_file_from_storage(client_id: str, object_key: str, path: Optional[str] = None) -> str:
     """
     Downloads a file from object storage to a temporary file.
 
     Args:
         client_id (str): The tenant identifier.
         object_key (str): The path to the file in the bucket.
+        path (str, optional): Write the file here instead of to a temporary file.
 
     Returns:
-        str: The path to the downloaded temporary file.
+        str: The path to the downloaded file.
 
     Raises:
         ValueError: If tenant configuration is missing.
         ClientError: If S3 interaction fails (e.g. file not found).
     """
+    from botocore.exceptions import ClientError
+
     config = get_tenant_config(client_id)
     if not config:
         raise ValueError(f"Configuration for client {client_id} not found.")
@@ -32,18 +80,17 @@ def download_file_from_storage(client_id: str, object_key: str) -> str:
 
         # Create a temporary file (not automatically deleted on close, we delete it later)
         # Using delete=False so we can return the path and use it.
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        if path is not None:
+            destination = open(path, "wb")
+        else:
+            destination = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        with destination as tmp_file:
             log.info(f"Downloading {object_key} for client {client_id} from {config.endpoint_url or 'AWS S3'}...")
 
-            s3_client = boto3.client(
-                "s3",
-                endpoint_url=config.endpoint_url,
-                aws_access_key_id=config.aws_access_key_id,
-                aws_secret_access_key=config.aws_secret_access_key,
-                region_name=config.region_name
-            )
+            s3_client = get_s3_client(client_id, config)
 
             s3_client.download_fileobj(config.bucket_name, object_key, tmp_file)
+            metrics.add_bytes(tmp_file.tell())
             log.info(f"Downloaded to {tmp_file.name}")
             return tmp_file.name
 
@@ -53,3 +100,65 @@ def download_file_from_storage(client_id: str, object_key: str) -> str:
     except Exception as e:
         log.error(f"Unexpected error downloading {object_key}: {e}")
         raise e
+
+@metrics.track_stage("download")
+def fetch_object(client_id: str, object_key: str) -> Union[bytes, str]:
+    """
+    Downloads an object, keeping it in memory when it is small.
+
+    Objects up to `storage_memory_threshold` bytes are returned as bytes.
+    Larger ones, and objects of unknown size, are streamed to a temporary
+    file whose path is returned; the caller is responsible for removing it.
+
+    Args:
+        client_id (str): The tenant identifier.
+        object_key (str): The path to the file in the bucket.
+
+    Returns:
+        Union[bytes, str]: The object content, or the path to a temporary file.
+
+    Raises:
+        ValueError: If tenant configuration is missing.
+        ClientError: If S3 interaction fails (e.g. file not found).
+    """
+    from botocore.exceptions import ClientError
+
+    config = get_tenant_config(client_id)
+    if not config:
+        raise ValueError(f"Configuration for client {client_id} not found.")
+
+    try:
+        log.info(f"Fetching {object_key} for client {client_id} from {config.endpoint_url or 'AWS S3'}...")
+        s3_client = get_s3_client(client_id, config)
+        response = s3_client.get_object(Bucket=config.bucket_name, Key=object_key)
+        body = response["Body"]
+
+        try:
+            size = response.get("ContentLength")
+            if size is not None and size <= get_settings().storage_memory_threshold:
+                content = body.read()
+                metrics.add_bytes(len(content))
+                return content
+
+            # Too large to keep in memory: spill to disk
+            suffix = os.path.splitext(object_key)[1]
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+                try:
+                    for chunk in body.iter_chunks(1024 * 1024):
+                        tmp_file.write(chunk)
+                except BaseException:
+                    tmp_file.close()
+                    os.remove(tmp_file.name)
+                    raise
+                metrics.add_bytes(tmp_file.tell())
+            log.info(f"Downloaded {object_key} to {tmp_file.name}")
+            return tmp_file.name
+        finally:
+            body.close()
+
+    except ClientError as e:
+        log.error(f"S3 ClientError downloading {object_key}: {e}")
+        raise e
+    except Exception as e:
+        log.error(f"Unexpected error downloading {object_key}: {e}")
+        raise e
@@ -0,0 +1,206 @@
+"""
+Deterministic synthetic corpus for the benchmarks.
+
+Everything is derived from a fixed seed, so two runs on any machine produce
+byte-identical files (see the sha256 sums in manifest.json):
+
+- images/: text rendered at several page sizes and rotations.
+- pdf/scanned-*.pdf: multi-page PDFs made of page images, with no text layer.
+- pdf/digital-*.pdf: multi-page born-digital PDFs with a real text layer.
+"""
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+SEED = 1234
+# Pillow stamps PDFs with the current time unless told otherwise
+_PDF_DATE = time.gmtime(1704067200)
+
+# Name, width, height and font size; the larger sizes match A4 at 150 and 300 DPI
+IMAGE_SIZES: Sequence[Tuple[str, int, int, int]] = (
+    ("small", 640, 480, 18),
+    ("a4-150dpi", 1240, 1754, 28),
+    ("a4-300dpi", 2480, 3508, 52),
+)
+ROTATIONS: Sequence[int] = (0, 90, 180, 270)
+PDF_PAGE_COUNTS: Sequence[int] = (2, 5)
+# Scanned PDF pages: A4 at 150 DPI
+PDF_PAGE_SIZE: Tuple[int, int, int] = (1240, 1754, 28)
+
+# Sentences mix English and Portuguese with people, organizations and
+# places, so NER has entities to find. ASCII only: Pillow's built-in font
+# has no accented glyphs.
+_PEOPLE = ["Maria Silva", "John Smith", "Ana Pereira", "Carlos Souza", "Emily Johnson", "Pedro Alves"]
+_ORGS = ["Acme Corporation", "Banco do Brasil", "Petrobras", "Microsoft", "United Nations", "Vale"]
+_PLACES = ["Lisbon", "Sao Paulo", "New York", "Rio de Janeiro", "London", "Brasilia"]
+_TEMPLATES = [
+    "{person} visited {place} to meet the board of {org} on Monday.",
+    "{person} assinou o contrato com a {org} em {place} na semana passada.",
+    "The report from {org} was reviewed by {person} in {place}.",
+    "Segundo {person}, a {org} vai abrir um novo escritorio em {place}.",
+    "Invoice 4821 was issued by {org} to {person}, delivery address in {place}.",
+]
+
+
+def paragraphs(rng: random.Random, count: int) -> List[str]:
+    """
+    Returns `count` lines of synthetic text drawn from `rng`.
+    """
+    return [
+        rng.choice(_TEMPLATES).format(
+            person=rng.choice(_PEOPLE), org=rng.choice(_ORGS), place=rng.choice(_PLACES)
+        )
+        for _ in range(count)
+    ]
+
+
+def render_text_image(lines: Sequence[str], width: int, height: int, font_size: int) -> Image.Image:
+    """
+    Draws black text on a white page, wrapped to the page width.
+    """
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    margin = font_size * 2
+    line_height = int(font_size * 1.5)
+
+    y = margin
+    for line in lines:
+        words = line.split()
+        current = ""
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if draw.textlength(candidate, font=font) > width - 2 * margin and current:
+                draw.text((margin, y), current, fill=0, font=font)
+                y += line_height
+                current = word
+            else:
+                current = candidate
+        if current:
+            draw.text((margin, y), current, fill=0, font=font)
+            y += line_height
+        if y > height - margin - line_height:
+            break
+    return image
+
+
+def _lines_for(height: int, font_size: int) -> int:
+    return max(1, (height - 4 * font_size) // int(font_size * 1.5) // 2)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_digital_pdf(path: str, pages: Sequence[Sequence[str]]):
+    """
+    Writes a born-digital PDF (Helvetica text objects, one list of lines per page).
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    kids = []
+    for lines in pages:
+        text = b"".join(
+            b"(" + _pdf_escape(line).encode("ascii") + b") Tj T* " for line in lines
+        )
+        stream = b"BT /F1 11 Tf 14 TL 56 780 Td " + text + b"ET"
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (page_tree, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(
+    directory: str,
+    image_sizes: Sequence[Tuple[str, int, int, int]] = IMAGE_SIZES,
+    rotations: Sequence[int] = ROTATIONS,
+    pdf_page_counts: Sequence[int] = PDF_PAGE_COUNTS,
+    seed: int = SEED
+) -> Dict[str, Dict]:
+    """
+    Generates the corpus under `directory` and writes manifest.json.
+
+    Returns:
+        Dict[str, Dict]: The manifest, mapping each file (relative path) to its
+            kind, page count, ground-truth text and sha256.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(directory, "images"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "pdf"), exist_ok=True)
+    entries: Dict[str, Dict] = {}
+
+    for name, width, height, font_size in image_sizes:
+        lines = paragraphs(rng, _lines_for(height, font_size))
+        page = render_text_image(lines, width, height, font_size)
+        for rotation in rotations:
+            relative = os.path.join("images", f"{name}-rot{rotation}.png")
+            # Counter-clockwise, like a page scanned sideways or upside down
+            page.rotate(rotation, expand=True).save(os.path.join(directory, relative), optimize=False)
+            entries[relative] = {"kind": "image", "size": name, "rotation": rotation, "pages": 1, "text": lines}
+
+    width, height, font_size = PDF_PAGE_SIZE
+    for page_count in pdf_page_counts:
+        pages = [paragraphs(rng, _lines_for(height, font_size)) for _ in range(page_count)]
+
+        relative = os.path.join("pdf", f"scanned-{page_count}p.pdf")
+        images = [render_text_image(lines, width, height, font_size) for lines in pages]
+        images[0].save(
+            os.path.join(directory, relative), save_all=True, append_images=images[1:], resolution=150.0,
+            creationDate=_PDF_DATE, modDate=_PDF_DATE
+        )
+        entries[relative] = {"kind": "scanned_pdf", "pages": page_count, "text": [line for lines in pages for line in lines]}
+
+        relative = os.path.join("pdf", f"digital-{page_count}p.pdf")
+        write_digital_pdf(os.path.join(directory, relative), pages)
+        entries[relative] = {"kind": "digital_pdf", "pages": page_count, "text": [line for lines in pages for line in lines]}
+
+    for relative, entry in entries.items():
+        with open(os.path.join(directory, relative), "rb") as f:
+            entry["sha256"] = hashlib.sha256(f.read()).hexdigest()
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(entries, f, indent=2, sort_keys=True, ensure_ascii=False)
+    return entries
+
+
+def corpus_digest(manifest: Dict[str, Dict]) -> str:
+    """
+    One hash for the whole corpus, recorded with the results.
+    """
+    digest = hashlib.sha256()
+    for relative in sorted(manifest):
+        digest.update(f"{relative}:{manifest[relative]['sha256']}\n".encode())
+    return digest.hexdigest()
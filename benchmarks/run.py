@@ -0,0 +1,350 @@
+"""
+Throughput/latency benchmarks for the OCR pipeline.
+
+Usage:
+    uv run python -m benchmarks.run [--suites ocr pdf ner api] [--modes fast balanced accurate cascade]
+                                    [--repeat 3] [--concurrency 1]
+                                    [--baseline benchmarks/baseline.json] [--threshold 0.15]
+                                    [--save-baseline]
+
+Generates the synthetic corpus (benchmarks/corpus.py) if needed, runs every
+suite in each mode and writes the results as JSON. When a baseline exists,
+results are compared against it and the exit status is 1 if any case got
+slower (or bigger) by more than the threshold.
+
+Requires the tesseract and poppler binaries, like the API itself.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.corpus import corpus_digest, generate_corpus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, "corpus")
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+SUITES = ("ocr", "pdf", "ner", "api")
+MODES = ("fast", "balanced", "accurate", "cascade")
+
+# A sample is (latency in seconds, pages processed)
+Sample = Tuple[float, int]
+
+
+class PeakRSS:
+    """
+    Samples the resident set size in a background thread and keeps the peak.
+
+    ru_maxrss only ever grows over the life of the process, so it can't tell
+    cases apart; /proc/self/statm can. Falls back to ru_maxrss elsewhere.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _current(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            # Kilobytes on Linux, bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self._current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._current())
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Linear-interpolated percentile, q in [0, 100].
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: List[Sample], wall_seconds: float, peak_rss: int) -> Dict[str, Any]:
+    latencies = [latency for latency, _ in samples]
+    pages = sum(page_count for _, page_count in samples)
+    return {
+        "calls": len(samples),
+        "pages": pages,
+        "wall_seconds": round(wall_seconds, 4),
+        "pages_per_sec": round(pages / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+async def run_case(
+    calls: List[Callable[[], Awaitable[int]]],
+    repeat: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Runs every call `repeat` times, at most `concurrency` at once.
+    Each call returns the number of pages it processed.
+    """
+    from app.core.concurrency import gather_bounded
+
+    async def timed(call: Callable[[], Awaitable[int]]) -> Sample:
+        start = time.perf_counter()
+        page_count = await call()
+        return time.perf_counter() - start, page_count
+
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        samples = await gather_bounded(
+            (timed(call) for _ in range(repeat) for call in calls),
+            limit=concurrency
+        )
+        wall_seconds = time.perf_counter() - start
+    return summarize(samples, wall_seconds, rss.peak)
+
+
+def _check_ok(text: str, what: str):
+    from app.domain import ocr
+
+    if text.startswith(ocr.ERROR_PREFIX):
+        raise RuntimeError(f"{what} failed: {text}")
+
+
+def ocr_calls(corpus_dir: str, manifest: Dict[str, Dict], mode: str) -> List[Callable[[], Awaitable[int]]]:
+    from app.domain import ocr
+
+    def call(path: str):
+        async def run() -> int:
+            _check_ok(await ocr.read_image(path, lang="eng+por", mode=mode), path)
+            return 1
+        return run
+
+    return [
+        call(os.path.join(corpus_dir, relative))
+        for relative, entry in sorted(manifest.items()) if entry["kind"] == "image"
+    ]
+
+
+def pdf_calls(corpus_dir: str, manifest: Dict[str, Dict], mode: str) -> List[Callable[[], Awaitable[int]]]:
+    from app.domain import pdf_ocr
+
+    def call(path: str, page_count: int):
+        async def run() -> int:
+            await pdf_ocr.process_pdf(path, lang="eng+por", mode=mode, force_processing=True)
+            return page_count
+        return run
+
+    return [
+        call(os.path.join(corpus_dir, relative), entry["pages"])
+        for relative, entry in sorted(manifest.items()) if entry["kind"].endswith("_pdf")
+    ]
+
+
+def ner_calls(manifest: Dict[str, Dict]) -> List[Callable[[], Awaitable[int]]]:
+    from app.domain import ner
+
+    def call(text: str):
+        async def run() -> int:
+            await asyncio.to_thread(ner.extract_entities, text, "eng+por")
+            return 1
+        return run
+
+    return [call("\n".join(entry["text"])) for _, entry in sorted(manifest.items())]
+
+
+def api_calls(client, corpus_dir: str, manifest: Dict[str, Dict], mode: str) -> List[Callable[[], Awaitable[int]]]:
+    def call(path: str, entry: Dict[str, Any]):
+        with open(path, "rb") as f:
+            content = f.read()
+        name = os.path.basename(path)
+
+        async def run() -> int:
+            if entry["kind"] == "image":
+                files = {"input_images": (name, content, "image/png")}
+                response = await client.post("/extract_text", files=files, data={"mode": mode})
+            else:
+                files = {"input_file": (name, content, "application/pdf")}
+                response = await client.post(
+                    "/extract_pdf", files=files, data={"mode": mode, "force_processing": "true"}
+                )
+            if response.status_code != 200:
+                raise RuntimeError(f"{path}: HTTP {response.status_code} {response.text}")
+            return entry["pages"]
+        return run
+
+    return [call(os.path.join(corpus_dir, relative), entry) for relative, entry in sorted(manifest.items())]
+
+
+async def run_suites(
+    corpus_dir: str,
+    manifest: Dict[str, Dict],
+    suites: Sequence[str],
+    modes: Sequence[str],
+    repeat: int,
+    concurrency: int
+) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from app.main import app
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async def record(name: str, calls: List[Callable[[], Awaitable[int]]]):
+        # One untimed pass loads models and fills the OS page cache
+        for call in calls:
+            await call()
+        results[name] = await run_case(calls, repeat, concurrency)
+        print(f"{name:<28} {json.dumps(results[name])}", flush=True)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for mode in modes:
+            if "ocr" in suites:
+                await record(f"ocr.read_image[{mode}]", ocr_calls(corpus_dir, manifest, mode))
+            if "pdf" in suites:
+                await record(f"pdf_ocr.process_pdf[{mode}]", pdf_calls(corpus_dir, manifest, mode))
+            if "api" in suites:
+                await record(f"api[{mode}]", api_calls(client, corpus_dir, manifest, mode))
+        if "ner" in suites:
+            await record("ner.extract_entities", ner_calls(manifest))
+
+    return results
+
+
+# Higher is better for throughput; lower is better for the rest
+_HIGHER_IS_BETTER = {"pages_per_sec"}
+_COMPARED = ("pages_per_sec", "latency_p50", "latency_p95", "latency_p99", "peak_rss_mb")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Lists the metrics that regressed by more than `threshold` (a fraction)
+    relative to the baseline. Cases missing from either side are skipped.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in _COMPARED:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            if metric in _HIGHER_IS_BETTER:
+                change = (before - after) / before
+            else:
+                change = (after - before) / before
+            if change > threshold:
+                regressions.append(f"{name} {metric}: {before} -> {after} ({change:+.0%} worse)")
+    return regressions
+
+
+def _environment(manifest: Dict[str, Dict]) -> Dict[str, Any]:
+    from app.config import get_settings
+
+    settings = get_settings()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus_sha256": corpus_digest(manifest),
+        "ocr_max_workers": settings.ocr_max_workers,
+        "tesseract_engine": settings.tesseract_engine,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR pipeline benchmarks")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Corpus directory (generated if missing)")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus per case")
+    parser.add_argument("--concurrency", type=int, default=1, help="Calls in flight at once")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    missing = [tool for tool in ("tesseract", "pdftoppm", "pdfinfo") if shutil.which(tool) is None]
+    if missing:
+        print(f"Missing binaries: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    manifest_path = os.path.join(args.corpus, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    else:
+        print(f"Generating corpus in {args.corpus}...", flush=True)
+        manifest = generate_corpus(args.corpus)
+
+    # Measure the pipeline, not the result cache
+    from app.config import get_settings
+    get_settings().ocr_cache_enabled = False
+
+    results = asyncio.run(run_suites(args.corpus, manifest, args.suites, args.modes, args.repeat, args.concurrency))
+    report = {
+        "environment": _environment(manifest),
+        "config": {"repeat": args.repeat, "concurrency": args.concurrency},
+        "results": results,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["environment"].get("corpus_sha256") != report["environment"]["corpus_sha256"]:
+            print("Warning: the baseline was recorded on a different corpus", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            status = 1
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,28 @@
 import os
 
+# Keep tests from tracing or sending anything; set before the app reads its settings
+os.environ.setdefault("TELEMETRY_ENABLED", "false")
+
 import pytest
 from starlette.testclient import TestClient
 
 from app.main import create_application
 
 from app.config import get_settings, Settings
+from app.core import ocr_cache
 
 
 def get_settings_override():
     return Settings(testing=1)
 
+@pytest.fixture(autouse=True)
+def clear_ocr_cache():
+    # Tests reuse the same sample files; start each one with a cold cache
+    cache = ocr_cache.get_cache()
+    if cache is not None:
+        cache.clear()
+    yield
+
 @pytest.fixture(scope="module")
 def test_app():
     # set up
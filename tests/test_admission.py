@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.core import admission
+from app.core.admission import AdmissionController
+from app.domain.ocr import OCRResult
+from app.main import app
+
+client = TestClient(app)
+
+@pytest.mark.asyncio
+async def test_admits_up_to_limit_then_queues():
+    controller = AdmissionController(max_active=2, max_queue=4, queue_timeout=None, retry_after=5)
+    await controller.acquire()
+    await controller.acquire()
+
+    waiter = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    assert controller.stats()["queued"] == 1
+
+    controller.release()
+    await waiter
+    assert controller.stats()["active"] == 2
+    assert controller.stats()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    controller = AdmissionController(max_active=1, max_queue=1, queue_timeout=None, retry_after=7)
+    await controller.acquire()
+    waiter = asyncio.ensure_future(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.acquire()
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "7"
+    assert controller.stats()["rejected"] == 1
+    waiter.cancel()
+
+@pytest.mark.asyncio
+async def test_queue_timeout():
+    controller = AdmissionController(max_active=1, max_queue=4, queue_timeout=0.01, retry_after=5)
+    await controller.acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.acquire()
+
+    assert exc.value.status_code == 503
+    assert controller.stats()["timed_out"] == 1
+    assert controller.stats()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_waiters_served_in_order_and_jobs_never_rejected():
+    controller = AdmissionController(max_active=1, max_queue=0, queue_timeout=None, retry_after=5)
+    order = []
+
+    async def job(name):
+        async with controller.slot(can_reject=False):
+            order.append(name)
+
+    await controller.acquire()
+    tasks = [asyncio.ensure_future(job(name)) for name in ("a", "b", "c")]
+    await asyncio.sleep(0)
+    controller.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["a", "b", "c"]
+    assert controller.stats()["active"] == 0
+    assert controller.stats()["wait_seconds_max"] > 0
+
+@pytest.fixture
+def saturated():
+    controller = AdmissionController(max_active=1, max_queue=0, queue_timeout=None, retry_after=3)
+    controller.active = 1
+    with patch.object(admission, "_controller", controller):
+        yield controller
+
+def test_extract_text_rejected_when_saturated(saturated):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr:
+        response = client.post("/extract_text", files={"input_images": ("test.png", img_content, "image/png")})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    mock_ocr.assert_not_called()
+
+def test_status_reports_admission(saturated):
+    response = client.get("/status")
+
+    assert response.status_code == 200
+    assert response.json()["admission"]["active"] == 1
+    assert response.json()["admission"]["max_queue"] == 0
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+def test_slot_released_after_request(stream):
+    controller = AdmissionController(max_active=1, max_queue=0, queue_timeout=None, retry_after=3)
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    with patch.object(admission, "_controller", controller), \
+         patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr:
+        mock_ocr.return_value = OCRResult(text="text")
+        for _ in range(2):
+            response = client.post(
+                "/extract_text",
+                files={"input_images": ("test.png", img_content, "image/png")},
+                data={"stream": stream}
+            )
+            assert response.status_code == 200
+
+    assert controller.stats()["active"] == 0
+    assert controller.stats()["admitted"] == 2
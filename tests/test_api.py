@@ -1,5 +1,8 @@
+import json
+import asyncio
 from fastapi.testclient import TestClient
 from app.main import app
+from app.domain.ocr import OCRResult
 from unittest.mock import patch, AsyncMock
 import pytest
 import os
@@ -7,13 +10,13 @@ import os
 client = TestClient(app)
 
 @pytest.fixture
-def mock_ocr_read_image():
+def mock_ocr_recognize():
     # Use AsyncMock to mock an async function
-    with patch("app.domain.ocr.read_image", new_callable=AsyncMock) as mock:
-        mock.return_value = "API OCR text"
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock:
+        mock.return_value = OCRResult(text="API OCR text")
         yield mock
 
-def test_extract_text(mock_ocr_read_image):
+def test_extract_text(mock_ocr_recognize):
     # Create a dummy image file for upload (must be valid image structure for validation)
     # Using PNG header: 89 50 4E 47 0D 0A 1A 0A
     img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
@@ -31,11 +34,15 @@ def test_extract_text(mock_ocr_read_image):
     assert len(data) == 1
     assert data[0]["file_name"] == "test.png"
     assert data[0]["text"] == "API OCR text"
+    assert data[0]["pages"] == [
+        {"page": 1, "source": "ocr", "scale": None, "skew": None, "orientation": None, "script": None,
+         "confidence": None, "pipeline": None}
+    ]
 
     # Verify mock was called
-    mock_ocr_read_image.assert_called_once()
+    mock_ocr_recognize.assert_called_once()
 
-def test_extract_text_custom_params(mock_ocr_read_image):
+def test_extract_text_custom_params(mock_ocr_recognize):
     # Valid PNG header
     img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
     files = {"input_images": ("test.png", img_content, "image/png")}
@@ -48,15 +55,25 @@ def test_extract_text_custom_params(mock_ocr_read_image):
     response = client.post("/extract_text", files=files, data=data)
 
     assert response.status_code == 200
-    mock_ocr_read_image.assert_called_once()
+    mock_ocr_recognize.assert_called_once()
 
     # Verify arguments passed to read_image
-    call_args = mock_ocr_read_image.call_args
+    call_args = mock_ocr_recognize.call_args
     assert call_args.kwargs['lang'] == 'por'
     assert call_args.kwargs['mode'] == 'accurate'
     assert call_args.kwargs['auto'] is True
 
-def test_extract_text_auto_lang(mock_ocr_read_image):
+@pytest.mark.parametrize("mode, status", [("balanced", 200), ("cascade", 200), ("best", 400)])
+def test_extract_text_modes(mock_ocr_recognize, mode, status):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    files = {"input_images": ("test.png", img_content, "image/png")}
+
+    response = client.post("/extract_text", files=files, data={"mode": mode})
+
+    assert response.status_code == status
+    assert mock_ocr_recognize.call_count == (1 if status == 200 else 0)
+
+def test_extract_text_auto_lang(mock_ocr_recognize):
     # Valid PNG header
     img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
     files = {"input_images": ("test.png", img_content, "image/png")}
@@ -67,22 +84,22 @@ def test_extract_text_auto_lang(mock_ocr_read_image):
     response = client.post("/extract_text", files=files, data=data)
 
     assert response.status_code == 200
-    mock_ocr_read_image.assert_called_once()
+    mock_ocr_recognize.assert_called_once()
 
-    call_args = mock_ocr_read_image.call_args
+    call_args = mock_ocr_recognize.call_args
     assert call_args.kwargs['lang'] == 'eng+por' # Should default to eng+por
     assert call_args.kwargs['auto'] is True # Should be True due to lang='auto'
 
-def test_extract_text_with_ner(mock_ocr_read_image):
+def test_extract_text_with_ner(mock_ocr_recognize):
     # Mock text with entities
-    mock_ocr_read_image.return_value = "My name is Fabio and I live in Brazil."
+    mock_ocr_recognize.return_value = OCRResult(text="My name is Fabio and I live in Brazil.")
 
     img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
     files = {"input_images": ("test.png", img_content, "image/png")}
 
-    # Patch ner.extract_entities
-    with patch("app.api.text_extract.ner.extract_entities") as mock_ner:
-        mock_ner.return_value = [{"text": "Fabio", "label": "PER", "start": 11, "end": 16}]
+    # Patch ner.extract_entities_batch (one entity list per file)
+    with patch("app.api.text_extract.ner.extract_entities_batch") as mock_ner:
+        mock_ner.return_value = [[{"text": "Fabio", "label": "PER", "start": 11, "end": 16}]]
 
         response = client.post("/extract_text", files=files)
 
@@ -92,4 +109,72 @@ def test_extract_text_with_ner(mock_ocr_read_image):
         assert len(data[0]["entities"]) == 1
         assert data[0]["entities"][0]["text"] == "Fabio"
 
-        mock_ner.assert_called_once()
+        mock_ner.assert_called_once_with(["My name is Fabio and I live in Brazil."], "eng+por")
+
+def test_extract_text_multiple_images_keep_order(mock_ocr_recognize):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    files = [("input_images", (f"img{i}.png", img_content, "image/png")) for i in range(4)]
+
+    running = {"now": 0, "peak": 0}
+    calls = {"count": 0}
+    async def slow_ocr(*args, **kwargs):
+        calls["count"] += 1
+        index = calls["count"]
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        # Earlier files finish last
+        await asyncio.sleep(0.01 * (5 - index))
+        running["now"] -= 1
+        return OCRResult(text=f"text {index}")
+    mock_ocr_recognize.side_effect = slow_ocr
+
+    response = client.post("/extract_text", files=files)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["file_name"] for d in data] == [f"img{i}.png" for i in range(4)]
+    assert [d["text"] for d in data] == [f"text {i}" for i in range(1, 5)]
+    # Files were processed concurrently
+    assert running["peak"] > 1
+
+def test_extract_text_reads_upload_in_place(mock_ocr_recognize):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    files = {"input_images": ("test.png", img_content, "image/png")}
+
+    seen = {}
+
+    async def read_image(img_path, **kwargs):
+        seen["source"] = img_path
+        seen["head"] = img_path.read(8)
+        return OCRResult(text="API OCR text")
+
+    mock_ocr_recognize.side_effect = read_image
+    with patch("app.domain.fileUpload._save_file_to_server") as mock_save:
+        response = client.post("/extract_text", files=files)
+
+    assert response.status_code == 200
+    mock_save.assert_not_called()
+    # OCR gets the upload stream rather than a path to a copy
+    assert not isinstance(seen["source"], str)
+    assert seen["head"] == img_content[:8]
+
+def test_extract_text_stream(mock_ocr_recognize):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+
+    async def read_image(img_path, **kwargs):
+        # Reading proves the upload is still open while the response streams
+        return OCRResult(text=f"text of {len(img_path.read())} bytes")
+
+    mock_ocr_recognize.side_effect = read_image
+    files = [
+        ("input_images", ("a.png", img_content, "image/png")),
+        ("input_images", ("b.png", img_content, "image/png")),
+    ]
+    response = client.post("/extract_text", files=files, data={"stream": "true"})
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["file", "file", "summary"]
+    assert {(record["index"], record["file_name"]) for record in records[:-1]} == {(0, "a.png"), (1, "b.png")}
+    assert records[0]["text"] == f"text of {len(img_content)} bytes"
+    assert records[-1]["total"] == 2
@@ -0,0 +1,48 @@
+import json
+import os
+from benchmarks.corpus import corpus_digest, generate_corpus
+from benchmarks.run import compare, percentile, summarize
+
+SMALL = {"image_sizes": (("small", 320, 240, 14),), "rotations": (0, 90), "pdf_page_counts": (2,)}
+
+def test_corpus_is_deterministic(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), **SMALL)
+    second = generate_corpus(str(tmp_path / "b"), **SMALL)
+
+    assert corpus_digest(first) == corpus_digest(second)
+    assert {entry["kind"] for entry in first.values()} == {"image", "scanned_pdf", "digital_pdf"}
+    with open(tmp_path / "a" / "manifest.json") as f:
+        assert json.load(f) == first
+
+def test_digital_pdf_has_text_layer(tmp_path):
+    manifest = generate_corpus(str(tmp_path), **SMALL)
+    with open(os.path.join(tmp_path, "pdf", "digital-2p.pdf"), "rb") as f:
+        content = f.read()
+
+    assert content.startswith(b"%PDF-")
+    assert b"/Count 2" in content
+    assert manifest[os.path.join("pdf", "digital-2p.pdf")]["text"][0].encode() in content
+
+def test_summarize_percentiles():
+    samples = [(float(i), 2) for i in range(1, 101)]
+
+    summary = summarize(samples, wall_seconds=10.0, peak_rss=64 * 1024 * 1024)
+
+    assert summary["pages"] == 200
+    assert summary["pages_per_sec"] == 20.0
+    assert summary["latency_p50"] == percentile([s for s, _ in samples], 50) == 50.5
+    assert summary["latency_p99"] == 99.01
+    assert summary["peak_rss_mb"] == 64.0
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"ocr[fast]": {"pages_per_sec": 10.0, "latency_p95": 1.0, "peak_rss_mb": 100.0}}
+    results = {
+        "ocr[fast]": {"pages_per_sec": 9.0, "latency_p95": 1.5, "peak_rss_mb": 100.0},
+        "new[fast]": {"pages_per_sec": 1.0},
+    }
+
+    regressions = compare(results, baseline, threshold=0.2)
+
+    # Throughput dropped 10% (within threshold); p95 grew 50%
+    assert len(regressions) == 1
+    assert regressions[0].startswith("ocr[fast] latency_p95")
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from app.core.concurrency import gather_bounded, iter_bounded
+
+@pytest.mark.asyncio
+async def test_gather_bounded_preserves_order():
+    async def work(i):
+        # Later items finish first
+        await asyncio.sleep(0.01 * (5 - i))
+        return i
+
+    results = await gather_bounded((work(i) for i in range(5)), limit=5)
+
+    assert results == [0, 1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_gather_bounded_respects_limit():
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await gather_bounded((work() for _ in range(10)), limit=3)
+
+    assert peak == 3
+
+@pytest.mark.asyncio
+async def test_gather_bounded_cancels_on_error():
+    finished = []
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(1)
+        finished.append(True)
+
+    with pytest.raises(ValueError):
+        await gather_bounded([fail(), slow(), slow()], limit=2)
+
+    await asyncio.sleep(0)
+    assert finished == []
+
+@pytest.mark.asyncio
+async def test_iter_bounded_yields_in_completion_order():
+    async def work(i):
+        await asyncio.sleep(0.01 * (3 - i))
+        return i * 10
+
+    results = [item async for item in iter_bounded((work(i) for i in range(3)), limit=3)]
+
+    assert results == [(2, 20), (1, 10), (0, 0)]
+
+@pytest.mark.asyncio
+async def test_iter_bounded_cancels_rest_when_consumer_stops():
+    finished = []
+
+    async def work(i):
+        await asyncio.sleep(0.01 if i == 0 else 1)
+        finished.append(i)
+        return i
+
+    iterator = iter_bounded((work(i) for i in range(3)), limit=3)
+    assert await iterator.__anext__() == (0, 0)
+    await iterator.aclose()
+
+    assert finished == [0]
@@ -2,8 +2,8 @@ import os
 import shutil
 import tempfile
 from fastapi import UploadFile
-from unittest.mock import MagicMock
-from app.domain.fileUpload import _save_file_to_server
+from unittest.mock import MagicMock, patch
+from app.domain.fileUpload import _save_file_to_server, upload_path
 
 # Mock UploadFile
 class MockUploadFile:
@@ -33,3 +33,58 @@ def test_save_file_to_server():
 
     # Cleanup
     os.remove(actual_file)
+
+def test_upload_path_reuses_spooled_file():
+    spooled = tempfile.SpooledTemporaryFile(max_size=4)
+    spooled.write(b"%PDF- rolled to disk")
+    uploaded_file = MockUploadFile("doc.pdf")
+    uploaded_file.file = spooled
+
+    with upload_path(uploaded_file) as path:
+        # No copy: the path points at the spooled file itself
+        assert path.startswith("/proc/")
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF- rolled to disk"
+
+    spooled.close()
+
+def test_upload_path_copies_in_memory_upload():
+    uploaded_file = MockUploadFile("doc.pdf", b"%PDF- in memory")
+
+    with upload_path(uploaded_file) as path:
+        assert path.endswith(".pdf")
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF- in memory"
+
+    assert not os.path.exists(path)
+
+def test_upload_path_reuses_in_memory_spooled_file():
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(b"%PDF- small upload")
+    uploaded_file = MockUploadFile("doc.pdf")
+    uploaded_file.file = spooled
+
+    with upload_path(uploaded_file) as path:
+        # Rolled to disk on demand instead of copied
+        assert path.startswith("/proc/")
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF- small upload"
+
+    spooled.close()
+
+def test_upload_path_copies_without_proc():
+    spooled = tempfile.SpooledTemporaryFile(max_size=4)
+    spooled.write(b"%PDF- no procfs")
+    spooled.seek(0)
+    uploaded_file = MockUploadFile("doc.pdf")
+    uploaded_file.file = spooled
+
+    # e.g. macOS: the descriptor exists but there is no /proc to reach it through
+    with patch("app.domain.fileUpload.os.getpid", return_value=0):
+        with upload_path(uploaded_file) as path:
+            assert not path.startswith("/proc/")
+            with open(path, "rb") as f:
+                assert f.read() == b"%PDF- no procfs"
+
+    assert not os.path.exists(path)
+    spooled.close()
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import threading
+import time
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+from app.api import jobs as jobs_api
+from app.domain.ocr import OCRResult
+from app.config import get_settings
+from app.main import create_application
+from app.services.jobs import JobManager, JobStore, DONE, QUEUED, RUNNING
+
+@pytest.fixture
+def jobs_client(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "jobs_db_path", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(settings, "jobs_spool_dir", str(tmp_path / "spool"))
+    with TestClient(create_application()) as client:
+        yield client
+
+def text_page():
+    image = Image.new("L", (200, 280), 255)
+    ImageDraw.Draw(image).text((20, 20), "Job page", fill=0)
+    return image
+
+@pytest.fixture
+def mock_pdf_pipeline():
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr, \
+         patch("app.domain.pdf_ocr._render_page") as mock_render, \
+         patch("app.domain.pdf_ocr.pdfinfo_from_path") as mock_info, \
+         patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
+        mock_ocr.return_value = OCRResult(text="Job Page Text")
+        mock_render.side_effect = lambda *args: text_page()
+        mock_info.return_value = {"Pages": 3}
+        mock_text_layer.side_effect = lambda path, first, last: [None] * (last - first + 1)
+        yield mock_ocr, mock_info
+
+def _wait_for(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] not in (QUEUED, RUNNING):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_pdf_job_lifecycle(jobs_client, mock_pdf_pipeline):
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = jobs_client.post("/jobs/extract_pdf", files=files)
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.json()["kind"] == "pdf"
+
+    status = _wait_for(jobs_client, job_id)
+    assert status["status"] == DONE
+    assert status["pages_done"] == status["pages_total"] == 3
+
+    result = jobs_client.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    data = result.json()
+    assert data[0]["file_name"] == "test.pdf"
+    assert "--- Page 3 ---\nJob Page Text" in data[0]["text"]
+
+def test_pdf_job_failure(jobs_client, mock_pdf_pipeline):
+    mock_ocr, mock_info = mock_pdf_pipeline
+    mock_ocr.side_effect = RuntimeError("Tesseract crashed")
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    job_id = jobs_client.post("/jobs/extract_pdf", files=files).json()["job_id"]
+
+    status = _wait_for(jobs_client, job_id)
+    assert status["status"] == "failed"
+    assert "Tesseract crashed" in status["error"]
+    assert jobs_client.get(f"/jobs/{job_id}/result").status_code == 422
+
+def test_pdf_job_page_limit_at_submission(jobs_client, mock_pdf_pipeline, tmp_path):
+    mock_ocr, mock_info = mock_pdf_pipeline
+    mock_info.return_value = {"Pages": 15}
+    files = {"input_file": ("large.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = jobs_client.post("/jobs/extract_pdf", files=files)
+
+    assert response.status_code == 400
+    assert "Limit is 10" in response.json()["detail"]
+    # No job and no leftover input
+    assert jobs_api.get_manager().store.unfinished() == []
+    assert os.listdir(tmp_path / "spool") == []
+
+    response = jobs_client.post("/jobs/extract_pdf", files=files, data={"force_processing": "true"})
+    assert response.status_code == 202
+
+def test_pdf_job_from_storage_checked_at_submission(jobs_client, mock_pdf_pipeline, tmp_path):
+    mock_ocr, mock_info = mock_pdf_pipeline
+    data = {"source": "object_storage", "client_id": "client_a", "object_key": "docs/large.pdf"}
+
+    def download(client_id, object_key, path):
+        # Straight into the job's spool, no temporary copy
+        assert path.startswith(str(tmp_path / "spool"))
+        with open(path, "wb") as f:
+            f.write(b'%PDF-1.4\n')
+        return path
+
+    with patch("app.services.storage.download_file_from_storage", side_effect=download) as mock_download:
+        mock_info.return_value = {"Pages": 15}
+        assert jobs_client.post("/jobs/extract_pdf", data=data).status_code == 400
+
+        mock_info.return_value = {"Pages": 3}
+        job_id = jobs_client.post("/jobs/extract_pdf", data=data).json()["job_id"]
+        status = _wait_for(jobs_client, job_id)
+
+    # The job runs on the copy downloaded at submission
+    assert mock_download.call_count == 2
+    assert status["status"] == DONE
+    assert jobs_client.get(f"/jobs/{job_id}/result").json()[0]["file_name"] == "docs/large.pdf"
+
+def test_text_job(jobs_client):
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    files = [("input_images", (f"img{i}.png", img_content, "image/png")) for i in range(2)]
+
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr:
+        mock_ocr.return_value = OCRResult(text="Job Image Text")
+        job_id = jobs_client.post("/jobs/extract_text", files=files).json()["job_id"]
+        status = _wait_for(jobs_client, job_id)
+
+    assert status["status"] == DONE
+    assert status["pages_done"] == 2
+    data = jobs_client.get(f"/jobs/{job_id}/result").json()
+    assert [d["file_name"] for d in data] == ["img0.png", "img1.png"]
+    assert data[0]["text"] == "Job Image Text"
+
+def test_job_validation(jobs_client):
+    response = jobs_client.post("/jobs/extract_pdf", data={"source": "object_storage"})
+    assert response.status_code == 400
+
+    response = jobs_client.post("/jobs/extract_pdf", data={"mode": "slow"})
+    assert response.status_code == 400
+
+def test_unknown_job(jobs_client):
+    assert jobs_client.get("/jobs/missing").status_code == 404
+    assert jobs_client.get("/jobs/missing/result").status_code == 404
+
+@pytest.mark.asyncio
+async def test_jobs_resume_after_restart(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    queued = store.create("echo", {"value": 1})
+    interrupted = store.create("echo", {"value": 2})
+    store.update(interrupted, status=RUNNING, pages_done=1)
+    store.close()
+
+    # A new process opens the same database
+    async def echo(job, progress):
+        progress(1, 1)
+        return job["params"]["value"]
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    manager = JobManager(store, str(tmp_path / "spool"), workers=1, handlers={"echo": echo})
+    await manager.start()
+    try:
+        for _ in range(100):
+            if not store.unfinished():
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop()
+
+    assert store.get(queued)["result"] == 1
+    assert store.get(interrupted)["result"] == 2
+    assert store.get(interrupted)["status"] == DONE
+    store.close()
+
+@pytest.mark.asyncio
+async def test_jobs_leased_by_live_process_not_reclaimed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    live = store.create("echo", {"value": 1})
+    expired = store.create("echo", {"value": 2})
+    # Another process holds the first job; the one holding the second died
+    assert store.claim(live, "other", lease_seconds=60)
+    assert store.claim(expired, "dead", lease_seconds=60)
+    store._conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, expired))
+    store._conn.commit()
+
+    async def echo(job, progress):
+        return job["params"]["value"]
+
+    manager = JobManager(store, str(tmp_path / "spool"), workers=1, handlers={"echo": echo})
+    await manager.start()
+    try:
+        for _ in range(100):
+            if store.get(expired)["status"] == DONE:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await manager.stop()
+
+    assert store.get(expired)["result"] == 2
+    assert store.get(live)["status"] == RUNNING
+    assert store.get(live)["result"] is None
+    # The original owner can still finish it; a stale owner can't overwrite it
+    assert not store.update(live, owner="dead", status=DONE, result=0)
+    assert store.update(live, owner="other", status=DONE, result=1)
+    store.close()
+
+def test_job_lease_renewal(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create("echo", {})
+
+    assert store.claim(job_id, "a", lease_seconds=60)
+    assert not store.claim(job_id, "b", lease_seconds=60)
+    assert store.renew(job_id, "a", lease_seconds=60)
+    assert not store.renew(job_id, "b", lease_seconds=60)
+    assert store.claimable() == []
+    store.close()
+
+@pytest.mark.asyncio
+async def test_job_progress_written_off_loop(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create("echo", {})
+    threads = []
+    renew = store.renew
+
+    def tracked_renew(*args, **fields):
+        threads.append(threading.current_thread())
+        return renew(*args, **fields)
+
+    async def echo(job, progress):
+        for done in range(1, 4):
+            progress(done, 3)
+            await asyncio.sleep(0)
+        return "done"
+
+    manager = JobManager(store, str(tmp_path / "spool"), workers=1, handlers={"echo": echo})
+    with patch.object(store, "renew", side_effect=tracked_renew):
+        await manager.start()
+        try:
+            for _ in range(100):
+                if store.get(job_id)["status"] == DONE:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await manager.stop()
+
+    job = store.get(job_id)
+    assert (job["pages_done"], job["pages_total"], job["result"]) == (3, 3, "done")
+    assert threads and threading.main_thread() not in threads
+    store.close()
+
+@pytest.mark.asyncio
+async def test_job_result_pending(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create("pdf", {})
+    with patch.object(jobs_api, "get_manager", return_value=MagicMock(store=store)):
+        with pytest.raises(Exception) as exc:
+            await jobs_api.get_job_result(job_id)
+    assert exc.value.status_code == 409
+    store.close()
@@ -0,0 +1,88 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from unittest.mock import patch, AsyncMock
+from PIL import Image
+from app.core import metrics
+from app.domain import ocr
+from app.domain.ocr import OCRResult
+from app.main import app
+
+client = TestClient(app)
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_track_stage_records_context_labels():
+    metrics.set_context(mode="fast", lang="eng", source="test")
+    labels = {"stage": "pdfinfo", "mode": "fast", "lang": "eng", "source": "test"}
+    before = sample("api_ocr_stage_duration_seconds_count", **labels)
+    failures = sample("api_ocr_stage_failures_total", **labels)
+
+    with metrics.track_stage("pdfinfo"):
+        assert sample("api_ocr_stage_in_flight", stage="pdfinfo") >= 1
+    with pytest.raises(RuntimeError):
+        with metrics.track_stage("pdfinfo"):
+            raise RuntimeError("boom")
+
+    assert sample("api_ocr_stage_duration_seconds_count", **labels) == before + 2
+    assert sample("api_ocr_stage_failures_total", **labels) == failures + 1
+    assert sample("api_ocr_stage_in_flight", stage="pdfinfo") == 0
+
+@pytest.mark.asyncio
+async def test_worker_thread_stages_keep_labels():
+    metrics.set_context(mode="accurate", lang="por", source="test")
+    labels = {"mode": "accurate", "lang": "por", "source": "test"}
+    before = sample("api_ocr_stage_duration_seconds_count", stage="tesseract", **labels)
+    pages = sample("api_ocr_pages_processed_total", method="ocr", **labels)
+
+    with patch("app.domain.ocr.tesseract_pool.is_available", return_value=False), \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text"):
+        await ocr.read_image(Image.new("RGB", (8, 8), "white"), lang="por", mode="accurate")
+
+    # Tesseract runs on the OCR pool, yet is still labeled with the request's context
+    assert sample("api_ocr_stage_duration_seconds_count", stage="tesseract", **labels) == before + 1
+    assert sample("api_ocr_stage_duration_seconds_count", stage="preprocess", **labels) >= 1
+    assert sample("api_ocr_pages_processed_total", method="ocr", **labels) == pages + 1
+
+def test_metrics_endpoint():
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr:
+        mock_ocr.return_value = OCRResult(text="text")
+        client.post(
+            "/extract_text",
+            files={"input_images": ("test.png", img_content, "image/png")},
+            data={"lang": "eng", "mode": "fast"}
+        )
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.text
+    assert 'api_ocr_stage_duration_seconds_count{lang="eng",mode="fast",source="upload",stage="validation"}' in body
+    assert 'api_ocr_stage_duration_seconds_count{lang="eng",mode="fast",source="upload",stage="ner"}' in body
+    assert 'api_ocr_bytes_ingested_total{source="upload"}' in body
+    assert "api_ocr_admission_wait_seconds_bucket" in body
+
+def test_unknown_lang_label_is_bounded():
+    img_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+
+    def lang_labels():
+        return {
+            sample.labels["lang"]
+            for metric in REGISTRY.collect() if metric.name.startswith("api_ocr_")
+            for sample in metric.samples if "lang" in sample.labels
+        }
+
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock_ocr:
+        mock_ocr.return_value = OCRResult(text="text")
+        for i in range(20):
+            client.post(
+                "/extract_text",
+                files={"input_images": ("test.png", img_content, "image/png")},
+                data={"lang": f"xx{i}", "mode": "fast"}
+            )
+
+    labels = lang_labels()
+    assert "other" in labels
+    assert not any(label.startswith("xx") for label in labels)
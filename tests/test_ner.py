@@ -86,3 +86,84 @@ def test_model_missing(mocker):
 
     ner.extract_entities("test", lang_hint="por")
     mock_nlp_en.assert_called_once()
+
+def _mock_ent(mocker, text, label, start, end):
+    ent = mocker.Mock()
+    ent.text = text
+    ent.label_ = label
+    ent.start_char = start
+    ent.end_char = end
+    return ent
+
+def test_extract_entities_batch(mocker):
+    mock_nlp = mocker.Mock()
+    doc_a = mocker.Mock()
+    doc_a.ents = [_mock_ent(mocker, "Fabio", "PERSON", 0, 5), _mock_ent(mocker, "Today", "DATE", 6, 11)]
+    doc_b = mocker.Mock()
+    doc_b.ents = [_mock_ent(mocker, "Brasil", "GPE", 0, 6)]
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: iter([doc_a, doc_b][:len(list(texts))])
+
+    mocker.patch.object(ner, "nlp_pt", mock_nlp)
+
+    results = ner.extract_entities_batch(["Fabio Today", "", "Brasil"], lang_hint="por")
+
+    assert results == [
+        [{"text": "Fabio", "label": "PER", "start": 0, "end": 5}],
+        [],
+        [{"text": "Brasil", "label": "LOC", "start": 0, "end": 6}],
+    ]
+    # Empty texts never reach the pipeline, and nlp() is not called per text
+    mock_nlp.pipe.assert_called_once()
+    mock_nlp.assert_not_called()
+
+def test_extract_entities_batch_matches_single(mocker):
+    mock_nlp = mocker.Mock()
+    doc = mocker.Mock()
+    doc.ents = [_mock_ent(mocker, "Lisboa", "LOC", 3, 9), _mock_ent(mocker, "ACME", "ORG", 10, 14)]
+    mock_nlp.return_value = doc
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: iter([doc for _ in texts])
+
+    mocker.patch.object(ner, "nlp_pt", mock_nlp)
+
+    assert ner.extract_entities_batch(["em Lisboa ACME"], lang_hint="por") == [
+        ner.extract_entities("em Lisboa ACME", lang_hint="por")
+    ]
+
+@pytest.mark.asyncio
+async def test_extract_entities_async_runs_off_loop(mocker):
+    import threading
+    caller = {}
+
+    def fake_extract(text, lang_hint):
+        caller["thread"] = threading.current_thread().name
+        return [{"text": text, "label": "PER", "start": 0, "end": len(text)}]
+
+    mocker.patch.object(ner, "extract_entities", side_effect=fake_extract)
+
+    entities = await ner.extract_entities_async("Fabio", lang_hint="por")
+
+    assert entities[0]["text"] == "Fabio"
+    assert caller["thread"].startswith("ner")
+
+def test_models_load_lazily_once(mocker):
+    mocker.patch.object(ner, "nlp_pt", ner._NOT_LOADED)
+    mocker.patch.object(ner, "nlp_en", ner._NOT_LOADED)
+    mock_nlp = mocker.Mock()
+    mock_nlp.return_value.ents = []
+    load = mocker.patch.object(ner, "_load_model", return_value=mock_nlp)
+
+    ner.extract_entities("test", lang_hint="por")
+    ner.extract_entities("test", lang_hint="por")
+
+    # Only the Portuguese model was needed, and it was loaded once
+    load.assert_called_once_with("pt_core_news_sm")
+
+def test_preload(mocker):
+    mocker.patch.object(ner, "nlp_pt", ner._NOT_LOADED)
+    mocker.patch.object(ner, "nlp_en", ner._NOT_LOADED)
+    load = mocker.patch.object(ner, "_load_model", return_value=mocker.Mock())
+
+    ner.preload(["en_core_web_sm"])
+
+    load.assert_called_once_with("en_core_web_sm")
+    assert ner.nlp_pt is ner._NOT_LOADED
@@ -1,6 +1,16 @@
+import threading
 import pytest
+import pytesseract
 from unittest.mock import patch, MagicMock
-from app.domain.ocr import read_image
+from PIL import Image
+from app.config import get_settings
+from app.domain.ocr import OCRResult, Orientation, detect_orientation, read_image, recognize
+
+@pytest.fixture(autouse=True)
+def subprocess_engine():
+    # These tests exercise the pytesseract path regardless of tesserocr
+    with patch("app.domain.ocr.tesseract_pool.is_available", return_value=False):
+        yield
 
 @pytest.mark.asyncio
 async def test_read_image():
@@ -25,3 +35,279 @@ async def test_read_image():
             assert actual_text == expected_text
             # Verify call args: image object, lang, and default config
             mock_tesseract.assert_called_once_with(mock_image, lang=lang, config=' --psm 3')
+
+@pytest.mark.asyncio
+async def test_read_image_from_bytes():
+    with open("tests/testeapi.png", "rb") as f:
+        data = f.read()
+
+    with patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract:
+        mock_tesseract.return_value = "text"
+
+        actual_text = await read_image(data, lang='eng')
+
+        assert actual_text == "text"
+        image = mock_tesseract.call_args.args[0]
+        assert isinstance(image, Image.Image)
+        assert image.size == Image.open("tests/testeapi.png").size
+
+@pytest.mark.asyncio
+async def test_read_image_from_pil_image():
+    image = Image.new("RGB", (20, 10), "white")
+
+    with patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract:
+        mock_tesseract.return_value = "text"
+
+        await read_image(image, lang='eng')
+
+        # Fast mode passes the decoded image through untouched
+        assert mock_tesseract.call_args.args[0] is image
+
+@pytest.mark.asyncio
+async def test_read_image_uses_engine_pool():
+    image = Image.new("RGB", (20, 10), "white")
+    pool = MagicMock()
+    api = pool.lease.return_value.__enter__.return_value
+    api.GetUTF8Text.return_value = "pooled text"
+
+    with patch("app.domain.ocr.tesseract_pool.is_available", return_value=True), \
+         patch("app.domain.ocr.tesseract_pool.get_pool", return_value=pool), \
+         patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract:
+        actual_text = await read_image(image, lang='por')
+
+    assert actual_text == "pooled text"
+    pool.lease.assert_called_once_with('por', 3)
+    api.SetImage.assert_called_once_with(image)
+    mock_tesseract.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_read_image_uses_cache():
+    with open("tests/testeapi.png", "rb") as f:
+        data = f.read()
+
+    with patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract:
+        mock_tesseract.return_value = "text"
+
+        first = await read_image(data, lang='eng')
+        second = await read_image(data, lang='eng')
+        # Different parameters are cached separately
+        await read_image(data, lang='por')
+
+    assert first == second == "text"
+    assert mock_tesseract.call_count == 2
+
+@pytest.mark.asyncio
+async def test_recognize_accurate_mode_reports_scale():
+    image = Image.new("RGB", (40, 20), "white")
+
+    with patch("app.domain.ocr.preprocess.rescale") as mock_rescale, \
+         patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract:
+        resized = Image.new("L", (100, 50), 255)
+        mock_rescale.return_value = (resized, 2.5)
+        mock_tesseract.return_value = "text"
+
+        result = await recognize(image, lang='eng', mode='accurate')
+        cached = await recognize(image, lang='eng', mode='accurate')
+
+    assert mock_rescale.call_args.args[0].mode == "L"
+    assert mock_tesseract.call_args.args[0].size == (100, 50)
+    assert (result.text, result.source, result.scale) == ("text", "ocr", 2.5)
+    # The scale is kept with the cached text
+    assert (cached.text, cached.source, cached.scale) == ("text", "cache", 2.5)
+
+@pytest.mark.asyncio
+async def test_recognize_accurate_mode_rescales_off_loop():
+    threads = []
+
+    def rescale(image, *args):
+        threads.append(threading.current_thread().name)
+        return image, 1.0
+
+    with patch("app.domain.ocr.preprocess.rescale", side_effect=rescale), \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text"):
+        await recognize(Image.new("RGB", (40, 20), "white"), lang='eng', mode='accurate')
+
+    assert threads[0].startswith("ocr")
+
+@pytest.mark.asyncio
+async def test_recognize_fast_mode_does_not_rescale():
+    with patch("app.domain.ocr.preprocess.rescale") as mock_rescale, \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text"):
+        result = await recognize(Image.new("RGB", (40, 20), "white"), lang='eng')
+
+    mock_rescale.assert_not_called()
+    assert result.scale is None
+
+def test_ocr_result_dump_load():
+    result = OCRResult(text="t", scale=0.5, confidence=80.0, pipeline="accurate")
+    assert OCRResult.load(result.dump()) == result
+    with pytest.raises(ValueError):
+        OCRResult.load("plain text")
+
+@pytest.mark.asyncio
+async def test_recognize_balanced_mode_cleans_page():
+    image = Image.new("RGB", (40, 20), "white")
+    cleaned = Image.new("L", (44, 24), 255)
+
+    with patch("app.domain.ocr.preprocess.clean_page", return_value=(cleaned, 1.5)) as mock_clean, \
+         patch("app.domain.ocr.preprocess.rescale") as mock_rescale, \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text") as mock_tesseract:
+        result = await recognize(image, lang='eng', mode='balanced')
+
+    mock_clean.assert_called_once_with(image, "sauvola")
+    # No upscaling in balanced mode
+    mock_rescale.assert_not_called()
+    assert mock_tesseract.call_args.args[0] is cleaned
+    assert (result.scale, result.skew) == (None, 1.5)
+
+@pytest.mark.asyncio
+async def test_recognize_balanced_mode_cleans_page_off_loop():
+    threads = []
+
+    def clean_page(image, method):
+        threads.append(threading.current_thread().name)
+        return image.convert("L"), 0.0
+
+    with patch("app.domain.ocr.preprocess.clean_page", side_effect=clean_page), \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text"):
+        await recognize(Image.new("RGB", (40, 20), "white"), lang='eng', mode='balanced')
+
+    # On the OCR worker pool, so concurrent pages don't queue on the event loop
+    assert threads[0].startswith("ocr")
+
+@pytest.mark.asyncio
+async def test_detect_orientation_on_thumbnail():
+    image = Image.new("RGB", (4000, 3000), "white")
+    osd = {"rotate": 90, "orientation_conf": 8.5, "script": "Latin", "script_conf": 3.0}
+
+    with patch("app.domain.ocr.pytesseract.image_to_osd", return_value=osd) as mock_osd:
+        orientation = await detect_orientation(image)
+
+    assert orientation == Orientation(rotate=90, script="Latin", confidence=8.5)
+    assert max(mock_osd.call_args.args[0].size) == 1600
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("osd", [
+    {"rotate": 180, "orientation_conf": 0.4, "script": "Latin"},
+    pytesseract.TesseractError(1, "Too few characters. Skipping this page"),
+])
+async def test_detect_orientation_inconclusive(osd):
+    with patch("app.domain.ocr.pytesseract.image_to_osd", side_effect=[osd]):
+        assert await detect_orientation(Image.new("RGB", (20, 10), "white")) is None
+
+@pytest.mark.asyncio
+async def test_recognize_auto_rotates_before_ocr():
+    image = Image.new("RGB", (40, 20), "white")
+
+    with patch("app.domain.ocr.detect_orientation", return_value=Orientation(90, "Latin", 9.0)) as mock_detect, \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text") as mock_tesseract:
+        result = await recognize(image, lang='eng', auto=True)
+
+    mock_detect.assert_called_once()
+    # Upright image, and no OSD left for Tesseract to do
+    assert mock_tesseract.call_args.args[0].size == (20, 40)
+    assert mock_tesseract.call_args.kwargs["config"] == " --psm 3"
+    assert (result.orientation, result.script) == (90, "Latin")
+
+@pytest.mark.asyncio
+async def test_recognize_reuses_document_orientation():
+    image = Image.new("RGB", (40, 20), "white")
+
+    with patch("app.domain.ocr.detect_orientation") as mock_detect, \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text") as mock_tesseract:
+        result = await recognize(image, lang='eng', auto=True, orientation=Orientation(180, "Latin", 5.0))
+
+    mock_detect.assert_not_called()
+    assert mock_tesseract.call_args.args[0].size == (40, 20)
+    assert result.orientation == 180
+
+def ocr_data(*words):
+    # image_to_data output: a layout row, then (block, line, text, conf) words
+    data = {"block_num": [1], "par_num": [1], "line_num": [0], "text": [""], "conf": [-1]}
+    for block, line, text, conf in words:
+        data["block_num"].append(block)
+        data["par_num"].append(1)
+        data["line_num"].append(line)
+        data["text"].append(text)
+        data["conf"].append(conf)
+    return data
+
+def test_words_text():
+    from app.domain.ocr import _words_text
+
+    text, confidence = _words_text(ocr_data((1, 1, "Hello", 90), (1, 1, "world", 80), (1, 2, "again", 70), (2, 1, "Next", 60)))
+
+    assert text == "Hello world\nagain\n\nNext"
+    assert confidence == 75.0
+    assert _words_text(ocr_data()) == ("", 0.0)
+
+@pytest.mark.asyncio
+async def test_recognize_cascade_keeps_confident_fast_pass():
+    image = Image.new("RGB", (40, 20), "white")
+
+    with patch("app.domain.ocr.pytesseract.image_to_data", return_value=ocr_data((1, 1, "clear", 92))) as mock_data, \
+         patch("app.domain.ocr.pytesseract.image_to_string") as mock_tesseract, \
+         patch("app.domain.ocr.preprocess.rescale") as mock_rescale:
+        result = await recognize(image, lang='eng', mode='cascade')
+
+    mock_data.assert_called_once()
+    mock_tesseract.assert_not_called()
+    mock_rescale.assert_not_called()
+    assert (result.text, result.confidence, result.pipeline) == ("clear", 92.0, "fast")
+
+@pytest.mark.asyncio
+async def test_recognize_cascade_falls_back_to_accurate():
+    image = Image.new("RGB", (40, 20), "white")
+
+    with patch("app.domain.ocr.pytesseract.image_to_data", return_value=ocr_data((1, 1, "b1urry", 41))), \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="blurry") as mock_tesseract, \
+         patch("app.domain.ocr.preprocess.rescale", return_value=(Image.new("L", (80, 40), 255), 2.0)):
+        result = await recognize(image, lang='eng', mode='cascade')
+
+    # Only the accurate pass's text is kept, with the confidence that triggered it
+    assert mock_tesseract.call_args.args[0].size == (80, 40)
+    assert (result.text, result.scale, result.confidence, result.pipeline) == ("blurry", 2.0, 41.0, "accurate")
+
+@pytest.mark.asyncio
+async def test_recognize_cascade_reads_sharper_copy(monkeypatch):
+    monkeypatch.setattr(get_settings(), "cascade_min_confidence", 50.0)
+    image = Image.new("RGB", (40, 20), "white")
+    sharper = Image.new("RGB", (60, 30), "white")
+    sharper.close = MagicMock()
+
+    async def hires():
+        return sharper
+
+    with patch("app.domain.ocr.pytesseract.image_to_data", return_value=ocr_data()), \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text") as mock_tesseract:
+        result = await recognize(image, lang='eng', mode='cascade', hires=hires)
+
+    assert mock_tesseract.call_args.args[0].size == (60, 30)
+    sharper.close.assert_called_once()
+    assert (result.confidence, result.pipeline) == (0.0, "accurate")
+
+@pytest.mark.asyncio
+async def test_recognize_cascade_rotates_off_loop(monkeypatch):
+    monkeypatch.setattr(get_settings(), "cascade_min_confidence", 50.0)
+    image = Image.new("RGB", (40, 20), "white")
+    sharper = Image.new("RGB", (60, 30), "white")
+    threads = []
+    rotate = Image.Image.rotate
+
+    def tracked_rotate(self, *args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return rotate(self, *args, **kwargs)
+
+    async def hires():
+        return sharper
+
+    with patch.object(Image.Image, "rotate", tracked_rotate), \
+         patch("app.domain.ocr.pytesseract.image_to_data", return_value=ocr_data()) as mock_data, \
+         patch("app.domain.ocr.pytesseract.image_to_string", return_value="text") as mock_tesseract:
+        await recognize(image, lang='eng', mode='cascade', auto=True, orientation=Orientation(90, "Latin", 9.0), hires=hires)
+
+    # Both the first pass's image and the sharper copy are turned upright in the worker
+    assert len(threads) == 2
+    assert all(name.startswith("ocr") for name in threads)
+    assert mock_data.call_args.args[0].size == (20, 40)
+    assert mock_tesseract.call_args.args[0].size[0] < mock_tesseract.call_args.args[0].size[1]
@@ -0,0 +1,147 @@
+import io
+import os
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from PIL import Image
+from prometheus_client import REGISTRY
+from app.config import get_settings
+from app.core import ocr_cache
+from app.core.ocr_cache import OCRCache, hash_content, make_key
+from app.main import app
+
+def test_hash_content_matches_across_sources(tmp_path):
+    p = tmp_path / "file.bin"
+    p.write_bytes(b"same content")
+
+    expected = hash_content(b"same content")
+    assert hash_content(str(p)) == expected
+    stream = io.BytesIO(b"same content")
+    assert hash_content(stream) == expected
+    # Stream position is restored
+    assert stream.tell() == 0
+
+def test_hash_content_images():
+    white = Image.new("RGB", (10, 10), "white")
+    black = Image.new("RGB", (10, 10), "black")
+
+    assert hash_content(white) == hash_content(Image.new("RGB", (10, 10), "white"))
+    assert hash_content(white) != hash_content(black)
+
+def test_make_key_depends_on_params():
+    key = make_key("abc", lang="eng", mode="fast", auto=False)
+
+    assert key == make_key("abc", mode="fast", lang="eng", auto=False)
+    assert key != make_key("abc", lang="por", mode="fast", auto=False)
+    assert key != make_key("abc", lang="eng", mode="fast", auto=False, dpi=300)
+    assert key != make_key("abd", lang="eng", mode="fast", auto=False)
+
+def test_make_key_depends_on_settings(monkeypatch):
+    key = make_key("abc", lang="eng", mode="accurate", auto=False)
+
+    monkeypatch.setattr(get_settings(), "ocr_target_x_height", 30)
+
+    assert make_key("abc", lang="eng", mode="accurate", auto=False) != key
+
+def test_memory_tier_hits_and_misses():
+    cache = OCRCache(max_bytes=1024)
+
+    assert cache.get("k") is None
+    cache.set("k", "text")
+    assert cache.get("k") == "text"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = OCRCache(max_bytes=10)
+
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert cache.get("a") == "aaaa"
+    assert cache.get("b") is None
+    assert cache.get("c") == "cccc"
+    assert cache.stats()["bytes"] <= 10
+    assert cache.stats()["evictions"] == 1
+
+def test_oversized_entries_skip_memory():
+    cache = OCRCache(max_bytes=3)
+    cache.set("k", "too long")
+    assert cache.get("k") is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    OCRCache(max_bytes=1024, directory=str(tmp_path)).set("key", "persisted")
+
+    cache = OCRCache(max_bytes=1024, directory=str(tmp_path))
+    assert cache.get("key") == "persisted"
+    assert cache.stats()["disk_hits"] == 1
+    # Promoted to memory
+    assert cache.stats()["entries"] == 1
+
+def test_disk_tier_is_trimmed(tmp_path):
+    cache = OCRCache(max_bytes=1024, directory=str(tmp_path), disk_max_bytes=25)
+    for i in range(5):
+        cache.set(f"key{i}", "x" * 10)
+        # Distinct mtimes so the oldest files go first
+        path = cache._path(f"key{i}")
+        os.utime(path, (i, i))
+
+    sizes = [size for _, size, _ in cache._disk_files()]
+    assert sum(sizes) <= 25
+    assert cache.stats()["disk_evictions"] == 3
+    cache.clear()
+    assert cache.get("key4") == "x" * 10
+
+@pytest.mark.asyncio
+async def test_disk_tier_off_event_loop(tmp_path):
+    cache = OCRCache(max_bytes=1024, directory=str(tmp_path))
+    loop_thread = threading.current_thread()
+    threads = []
+    read_disk, write_disk = cache._read_disk, cache._write_disk
+
+    def record(func):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return func(*args)
+        return wrapper
+
+    with patch.object(cache, "_read_disk", record(read_disk)), patch.object(cache, "_write_disk", record(write_disk)):
+        await cache.set_async("key", "persisted")
+        cache.clear()
+        assert await cache.get_async("key") == "persisted"
+        # Memory hits don't touch the disk at all
+        assert await cache.get_async("key") == "persisted"
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
+    assert cache.stats()["disk_hits"] == 1
+
+def test_cache_stats_exported():
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    before = {result: sample("api_ocr_cache_lookups_total", result=result) for result in ("memory", "miss")}
+    evictions = sample("api_ocr_cache_evictions_total", tier="memory")
+    cache = ocr_cache.get_cache()
+    cache.get("absent")
+    cache.set("present", "text")
+    cache.get("present")
+    cache.max_bytes, max_bytes = 4, cache.max_bytes
+    try:
+        cache.set("other", "text")
+    finally:
+        cache.max_bytes = max_bytes
+
+    assert sample("api_ocr_cache_lookups_total", result="memory") == before["memory"] + 1
+    assert sample("api_ocr_cache_lookups_total", result="miss") == before["miss"] + 1
+    assert sample("api_ocr_cache_evictions_total", tier="memory") == evictions + 1
+
+    stats = TestClient(app).get("/status").json()["cache"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert "api_ocr_cache_lookups_total" in TestClient(app).get("/metrics").text
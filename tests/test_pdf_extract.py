@@ -1,33 +1,50 @@
+import io
+import json
+import asyncio
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+from app.config import get_settings
 from app.main import app
+from app.domain.ocr import OCRResult, Orientation
 
 client = TestClient(app)
 
+def text_page():
+    image = Image.new("L", (200, 280), 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(20, 260, 20):
+        draw.text((20, y), "Some text on this page", fill=0)
+    # The same image stands for every rendered page
+    image.close = MagicMock()
+    return image
+
 @pytest.fixture
-def mock_ocr_read_image():
-    with patch("app.domain.ocr.read_image", new_callable=AsyncMock) as mock:
-        mock.return_value = "PDF Page Text"
+def mock_ocr_recognize():
+    with patch("app.domain.ocr.recognize", new_callable=AsyncMock) as mock:
+        mock.return_value = OCRResult(text="PDF Page Text")
         yield mock
 
 @pytest.fixture
 def mock_pdf_tools():
-    # Mock both convert_from_path and pdfinfo_from_path
-    with patch("app.domain.pdf_ocr.convert_from_path") as mock_convert, \
-         patch("app.domain.pdf_ocr.pdfinfo_from_path") as mock_info:
+    # Mock page rendering, pdfinfo_from_path and the text layer (scanned PDF by default)
+    with patch("app.domain.pdf_ocr._render_page") as mock_render, \
+         patch("app.domain.pdf_ocr.pdfinfo_from_path") as mock_info, \
+         patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
 
-        # Mock convert_from_path to return a list of dummy images
-        mock_image = MagicMock()
-        mock_convert.return_value = [mock_image, mock_image] # 2 pages
+        mock_text_layer.side_effect = lambda path, first, last: [None] * (last - first + 1)
+
+        # Pages are rendered one at a time, so each call returns a single image
+        mock_render.return_value = text_page()
 
         # Mock pdfinfo to return page count
         mock_info.return_value = {"Pages": 2}
 
-        yield mock_convert, mock_info
+        yield mock_render, mock_info
 
-def test_extract_pdf_success(mock_ocr_read_image, mock_pdf_tools):
-    mock_convert, mock_info = mock_pdf_tools
+def test_extract_pdf_success(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
 
     # Valid PDF header
     pdf_content = b'%PDF-1.4\n'
@@ -42,8 +59,8 @@ def test_extract_pdf_success(mock_ocr_read_image, mock_pdf_tools):
     assert "--- Page 2 ---" in data[0]["text"]
     assert "PDF Page Text" in data[0]["text"]
 
-def test_extract_pdf_page_limit_exceeded(mock_ocr_read_image, mock_pdf_tools):
-    mock_convert, mock_info = mock_pdf_tools
+def test_extract_pdf_page_limit_exceeded(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
 
     # Simulate 15 pages
     mock_info.return_value = {"Pages": 15}
@@ -56,13 +73,11 @@ def test_extract_pdf_page_limit_exceeded(mock_ocr_read_image, mock_pdf_tools):
     assert response.status_code == 400
     assert "Limit is 10" in response.json()["detail"]
 
-def test_extract_pdf_force_processing(mock_ocr_read_image, mock_pdf_tools):
-    mock_convert, mock_info = mock_pdf_tools
+def test_extract_pdf_force_processing(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
 
     # Simulate 15 pages
     mock_info.return_value = {"Pages": 15}
-    # Mock convert to return 15 images (dummy)
-    mock_convert.return_value = [MagicMock()] * 15
 
     pdf_content = b'%PDF-1.4\n'
     files = {"input_file": ("large.pdf", pdf_content, "application/pdf")}
@@ -73,8 +88,9 @@ def test_extract_pdf_force_processing(mock_ocr_read_image, mock_pdf_tools):
     assert response.status_code == 200
     # Should process successfully
     assert len(response.json()) == 1
+    assert mock_ocr_recognize.call_count == 15
 
-def test_extract_pdf_invalid_file(mock_ocr_read_image, mock_pdf_tools):
+def test_extract_pdf_invalid_file(mock_ocr_recognize, mock_pdf_tools):
     # Text file content
     txt_content = b"Not a PDF"
     files = {"input_file": ("fake.pdf", txt_content, "application/pdf")}
@@ -84,8 +100,80 @@ def test_extract_pdf_invalid_file(mock_ocr_read_image, mock_pdf_tools):
     assert response.status_code == 400
     assert "Invalid file type" in response.json()["detail"] or "Could not determine" in response.json()["detail"]
 
-def test_extract_pdf_with_ner(mock_ocr_read_image, mock_pdf_tools):
-    mock_convert, mock_info = mock_pdf_tools
+@pytest.mark.parametrize("mode, status", [("balanced", 200), ("cascade", 200), ("best", 400)])
+def test_extract_pdf_modes(mock_ocr_recognize, mock_pdf_tools, mode, status):
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files, data={"mode": mode})
+
+    assert response.status_code == status
+    if status == 200:
+        assert {call.kwargs["mode"] for call in mock_ocr_recognize.call_args_list} == {mode}
+
+def test_extract_pdf_cascade_rerenders_for_accurate_pass(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 1}
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files, data={"mode": "cascade"})
+
+    assert response.status_code == 200
+    assert mock_render.call_args.args[2] == 200
+    # Pages the fast pass is unsure about are re-rendered at 300 DPI
+    hires = mock_ocr_recognize.call_args.kwargs["hires"]
+    asyncio.run(hires())
+    assert mock_render.call_args.args[2] == 300
+
+def test_extract_pdf_detects_orientation_once(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 4}
+    orientation = Orientation(rotate=180, script="Latin", confidence=6.0)
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    # The first page is inconclusive (e.g. a cover with little text), the second is not
+    with patch("app.domain.ocr.detect_orientation", new_callable=AsyncMock) as mock_detect:
+        mock_detect.side_effect = [None, orientation]
+        response = client.post("/extract_pdf", files=files, data={"auto_detect": "true"})
+
+    assert response.status_code == 200
+    assert mock_detect.call_count == 2
+    # Sampled at low resolution, before the pages are rendered for OCR
+    assert [call.args[2] for call in mock_render.call_args_list[:2]] == [150, 150]
+    assert mock_ocr_recognize.call_count == 4
+    for call in mock_ocr_recognize.call_args_list:
+        assert call.kwargs["orientation"] == orientation
+        assert call.kwargs["auto"] is True
+
+def test_extract_pdf_skips_blank_pages(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 3}
+    # The middle page is a separator sheet
+    mock_render.side_effect = lambda path, page_number, dpi: (
+        Image.new("L", (200, 280), 250) if page_number == 2 else text_page()
+    )
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files)
+
+    assert response.status_code == 200
+    assert mock_ocr_recognize.call_count == 2
+    document = response.json()[0]
+    assert [page["source"] for page in document["pages"]] == ["ocr", "blank", "ocr"]
+    assert "--- Page 2 ---\n\n\n--- Page 3 ---" in document["text"]
+
+def test_extract_pdf_blank_detection_disabled(mock_ocr_recognize, mock_pdf_tools, monkeypatch):
+    mock_render, _ = mock_pdf_tools
+    mock_render.return_value = Image.new("L", (200, 280), 255)
+    monkeypatch.setattr(get_settings(), "blank_page_max_ink", 0)
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files)
+
+    assert response.status_code == 200
+    assert mock_ocr_recognize.call_count == 2
+
+def test_extract_pdf_with_ner(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
 
     # Valid PDF header
     pdf_content = b'%PDF-1.4\n'
@@ -104,3 +192,300 @@ def test_extract_pdf_with_ner(mock_ocr_read_image, mock_pdf_tools):
         assert data[0]["entities"][0]["text"] == "Entity"
 
         mock_ner.assert_called_once()
+
+def test_extract_pdf_pages_in_order(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 4}
+
+    # Make earlier pages finish last
+    calls = {"count": 0}
+    async def slow_ocr(*args, **kwargs):
+        calls["count"] += 1
+        page = calls["count"]
+        await asyncio.sleep(0.01 * (5 - page))
+        return OCRResult(text=f"text {page}")
+    mock_ocr_recognize.side_effect = slow_ocr
+
+    pdf_content = b'%PDF-1.4\n'
+    files = {"input_file": ("test.pdf", pdf_content, "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files)
+
+    assert response.status_code == 200
+    text = response.json()[0]["text"]
+    positions = [text.index(f"--- Page {n} ---") for n in range(1, 5)]
+    assert positions == sorted(positions)
+    for n in range(1, 5):
+        assert f"--- Page {n} ---\ntext {n}" in text
+
+def test_extract_pdf_renders_pages_individually(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 3}
+
+    pdf_content = b'%PDF-1.4\n'
+    files = {"input_file": ("test.pdf", pdf_content, "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files)
+
+    assert response.status_code == 200
+    assert mock_render.call_count == 3
+    assert sorted(call.args[1] for call in mock_render.call_args_list) == [1, 2, 3]
+    # Rendered pages go straight to OCR and are released afterwards
+    page_image = mock_render.return_value
+    for call in mock_ocr_recognize.call_args_list:
+        assert call.args[0] is page_image
+    assert page_image.close.call_count == 3
+
+def test_extract_pdf_page_selection(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 30}
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    with patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
+        mock_text_layer.side_effect = lambda path, first, last: [None] * (last - first + 1)
+        # The 10-page limit applies to the selection, not the document
+        response = client.post("/extract_pdf", files=files, data={"pages": "7, 2-3"})
+
+    assert response.status_code == 200
+    data = response.json()[0]
+    assert [page["page"] for page in data["pages"]] == [2, 3, 7]
+    assert "--- Page 1 ---" not in data["text"]
+    assert data["text"].index("--- Page 3 ---") < data["text"].index("--- Page 7 ---")
+    # Only the selected pages are read and rendered
+    assert sorted(call.args[1:] for call in mock_text_layer.call_args_list) == [(2, 3), (7, 7)]
+    assert sorted(call.args[1] for call in mock_render.call_args_list) == [2, 3, 7]
+
+def test_extract_pdf_max_pages(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 200}
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files, data={"pages": "5-", "max_pages": "1"})
+
+    assert response.status_code == 200
+    assert response.json()[0]["text"] == "--- Page 5 ---\nPDF Page Text"
+    assert mock_render.call_count == 1
+
+def test_extract_pdf_selection_over_limit(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 30}
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files, data={"pages": "1-12"})
+
+    assert response.status_code == 400
+    assert "Selection has 12 pages. Limit is 10" in response.json()["detail"]
+    mock_render.assert_not_called()
+
+@pytest.mark.parametrize("data", [
+    {"pages": "a"},
+    {"pages": "3-1"},
+    {"pages": "0"},
+    {"pages": "40-"},
+    {"max_pages": "0"},
+])
+def test_extract_pdf_invalid_selection(mock_ocr_recognize, mock_pdf_tools, data):
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    response = client.post("/extract_pdf", files=files, data=data)
+
+    assert response.status_code == 400
+    mock_ocr_recognize.assert_not_called()
+
+def test_format_page_ranges():
+    from app.domain.pdf_ocr import format_page_ranges, parse_page_ranges
+
+    assert format_page_ranges([1, 2, 3, 7, 9, 10]) == "1-3,7,9-10"
+    assert parse_page_ranges("1-3, 7,10-") == [(1, 3), (7, 7), (10, None)]
+    assert parse_page_ranges(" ") is None
+
+def test_extract_pdf_cached_selection(mock_ocr_recognize, mock_pdf_tools):
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    first = client.post("/extract_pdf", files=files, data={"pages": "1"})
+    second = client.post("/extract_pdf", files=files)
+
+    assert first.json()[0]["text"] == "--- Page 1 ---\nPDF Page Text"
+    # A selection is cached apart from the whole document
+    assert "--- Page 2 ---" in second.json()[0]["text"]
+    assert mock_ocr_recognize.call_count == 3
+
+def test_extract_pdf_cached_selection_normalized(mock_ocr_recognize, mock_pdf_tools):
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    client.post("/extract_pdf", files=files)
+    second = client.post("/extract_pdf", files=files, data={"pages": "2,1"})
+
+    # Keyed by the pages actually read, so this is the whole document again
+    assert mock_ocr_recognize.call_count == 2
+    assert [page["source"] for page in second.json()[0]["pages"]] == ["cache", "cache"]
+
+def test_extract_pdf_cached_document(mock_ocr_recognize, mock_pdf_tools):
+    pdf_content = b'%PDF-1.4\n'
+    files = {"input_file": ("test.pdf", pdf_content, "application/pdf")}
+
+    first = client.post("/extract_pdf", files=files)
+    second = client.post("/extract_pdf", files=files)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()[0]["text"] == second.json()[0]["text"]
+    # The second request is served from the whole-document cache
+    assert mock_ocr_recognize.call_count == 2
+    assert [page["source"] for page in second.json()[0]["pages"]] == ["cache", "cache"]
+
+def test_extract_pdf_reports_page_metadata(mock_ocr_recognize, mock_pdf_tools):
+    mock_ocr_recognize.return_value = OCRResult(text="PDF Page Text", scale=1.5)
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+
+    with patch("app.domain.pdf_ocr.extract_text_layer", return_value=["Embedded text of the first page", None]):
+        response = client.post("/extract_pdf", files=files, data={"mode": "accurate"})
+
+    assert response.status_code == 200
+    assert response.json()[0]["pages"] == [
+        {"page": 1, "source": "text_layer", "scale": None, "skew": None, "orientation": None, "script": None,
+         "confidence": None, "pipeline": None},
+        {"page": 2, "source": "ocr", "scale": 1.5, "skew": None, "orientation": None, "script": None,
+         "confidence": None, "pipeline": None},
+    ]
+
+def test_extract_pdf_uses_text_layer(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+
+    with patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
+        # Hybrid document: page 1 is born-digital, page 2 is scanned
+        mock_text_layer.return_value = ["Embedded page text", None]
+
+        pdf_content = b'%PDF-1.4\n'
+        files = {"input_file": ("test.pdf", pdf_content, "application/pdf")}
+        response = client.post("/extract_pdf", files=files)
+
+    assert response.status_code == 200
+    text = response.json()[0]["text"]
+    assert "--- Page 1 ---\nEmbedded page text" in text
+    assert "--- Page 2 ---\nPDF Page Text" in text
+    # Only the scanned page was rasterized and OCR'd
+    assert mock_render.call_count == 1
+    assert mock_render.call_args.args[1] == 2
+    mock_ocr_recognize.assert_called_once()
+
+def test_extract_pdf_force_ocr(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+
+    with patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
+        mock_text_layer.return_value = ["Embedded page text", "More embedded text"]
+
+        pdf_content = b'%PDF-1.4\n'
+        files = {"input_file": ("test.pdf", pdf_content, "application/pdf")}
+        response = client.post("/extract_pdf", files=files, data={"force_ocr": "true"})
+
+    assert response.status_code == 200
+    assert "Embedded page text" not in response.json()[0]["text"]
+    mock_text_layer.assert_not_called()
+    assert mock_ocr_recognize.call_count == 2
+
+def test_extract_text_layer_splits_pages():
+    from app.domain.pdf_ocr import extract_text_layer
+
+    output = "First page with plenty of text\fx\fThird page with plenty of text\f"
+    with patch("app.domain.pdf_ocr.subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0, stdout=output.encode())
+
+        pages = extract_text_layer("doc.pdf", 1, 3)
+
+    assert pages == ["First page with plenty of text", None, "Third page with plenty of text"]
+    args = mock_run.call_args.args[0]
+    assert args[:5] == ["pdftotext", "-f", "1", "-l", "3"]
+
+def test_extract_text_layer_without_pdftotext():
+    from app.domain.pdf_ocr import extract_text_layer
+
+    with patch("app.domain.pdf_ocr.subprocess.run", side_effect=FileNotFoundError):
+        assert extract_text_layer("doc.pdf", 1, 2) == [None, None]
+
+def test_render_page_runs_pdftoppm_once():
+    from app.domain.pdf_ocr import _render_page
+
+    ppm = io.BytesIO()
+    Image.new("RGB", (20, 30), "white").save(ppm, format="PPM")
+    with patch("app.domain.pdf_ocr.subprocess.run") as mock_run, \
+         patch("app.domain.pdf_ocr.pdfinfo_from_path") as mock_info:
+        mock_run.return_value = MagicMock(returncode=0, stdout=ppm.getvalue())
+
+        image = _render_page("doc.pdf", 2, 300)
+
+    # One subprocess per page: no pdfinfo before rendering
+    mock_info.assert_not_called()
+    mock_run.assert_called_once()
+    assert mock_run.call_args.args[0] == ["pdftoppm", "-r", "300", "-f", "2", "-l", "2", "doc.pdf"]
+    assert image.size == (20, 30)
+
+def test_render_page_without_output():
+    from app.domain.pdf_ocr import _render_page
+
+    with patch("app.domain.pdf_ocr.subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=1, stdout=b"")
+        assert _render_page("doc.pdf", 9, 200) is None
+
+def test_extract_pdf_large_upload_not_copied(mock_ocr_recognize, mock_pdf_tools):
+    # Larger than Starlette's in-memory spool, so the upload is already on disk
+    content = b"%PDF-1.4\n" + b"0" * (2 * 1024 * 1024)
+    seen = {}
+
+    async def process_pdf(file_path, **kwargs):
+        with open(file_path, "rb") as f:
+            seen["size"] = len(f.read())
+        seen["path"] = file_path
+        return "PDF text"
+
+    with patch("app.domain.pdf_ocr.process_pdf", side_effect=process_pdf), \
+         patch("app.domain.fileUpload._save_file_to_server") as mock_save:
+        response = client.post("/extract_pdf", files={"input_file": ("big.pdf", content, "application/pdf")})
+
+    assert response.status_code == 200
+    mock_save.assert_not_called()
+    assert seen["path"].startswith("/proc/")
+    assert seen["size"] == len(content)
+
+def test_extract_pdf_stream(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+
+    with patch("app.domain.pdf_ocr.extract_text_layer") as mock_text_layer:
+        mock_text_layer.return_value = ["Embedded page text", None]
+
+        files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+        response = client.post("/extract_pdf", files=files, data={"stream": "true"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    pages = {record["page"]: record for record in records[:-1]}
+    assert [record["type"] for record in records] == ["page", "page", "summary"]
+    assert pages[1]["text"] == "Embedded page text"
+    assert pages[2]["text"] == "PDF Page Text"
+    assert all("entities" in record and "time_taken" in record for record in pages.values())
+    assert records[-1]["total"] == 2
+    assert records[-1]["failed"] == []
+    assert records[-1]["error"] is None
+
+def test_extract_pdf_stream_page_limit(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_info.return_value = {"Pages": 11}
+
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+    response = client.post("/extract_pdf", files=files, data={"stream": "true"})
+
+    # Checked before streaming starts, so it is still a regular error response
+    assert response.status_code == 400
+
+def test_extract_pdf_stream_reports_failure_in_summary(mock_ocr_recognize, mock_pdf_tools):
+    mock_render, mock_info = mock_pdf_tools
+    mock_render.side_effect = RuntimeError("poppler crashed")
+
+    files = {"input_file": ("test.pdf", b'%PDF-1.4\n', "application/pdf")}
+    response = client.post("/extract_pdf", files=files, data={"stream": "true"})
+
+    assert response.status_code == 200
+    summary = json.loads(response.text.splitlines()[-1])
+    assert summary["type"] == "summary"
+    assert "poppler crashed" in summary["error"]
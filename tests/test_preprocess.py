@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from app.domain import preprocess
+
+def text_page(width, height, font_size):
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    for y in range(font_size * 2, height - font_size * 2, font_size * 2):
+        draw.text((font_size, y), "The quick brown fox jumps over the lazy dog", fill=0, font=font)
+    return image
+
+def test_estimate_x_height_follows_font_size():
+    small = preprocess.estimate_x_height(text_page(900, 600, 16))
+    large = preprocess.estimate_x_height(text_page(3600, 2400, 64))
+
+    # The x-height of a font is roughly half its size
+    assert 6 <= small <= 11
+    assert 24 <= large <= 44
+    # Measured on a downsampled copy, but reported in the page's own pixels
+    assert 3 <= large / small <= 5
+
+def test_estimate_x_height_blank_page():
+    assert preprocess.estimate_x_height(Image.new("L", (500, 500), 255)) is None
+
+def test_estimate_x_height_light_text_on_dark():
+    page = text_page(900, 600, 32)
+
+    assert preprocess.estimate_x_height(Image.eval(page, lambda v: 255 - v)) == preprocess.estimate_x_height(page)
+
+@pytest.mark.parametrize("x_height, expected", [
+    (None, 1.0),
+    (24, 1.0),
+    (22, 1.0),
+    (8, 3.0),
+    (12, 2.0),
+    (96, 0.5),
+    (200, 0.5),
+])
+def test_choose_scale(x_height, expected):
+    assert preprocess.choose_scale(x_height, target=24, min_scale=0.5, max_scale=3.0) == expected
+
+def test_rescale_small_text_is_enlarged():
+    page = text_page(900, 600, 16)
+
+    resized, scale = preprocess.rescale(page, target=24, min_scale=0.5, max_scale=3.0)
+
+    assert scale > 2
+    assert resized.size == (round(900 * scale), round(600 * scale))
+
+def test_rescale_oversized_scan_is_shrunk():
+    page = text_page(3600, 2400, 128)
+
+    resized, scale = preprocess.rescale(page, target=24, min_scale=0.5, max_scale=3.0)
+
+    assert scale == 0.5
+    assert resized.size == (1800, 1200)
+
+def test_rescale_keeps_image_at_target_size():
+    page = text_page(1800, 1200, 48)
+
+    resized, scale = preprocess.rescale(page, target=preprocess.estimate_x_height(page), min_scale=0.5, max_scale=3.0)
+
+    assert scale == 1.0
+    assert resized is page
+
+def test_sauvola_follows_uneven_lighting():
+    # A page lit from the top: the paper fades from white to dark gray
+    page = text_page(900, 600, 32)
+    light = np.linspace(1.0, 0.2, page.size[1])[:, None]
+    gray = (np.asarray(page) * 0.8 * light + 40 * light).astype(np.uint8)
+
+    sauvola = preprocess.binarize(gray, "sauvola")
+    otsu = preprocess.binarize(gray, "otsu")
+    ink = np.asarray(page) < 128
+
+    # Otsu turns the darker half of the background into ink; Sauvola does not
+    assert sauvola[~ink].mean() < 0.02
+    assert otsu[~ink].mean() > 0.1
+    assert sauvola[ink].mean() > 0.8
+
+def test_binarize_unknown_method():
+    with pytest.raises(ValueError):
+        preprocess.binarize(np.zeros((4, 4), dtype=np.uint8), "adaptive")
+
+def test_remove_specks():
+    mask = np.zeros((8, 8), dtype=bool)
+    mask[1, 1] = True          # isolated speck
+    mask[4:7, 3:6] = True      # solid blob
+
+    cleaned = preprocess.remove_specks(mask)
+
+    assert not cleaned[1, 1]
+    assert cleaned[4:7, 3:6].all()
+
+@pytest.mark.parametrize("angle", [-3.0, -1.0, 0.0, 2.5, 4.0])
+def test_estimate_skew(angle):
+    # Rotating counter-clockwise by `angle` must be undone by rotating back
+    page = text_page(1200, 900, 28).rotate(angle, expand=True, fillcolor=255)
+
+    assert preprocess.estimate_skew(page) == pytest.approx(-angle, abs=0.3)
+
+def test_estimate_skew_blank_page():
+    assert preprocess.estimate_skew(Image.new("L", (200, 200), 255)) == 0.0
+
+def test_clean_page():
+    page = text_page(1200, 900, 28).rotate(-2.0, expand=True, fillcolor=255).convert("RGB")
+
+    cleaned, skew = preprocess.clean_page(page)
+
+    assert skew == pytest.approx(2.0, abs=0.3)
+    assert cleaned.mode == "L"
+    assert set(np.unique(np.asarray(cleaned))) == {0, 255}
+    # Straightened: text lines are separated by fully blank rows again
+    assert preprocess.estimate_skew(cleaned) == pytest.approx(0.0, abs=0.2)
+
+def test_ink_ratio_blank_page_with_noise_and_dust():
+    rng = np.random.RandomState(0)
+    paper = np.clip(rng.normal(235, 8, (2339, 1654)), 0, 255).astype(np.uint8)
+    for y, x in zip(rng.randint(0, 2337, 200), rng.randint(0, 1652, 200)):
+        paper[y:y + 2, x:x + 2] = 20
+
+    assert preprocess.ink_ratio(Image.fromarray(paper)) < 0.0005
+
+def test_ink_ratio_keeps_a_single_line_of_text():
+    page = Image.new("L", (1654, 2339), 255)
+    ImageDraw.Draw(page).text((100, 100), "Signed: John Smith", fill=0, font=ImageFont.load_default(size=28))
+
+    assert preprocess.ink_ratio(page) > 0.0005
+    assert preprocess.ink_ratio(text_page(1654, 2339, 28)) > 0.05
+
+def test_ink_ratio_light_text_on_dark():
+    page = Image.new("L", (1654, 2339), 255)
+    ImageDraw.Draw(page).text((100, 100), "Signed: John Smith", fill=0, font=ImageFont.load_default(size=28))
+    inverted = Image.eval(page, lambda v: 255 - v)
+
+    # An inverted scan with text is not blank; a uniformly dark page still is
+    assert preprocess.ink_ratio(inverted) > 0.0005
+    assert preprocess.ink_ratio(inverted) == pytest.approx(preprocess.ink_ratio(page))
+    assert preprocess.ink_ratio(Image.new("L", (1654, 2339), 0)) == 0.0
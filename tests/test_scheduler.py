@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.core import scheduler
+from app.core.scheduler import FairScheduler
+from app.main import app
+
+client = TestClient(app)
+
+def limits(table):
+    return lambda tenant: table.get(tenant, (1.0, None))
+
+async def run_units(fair, units):
+    """
+    Queues (tenant, priority) units behind a held slot, then releases it and
+    returns the order in which the units got a worker.
+    """
+    order = []
+    await fair.acquire("holder", scheduler.INTERACTIVE)
+
+    async def unit(tenant, priority):
+        await fair.acquire(tenant, priority)
+        order.append(tenant)
+        await asyncio.sleep(0)
+        fair.release(tenant)
+
+    tasks = [asyncio.ensure_future(unit(tenant, priority)) for tenant, priority in units]
+    await asyncio.sleep(0)
+    fair.release("holder")
+    await asyncio.gather(*tasks)
+    return order
+
+@pytest.mark.asyncio
+async def test_tenants_share_by_weight():
+    fair = FairScheduler(slots=1, limits=limits({"big": (2.0, None)}))
+    units = [("big", scheduler.BULK)] * 20 + [("small", scheduler.BULK)] * 10
+
+    order = await run_units(fair, units)
+
+    # The flood from 'big' doesn't starve 'small': 2 to 1 until 'small' runs out
+    first = order[:15]
+    assert first.count("big") == 10
+    assert first.count("small") == 5
+    assert fair.stats()["tenants"]["small"]["served"] == 10
+
+@pytest.mark.asyncio
+async def test_interactive_before_bulk():
+    fair = FairScheduler(slots=1, limits=limits({}))
+    units = [("batch", scheduler.BULK)] * 3 + [("single", scheduler.INTERACTIVE)]
+
+    order = await run_units(fair, units)
+
+    assert order == ["single", "batch", "batch", "batch"]
+
+@pytest.mark.asyncio
+async def test_concurrency_cap():
+    fair = FairScheduler(slots=4, limits=limits({"capped": (1.0, 2)}))
+    for _ in range(2):
+        await fair.acquire("capped", scheduler.BULK)
+
+    waiter = asyncio.ensure_future(fair.acquire("capped", scheduler.BULK))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    # Free workers still go to other tenants
+    await fair.acquire("other", scheduler.BULK)
+
+    stats = fair.stats()
+    assert stats["running"] == 3
+    assert stats["tenants"]["capped"] == {"running": 2, "queued": {"interactive": 0, "bulk": 1}, "served": 2}
+
+    fair.release("capped")
+    await waiter
+    assert fair.stats()["tenants"]["capped"]["running"] == 2
+
+@pytest.mark.asyncio
+async def test_idle_tenant_does_not_bank_turns():
+    fair = FairScheduler(slots=1, limits=limits({}))
+    await run_units(fair, [("busy", scheduler.BULK)] * 10)
+
+    order = await run_units(fair, [("busy", scheduler.BULK)] * 4 + [("late", scheduler.BULK)] * 4)
+
+    # 'late' was idle while 'busy' ran alone, and alternates with it instead
+    # of taking the next four turns
+    assert order[:4].count("late") == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    fair = FairScheduler(slots=1, limits=limits({}))
+    await fair.acquire("a", scheduler.BULK)
+    cancelled = asyncio.ensure_future(fair.acquire("b", scheduler.BULK))
+    waiter = asyncio.ensure_future(fair.acquire("c", scheduler.BULK))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    fair.release("a")
+    await waiter
+
+    stats = fair.stats()
+    assert stats["running"] == 1
+    assert stats["tenants"]["c"]["running"] == 1
+    assert "b" not in stats["tenants"]
+
+@pytest.mark.asyncio
+async def test_tenant_config_change_takes_effect():
+    configs = {"big": MagicMock(weight=1.0, max_concurrency=None)}
+    fair = FairScheduler(slots=1)
+    units = [("big", scheduler.BULK)] * 12 + [("small", scheduler.BULK)] * 12
+
+    with patch("app.core.scheduler.get_tenant_config", side_effect=configs.get):
+        order = await run_units(fair, units)
+        assert order[:12].count("big") == 6
+
+        # The tenant's weight is raised while the process keeps running
+        configs["big"].weight = 3.0
+        order = await run_units(fair, units)
+
+    assert order[:12].count("big") == 9
+
+@pytest.mark.asyncio
+async def test_slot_uses_request_context():
+    fair = FairScheduler(slots=2, limits=limits({}))
+    scheduler.set_context("client_a", scheduler.BULK)
+
+    async with fair.slot():
+        assert fair.stats()["tenants"]["client_a"]["running"] == 1
+
+    assert fair.stats()["running"] == 0
+    with pytest.raises(ValueError):
+        scheduler.set_context("client_a", "urgent")
+
+def test_classify(monkeypatch):
+    monkeypatch.setattr(scheduler.get_settings(), "scheduler_interactive_max_units", 2)
+    assert scheduler.classify(1) == scheduler.INTERACTIVE
+    assert scheduler.classify(2) == scheduler.INTERACTIVE
+    assert scheduler.classify(3) == scheduler.BULK
+
+def test_status_reports_scheduler():
+    response = client.get("/status")
+
+    assert response.status_code == 200
+    data = response.json()["scheduler"]
+    assert data["slots"] >= 1
+    assert "tenants" in data
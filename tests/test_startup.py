@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import pytest
+
+def _imported_at_startup(env):
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('spacy', 'boto3', 'botocore', 'sentry_sdk') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return set(filter(None, result.stdout.strip().split(",")))
+
+def test_import_defers_heavy_modules():
+    # Default settings, not the test ones: telemetry is on but has no DSN
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("TELEMETRY_", "SENTRY_"))}
+
+    # spaCy and boto3 are only imported when NER/storage are first used
+    assert _imported_at_startup(env) == set()
+
+@pytest.mark.parametrize("exporter", ["sentry", "log"])
+def test_telemetry_does_not_import_storage_clients(tmp_path, exporter):
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("TELEMETRY_", "SENTRY_"))}
+    env.update(
+        TELEMETRY_EXPORTER=exporter,
+        SENTRY_DSN="https://key@sentry.invalid/1",
+        TELEMETRY_LOG_PATH=str(tmp_path / "telemetry.jsonl"),
+    )
+
+    # Sentry's automatic integrations would pull in botocore
+    assert _imported_at_startup(env) == {"sentry_sdk"}
+
+def test_startup_time_recorded(test_app):
+    assert test_app.app.state.startup_seconds > 0
@@ -0,0 +1,118 @@
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from app.core.tenants import TenantConfig
+from app.services import storage
+
+CONFIG = TenantConfig(
+    bucket_name="bucket-a",
+    endpoint_url="https://s3.example.com",
+    aws_access_key_id="key",
+    aws_secret_access_key="secret",
+    region_name="us-east-1"
+)
+
+@pytest.fixture
+def mock_session():
+    storage.invalidate_s3_clients()
+    with patch("boto3.session.Session") as session_cls:
+        session_cls.return_value.client.side_effect = lambda *args, **kwargs: MagicMock(kwargs=kwargs)
+        yield session_cls
+    storage.invalidate_s3_clients()
+
+def test_client_reused_per_tenant(mock_session):
+    first = storage.get_s3_client("client_a", CONFIG)
+    second = storage.get_s3_client("client_a", CONFIG)
+    other = storage.get_s3_client("client_b", CONFIG)
+
+    assert first is second
+    assert other is not first
+    assert first.kwargs["config"].max_pool_connections == storage.get_settings().s3_max_pool_connections
+
+def test_client_rebuilt_when_config_changes(mock_session):
+    first = storage.get_s3_client("client_a", CONFIG)
+    changed = CONFIG.model_copy(update={"aws_secret_access_key": "rotated"})
+
+    second = storage.get_s3_client("client_a", changed)
+
+    assert second is not first
+    assert second.kwargs["aws_secret_access_key"] == "rotated"
+
+def test_invalidate(mock_session):
+    first = storage.get_s3_client("client_a", CONFIG)
+    storage.invalidate_s3_clients("client_a")
+    assert storage.get_s3_client("client_a", CONFIG) is not first
+
+def test_client_cache_thread_safe(mock_session):
+    clients = []
+
+    def fetch():
+        clients.append(storage.get_s3_client("client_a", CONFIG))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+
+def test_download_uses_cached_client(mock_session):
+    with patch("app.services.storage.get_tenant_config", return_value=CONFIG):
+        paths = [storage.download_file_from_storage("client_a", "doc.png") for _ in range(2)]
+
+    try:
+        assert mock_session.return_value.client.call_count == 1
+        assert all(path.endswith(".png") for path in paths)
+    finally:
+        for path in paths:
+            storage.os.remove(path)
+
+def _object(content: bytes):
+    body = MagicMock()
+    body.read.return_value = content
+    body.iter_chunks.side_effect = lambda size: (content[i:i + size] for i in range(0, len(content), size))
+    return {"ContentLength": len(content), "Body": body}
+
+def test_fetch_small_object_in_memory(mock_session, monkeypatch):
+    monkeypatch.setattr(storage.get_settings(), "storage_memory_threshold", 1024)
+    client = storage.get_s3_client("client_a", CONFIG)
+    client.get_object.return_value = _object(b"small")
+
+    with patch("app.services.storage.get_tenant_config", return_value=CONFIG):
+        assert storage.fetch_object("client_a", "doc.png") == b"small"
+
+    client.get_object.assert_called_once_with(Bucket="bucket-a", Key="doc.png")
+
+def test_fetch_large_object_spills_to_disk(mock_session, monkeypatch):
+    monkeypatch.setattr(storage.get_settings(), "storage_memory_threshold", 4)
+    client = storage.get_s3_client("client_a", CONFIG)
+    client.get_object.return_value = _object(b"large content")
+
+    with patch("app.services.storage.get_tenant_config", return_value=CONFIG):
+        path = storage.fetch_object("client_a", "doc.png")
+
+    try:
+        assert path.endswith(".png")
+        with open(path, "rb") as f:
+            assert f.read() == b"large content"
+    finally:
+        storage.os.remove(path)
+
+def test_fetch_object_of_unknown_size_spills_to_disk(mock_session, monkeypatch):
+    monkeypatch.setattr(storage.get_settings(), "storage_memory_threshold", 1024)
+    client = storage.get_s3_client("client_a", CONFIG)
+    response = _object(b"no length")
+    del response["ContentLength"]
+    client.get_object.return_value = response
+
+    with patch("app.services.storage.get_tenant_config", return_value=CONFIG):
+        path = storage.fetch_object("client_a", "doc.png")
+
+    try:
+        # Could be any size, so it is never read whole into memory
+        response["Body"].read.assert_not_called()
+        with open(path, "rb") as f:
+            assert f.read() == b"no length"
+    finally:
+        storage.os.remove(path)
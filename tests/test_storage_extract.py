@@ -3,6 +3,7 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.main import app
+from app.domain.ocr import OCRResult
 
 client = TestClient(app)
 
@@ -17,18 +18,20 @@ def dummy_pdf(tmp_path):
 @pytest.fixture
 def mock_storage_download(dummy_pdf):
     with patch("app.services.storage.download_file_from_storage") as mock:
-        # Return a copy so deletion doesn't affect source
+        # Return a copy per key so deletion doesn't affect source or concurrent downloads
         def side_effect(client_id, key):
             import shutil
-            dest = dummy_pdf + ".tmp"
+            dest = f"{dummy_pdf}.{key.replace('/', '_')}.tmp"
             shutil.copy(dummy_pdf, dest)
             return dest
         mock.side_effect = side_effect
         yield mock
 
 def test_extract_pdf_storage_success(mock_storage_download):
-    with patch("app.domain.pdf_ocr.process_pdf") as mock_ocr:
+    with patch("app.domain.pdf_ocr.process_pdf") as mock_ocr, \
+         patch("app.domain.pdf_ocr.pdfinfo_from_path") as mock_info:
         mock_ocr.return_value = "Extracted PDF Text"
+        mock_info.return_value = {"Pages": 1}
 
         response = client.post(
             "/extract_pdf",
@@ -70,9 +73,11 @@ def test_extract_pdf_ambiguous(dummy_pdf):
     assert response.status_code == 400
     assert "Ambiguous request" in response.json()["detail"]
 
-def test_extract_text_storage_success(mock_storage_download):
-    with patch("app.domain.ocr.read_image") as mock_ocr:
-        mock_ocr.return_value = "Extracted Image Text"
+def test_extract_text_storage_success():
+    with patch("app.services.storage.fetch_object") as mock_fetch, \
+         patch("app.domain.ocr.recognize") as mock_ocr:
+        mock_fetch.side_effect = lambda client_id, key: f"bytes of {key}".encode()
+        mock_ocr.return_value = OCRResult(text="Extracted Image Text")
 
         # Requests/TestClient handles list in data by repeating keys
         data = {
@@ -90,8 +95,10 @@ def test_extract_text_storage_success(mock_storage_download):
         assert data[0]["text"] == "Extracted Image Text"
         assert data[1]["file_name"] == "img2.jpg"
 
-        assert mock_storage_download.call_count == 2
+        assert mock_fetch.call_count == 2
         assert mock_ocr.call_count == 2
+        # Small objects are handed to OCR in memory
+        assert {call.kwargs["img_path"] for call in mock_ocr.call_args_list} == {b"bytes of img1.png", b"bytes of img2.jpg"}
 
 def test_extract_text_storage_missing_params():
     response = client.post(
@@ -120,3 +127,37 @@ def test_extract_pdf_invalid_pdf_header(tmp_path):
 
         assert response.status_code == 400
         assert "not a valid PDF" in response.json()["detail"]
+
+def test_extract_text_storage_downloads_overlap_ocr(monkeypatch):
+    import asyncio
+    import time
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "extract_max_concurrency", 1)
+    monkeypatch.setattr(get_settings(), "storage_download_concurrency", 4)
+    fetch_started = []
+
+    def fetch(client_id, key):
+        fetch_started.append((key, time.monotonic()))
+        time.sleep(0.05)
+        return key.encode()
+
+    ocr_started = []
+
+    async def read_image(img_path, lang, mode, auto):
+        ocr_started.append(time.monotonic())
+        await asyncio.sleep(0.05)
+        return OCRResult(text="text")
+
+    with patch("app.services.storage.fetch_object", side_effect=fetch), \
+         patch("app.domain.ocr.recognize", side_effect=read_image):
+        response = client.post("/extract_text", data={
+            "source": "object_storage",
+            "client_id": "client_a",
+            "object_keys": ["a.png", "b.png", "c.png"]
+        })
+
+    assert response.status_code == 200
+    assert [doc["file_name"] for doc in response.json()] == ["a.png", "b.png", "c.png"]
+    # Every download starts before the first OCR call finishes
+    assert max(t for _, t in fetch_started) < ocr_started[0] + 0.05
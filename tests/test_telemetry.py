@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from app.core import telemetry
+
+def test_span_is_noop_when_disabled():
+    with telemetry.span("download", mode="fast") as span:
+        assert span is None
+    with telemetry.transaction("job pdf", op="job") as transaction:
+        assert transaction is None
+
+def test_log_exporter_writes_stage_spans(tmp_path):
+    log_path = tmp_path / "telemetry.jsonl"
+    env = dict(
+        os.environ,
+        TELEMETRY_ENABLED="true",
+        TELEMETRY_EXPORTER="log",
+        TELEMETRY_LOG_PATH=str(log_path),
+        TELEMETRY_TRACES_SAMPLE_RATE="1.0",
+    )
+    code = (
+        "import sentry_sdk\n"
+        "from app.core import metrics, telemetry\n"
+        "telemetry.init()\n"
+        "metrics.set_context(mode='fast', lang='eng', source='upload')\n"
+        "with telemetry.transaction('job pdf', op='job'):\n"
+        "    with metrics.track_stage('download'):\n"
+        "        pass\n"
+        "    with metrics.track_stage('tesseract'):\n"
+        "        pass\n"
+        "sentry_sdk.flush()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True)
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["transaction"] == "job pdf"
+    spans = {span["op"]: span for span in records[0]["spans"]}
+    assert set(spans) == {"download", "tesseract"}
+    assert spans["download"]["data"]["mode"] == "fast"
+    assert spans["download"]["duration"] is not None
@@ -0,0 +1,98 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from app.domain import tesseract_pool
+from app.domain.tesseract_pool import TesseractPool
+
+@pytest.fixture
+def fake_tesserocr(mocker):
+    fake = MagicMock()
+    # A fresh mock engine per construction
+    fake.PyTessBaseAPI.side_effect = lambda **kwargs: MagicMock(init_kwargs=kwargs)
+    mocker.patch.object(tesseract_pool, "tesserocr", fake)
+    return fake
+
+def test_lease_reuses_engine(fake_tesserocr):
+    pool = TesseractPool(size=2, max_uses=0)
+
+    with pool.lease("eng", 3) as first:
+        pass
+    with pool.lease("eng", 3) as second:
+        pass
+
+    assert first is second
+    assert fake_tesserocr.PyTessBaseAPI.call_count == 1
+    assert first.init_kwargs == {"lang": "eng", "psm": 3, "oem": tesseract_pool.DEFAULT_OEM}
+    first.Clear.assert_called()
+
+def test_lease_separates_configurations(fake_tesserocr):
+    pool = TesseractPool(size=2, max_uses=0)
+
+    with pool.lease("eng", 3) as eng:
+        pass
+    with pool.lease("por", 3) as por:
+        pass
+    with pool.lease("eng", 1) as osd:
+        pass
+
+    assert len({id(eng), id(por), id(osd)}) == 3
+
+def test_engine_recycled_after_max_uses(fake_tesserocr):
+    pool = TesseractPool(size=1, max_uses=2)
+
+    with pool.lease("eng", 3) as first:
+        pass
+    with pool.lease("eng", 3) as again:
+        pass
+    with pool.lease("eng", 3) as recycled:
+        pass
+
+    assert first is again
+    first.End.assert_called_once()
+    assert recycled is not first
+
+def test_engine_discarded_on_error(fake_tesserocr):
+    pool = TesseractPool(size=1, max_uses=0)
+
+    with pytest.raises(RuntimeError):
+        with pool.lease("eng", 3) as broken:
+            raise RuntimeError("boom")
+    with pool.lease("eng", 3) as fresh:
+        pass
+
+    broken.End.assert_called_once()
+    assert fresh is not broken
+
+def test_pool_size_bounds_concurrent_leases(fake_tesserocr):
+    pool = TesseractPool(size=1, max_uses=0)
+    acquired = threading.Event()
+
+    with pool.lease("eng", 3):
+        def contender():
+            with pool.lease("eng", 3):
+                acquired.set()
+
+        thread = threading.Thread(target=contender)
+        thread.start()
+        # Blocked while the only engine is leased
+        assert not acquired.wait(0.05)
+
+    thread.join(1)
+    assert acquired.is_set()
+
+def test_warm_and_close(fake_tesserocr):
+    pool = TesseractPool(size=2, max_uses=0)
+
+    pool.warm(["eng+por"])
+    assert fake_tesserocr.PyTessBaseAPI.call_count == 1
+
+    with pool.lease("eng+por", 3) as api:
+        pass
+    assert fake_tesserocr.PyTessBaseAPI.call_count == 1
+
+    pool.close()
+    api.End.assert_called_once()
+
+def test_unavailable_without_tesserocr(mocker):
+    mocker.patch.object(tesseract_pool, "tesserocr", None)
+    assert tesseract_pool.is_available() is False